@@ -0,0 +1,144 @@
+"""DynamoDB クライアント初期化のコールドスタート計測
+
+boto3.resource() による従来の初期化と、clients.build_client() による
+チューニング済み低レベルクライアントを比較する。
+
+各試行は新しいサブプロセスで実行し (= コールドスタート)、以下を計測する:
+- init: boto3 の import からクライアント生成 (ウォームアップ含む) まで
+- first_request: 初回の GetItem
+- second_request: 2 回目の GetItem (ウォーム状態の参考値)
+
+DynamoDB にはアクセスせず、ローカルの HTTP サーバーを
+AWS_ENDPOINT_URL_DYNAMODB で指定して応答させる。
+
+使い方:
+    python benchmarks/bench_cold_start.py [--runs 20] [--xray]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+LAMBDA_DIR = Path(__file__).resolve().parents[1] / "lambda"
+
+ITEM_RESPONSE = json.dumps(
+    {"Item": {"user_id": {"S": "user123"}, "tier": {"S": "premium"}}}
+).encode()
+
+CHILD_SCRIPT = """
+import json
+import sys
+import time
+
+start = time.perf_counter()
+
+setup, xray = sys.argv[1], sys.argv[2] == "1"
+
+if xray:
+    from aws_xray_sdk.core import patch, xray_recorder
+
+    patch(["botocore"])
+    xray_recorder.begin_segment("bench")
+
+if setup == "resource":
+    import boto3
+
+    table = boto3.resource("dynamodb").Table("bench")
+
+    def get_item():
+        return table.get_item(Key={"user_id": "user123"}).get("Item", {})
+
+else:
+    from boto3.dynamodb.types import TypeDeserializer
+
+    from clients import build_client
+
+    client = build_client("dynamodb", warm_operations=["GetItem"])
+    deserializer = TypeDeserializer()
+
+    def get_item():
+        response = client.get_item(TableName="bench", Key={"user_id": {"S": "user123"}})
+        return {k: deserializer.deserialize(v) for k, v in response.get("Item", {}).items()}
+
+init_done = time.perf_counter()
+get_item()
+first_done = time.perf_counter()
+get_item()
+second_done = time.perf_counter()
+
+print(json.dumps({
+    "init": (init_done - start) * 1000,
+    "first_request": (first_done - init_done) * 1000,
+    "second_request": (second_done - first_done) * 1000,
+}))
+"""
+
+
+class DynamoDBStubHandler(BaseHTTPRequestHandler):
+    """GetItem に固定のアイテムを返すスタブサーバー"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-amz-json-1.0")
+        self.send_header("Content-Length", str(len(ITEM_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(ITEM_RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_once(setup: str, endpoint_url: str, xray: bool) -> dict[str, float]:
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(LAMBDA_DIR),
+        "AWS_DEFAULT_REGION": "ap-northeast-1",
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_ENDPOINT_URL_DYNAMODB": endpoint_url,
+        "AWS_XRAY_CONTEXT_MISSING": "IGNORE_ERROR",
+    }
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, setup, "1" if xray else "0"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--xray", action="store_true", help="botocore に X-Ray パッチを適用して計測")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DynamoDBStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint_url = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"runs={args.runs} xray={args.xray}")
+    print(f"{'setup':<10}{'phase':<16}{'p50 (ms)':>10}{'p90 (ms)':>10}")
+
+    for setup in ("resource", "client"):
+        results = [run_once(setup, endpoint_url, args.xray) for _ in range(args.runs)]
+        for phase in ("init", "first_request", "second_request"):
+            samples = sorted(r[phase] for r in results)
+            p90 = samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+            print(f"{setup:<10}{phase:<16}{statistics.median(samples):>10.2f}{p90:>10.2f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import os
+
+import boto3
+from botocore.client import BaseClient
+from botocore.config import Config
+
+# Lambda 向けにチューニングしたクライアント設定
+# - max_pool_connections: 同時実行するスレッド数に合わせて接続プールを確保
+# - tcp_keepalive: ウォームな実行環境間でアイドル接続が切断されにくくする
+# - retries: standard モードでスロットリング時のリトライを安定させる
+DEFAULT_CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.getenv("BOTO_MAX_POOL_CONNECTIONS", "10")),
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=5,
+    retries={"mode": "standard", "max_attempts": 3},
+)
+
+# セッションはモジュール単位で共有 (認証情報・ローダーのキャッシュを再利用)
+_session = boto3.session.Session()
+
+
+def warm_client(client: BaseClient, operations: list[str]) -> None:
+    """サービスモデル (オペレーションと入出力シェイプ) と認証情報を事前に読み込む
+
+    INIT フェーズで呼び出すことで、最初のリクエストで発生する遅延読み込みを前倒しする。
+    エンドポイントルールの評価と接続 (TCP / TLS) の確立は、実際のリクエストを送るまで行われない
+    (INIT でリクエストを送ると権限とネットワークの待ち時間が必要になるため、ここでは行わない)。
+    """
+    service_model = client.meta.service_model
+
+    for operation_name in operations:
+        # オペレーションモデルと入出力シェイプはアクセス時に初めて解決されキャッシュされる
+        operation_model = service_model.operation_model(operation_name)
+        if operation_model.input_shape is not None:
+            operation_model.input_shape.members
+        if operation_model.output_shape is not None:
+            operation_model.output_shape.members
+
+    # 認証情報の読み込み (環境変数・コンテナの認証情報プロバイダーの探索)
+    _session.get_credentials()
+
+
+def build_client(
+    service_name: str,
+    warm_operations: list[str] | None = None,
+    config: Config | None = None,
+) -> BaseClient:
+    """チューニング済みの低レベルクライアントを生成し、事前ウォームアップする
+
+    boto3.resource() はリソースモデルの読み込みと初回呼び出し時の遅延初期化が重いため、
+    レイテンシが重要な経路では低レベルクライアントを使用する。
+    """
+    client_config = DEFAULT_CLIENT_CONFIG.merge(config) if config else DEFAULT_CLIENT_CONFIG
+    client = _session.client(service_name, config=client_config)
+
+    warm_client(client, warm_operations or [])
+
+    return client
@@ -3,17 +3,21 @@ import os
 from decimal import Decimal
 from typing import Any
 
-import boto3
 from aws_lambda_powertools import Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
+from boto3.dynamodb.types import TypeDeserializer
+
+from clients import build_client
 
 # Tracer のインスタンス化
-tracer = Tracer(service="payment-service")
+# パッチ対象を botocore に限定し、使用しないモジュールのパッチ処理を省略
+tracer = Tracer(service="payment-service", patch_modules=["botocore"])
 
 # DynamoDB クライアントの初期化
-dynamodb = boto3.resource("dynamodb")
+# boto3.resource() ではなく低レベルクライアントを INIT フェーズでウォームアップ
+dynamodb = build_client("dynamodb", warm_operations=["GetItem"])
+deserializer = TypeDeserializer()
 table_name = os.environ.get("TABLE_NAME", "")
-table = dynamodb.Table(table_name)
 
 
 @tracer.capture_method
@@ -22,8 +26,11 @@ def get_user_info(user_id: str) -> dict[str, Any]:
     # アノテーションの追加（検索可能）
     tracer.put_annotation(key="UserId", value=user_id)
 
-    response = table.get_item(Key={"user_id": user_id})
-    user_info = response.get("Item", {})
+    response = dynamodb.get_item(TableName=table_name, Key={"user_id": {"S": user_id}})
+    user_info = {
+        key: deserializer.deserialize(value)
+        for key, value in response.get("Item", {}).items()
+    }
 
     # メタデータの追加（検索不可、詳細情報用）
     tracer.put_metadata(key="user_info", value=user_info)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Lambda 関数のモジュール (lambda/ 配下) をテストから import できるようにする
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lambda"))
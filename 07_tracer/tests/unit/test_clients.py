@@ -0,0 +1,36 @@
+import pytest
+from botocore.config import Config
+from botocore.model import OperationNotFoundError
+
+from clients import build_client
+
+REGION = Config(region_name="ap-northeast-1")
+
+
+def test_build_client_applies_tuned_config():
+    client = build_client("dynamodb", config=REGION)
+
+    config = client.meta.config
+    assert config.max_pool_connections == 10
+    assert config.tcp_keepalive is True
+    assert config.connect_timeout == 2
+    assert config.read_timeout == 5
+    # max_attempts はリトライの回数 (最初の呼び出しを含めて 4 回)
+    assert config.retries == {"mode": "standard", "total_max_attempts": 4}
+    assert client.meta.region_name == "ap-northeast-1"
+
+
+def test_build_client_merges_overrides():
+    client = build_client("dynamodb", config=Config(region_name="ap-northeast-1", read_timeout=1))
+
+    assert client.meta.config.read_timeout == 1
+    assert client.meta.config.connect_timeout == 2
+
+
+def test_build_client_warms_operation_models():
+    client = build_client("dynamodb", warm_operations=["GetItem", "PutItem"], config=REGION)
+
+    assert client.meta.service_model.operation_model("GetItem").input_shape.members
+
+    with pytest.raises(OperationNotFoundError):
+        build_client("dynamodb", warm_operations=["NoSuchOperation"], config=REGION)
@@ -0,0 +1,118 @@
+"""商品別メトリクス (OrdersPerProduct) の EMF 出力量の比較
+
+呼び出しごとに Metrics でフラッシュする従来の方式と、MetricAggregator で
+ウォームな実行環境内に集約する方式で、10,000 件の注文を処理したときの
+出力バイト数・ブロブ数を比較する。集約前後で商品ごとの合計値が一致することも確認する。
+
+使い方:
+    python benchmarks/bench_aggregation.py [--orders 10000] [--products 500] [--rps 50]
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import time
+import warnings
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aws_lambda_powertools import Metrics  # noqa: E402
+from aws_lambda_powertools.metrics import MetricUnit  # noqa: E402
+
+from aggregation import MetricAggregator  # noqa: E402
+
+NAMESPACE = "EcommerceApp"
+
+
+def generate_orders(orders: int, products: int, seed: int = 0) -> list[str]:
+    """人気商品に偏った商品 ID の列を生成する"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(products)]
+    return rng.choices([f"PROD-{i:05d}" for i in range(products)], weights=weights, k=orders)
+
+
+def sum_by_product(output: str) -> Counter:
+    totals: Counter = Counter()
+    for line in output.splitlines():
+        blob = json.loads(line)
+        value = blob["OrdersPerProduct"]
+        totals[blob["product_id"]] += sum(value) if isinstance(value, list) else value
+    return totals
+
+
+def run_per_invocation(product_ids: list[str]) -> tuple[str, float]:
+    metrics = Metrics(namespace=NAMESPACE, service="ecommerce-api")
+    metrics.set_default_dimensions(environment="dev")
+
+    buffer = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(buffer):
+        for product_id in product_ids:
+            metrics.add_dimension(name="product_id", value=product_id)
+            metrics.add_metric(name="OrdersPerProduct", unit=MetricUnit.Count, value=1)
+            metrics.flush_metrics()
+    return buffer.getvalue(), time.perf_counter() - start
+
+
+def run_aggregated(product_ids: list[str], rps: float) -> tuple[str, float]:
+    now = [1_700_000_000.0]
+    aggregator = MetricAggregator(
+        namespace=NAMESPACE,
+        service="ecommerce-api",
+        default_dimensions={"environment": "dev"},
+        flush_interval=60,
+        clock=lambda: now[0],
+    )
+
+    buffer = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(buffer):
+        for product_id in product_ids:
+            now[0] += 1 / rps
+            aggregator.add_metric(
+                name="OrdersPerProduct",
+                unit=MetricUnit.Count,
+                value=1,
+                dimensions={"product_id": product_id},
+            )
+        # 実行環境のシャットダウン時のフラッシュに相当
+        aggregator.flush()
+    return buffer.getvalue(), time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--rps", type=float, default=50, help="1 実行環境あたりのリクエスト数/秒")
+    args = parser.parse_args()
+
+    # Metrics はインスタンス間で状態を共有するため、デフォルトディメンションの再設定警告を抑止
+    warnings.simplefilter("ignore")
+
+    product_ids = generate_orders(args.orders, args.products)
+
+    baseline, baseline_seconds = run_per_invocation(product_ids)
+    aggregated, aggregated_seconds = run_aggregated(product_ids, args.rps)
+
+    assert sum_by_product(baseline) == sum_by_product(aggregated), "aggregated totals differ"
+
+    print(f"orders={args.orders} products={args.products} rps={args.rps}")
+    print(f"{'mode':<16}{'blobs':>8}{'bytes':>12}{'bytes/order':>14}{'cpu (ms)':>10}")
+    for mode, output, seconds in (
+        ("per-invocation", baseline, baseline_seconds),
+        ("aggregated", aggregated, aggregated_seconds),
+    ):
+        size = len(output.encode())
+        print(
+            f"{mode:<16}{len(output.splitlines()):>8}{size:>12}"
+            f"{size / args.orders:>14.1f}{seconds * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
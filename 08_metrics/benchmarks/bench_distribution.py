@@ -0,0 +1,63 @@
+"""注文金額 (OrderAmount) の分布メトリクスの出力サイズ・シリアライズ時間の比較
+
+観測値をそのまま配列で出力する方式と、DistributionBuckets で量子化して
+Values/Counts 配列で出力する方式を、1,000 件と 100,000 件のサンプルで比較する。
+
+使い方:
+    python benchmarks/bench_distribution.py [--samples 1000 100000] [--digits 4]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aws_lambda_powertools.metrics import MetricUnit  # noqa: E402
+
+from aggregation import DistributionBuckets, MetricAggregator  # noqa: E402
+
+
+def generate_amounts(samples: int, seed: int = 0) -> list[float]:
+    """単価 × 数量で表される注文金額を生成する"""
+    rng = random.Random(seed)
+    prices = [round(rng.lognormvariate(7.5, 1.0), -1) for _ in range(200)]
+    return [rng.choice(prices) * rng.randint(1, 5) for _ in range(samples)]
+
+
+def measure(amounts: list[float], buckets: DistributionBuckets | None) -> tuple[int, int, float]:
+    aggregator = MetricAggregator(namespace="EcommerceApp", service="ecommerce-api", clock=lambda: 1_700_000_000.0)
+    for amount in amounts:
+        if buckets is None:
+            aggregator.add_metric(name="OrderAmount", unit=MetricUnit.NoUnit, value=amount)
+        else:
+            aggregator.add_distribution(name="OrderAmount", unit=MetricUnit.NoUnit, value=amount, buckets=buckets)
+
+    start = time.perf_counter()
+    lines = [json.dumps(blob, separators=(",", ":")) for blob in aggregator.serialize()]
+    elapsed = time.perf_counter() - start
+
+    return len(lines), sum(len(line) for line in lines), elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--digits", type=int, default=DistributionBuckets().significant_digits, help="量子化の有効数字")
+    args = parser.parse_args()
+
+    print(f"{'samples':>8}  {'mode':<14}{'blobs':>8}{'bytes':>12}{'serialize (ms)':>16}")
+    for samples in args.samples:
+        amounts = generate_amounts(samples)
+        for mode, buckets in (
+            ("raw", None),
+            ("distribution", DistributionBuckets(significant_digits=args.digits)),
+        ):
+            blobs, size, elapsed = measure(amounts, buckets)
+            print(f"{samples:>8}  {mode:<14}{blobs:>8}{size:>12}{elapsed * 1000:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""08_metrics ハンドラーのメトリクスフラッシュ時間の計測
+
+ハンドラー 1 回分のメトリクス追加 (バリデーション成功・注文金額・処理成功・
+メタデータ・API 成功) を再現し、Powertools 標準のプロバイダーと
+TemplatedEMFProvider でフラッシュにかかる時間を比較する。
+
+使い方:
+    python benchmarks/bench_flush.py [--invocations 20000]
+"""
+import argparse
+import contextlib
+import io
+import statistics
+import sys
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aws_lambda_powertools.metrics import MetricResolution, MetricUnit  # noqa: E402
+from aws_lambda_powertools.metrics.provider.cloudwatch_emf.cloudwatch import (  # noqa: E402
+    AmazonCloudWatchEMFProvider,
+)
+
+from emf import TemplatedEMFProvider  # noqa: E402
+
+
+def add_handler_metrics(provider: AmazonCloudWatchEMFProvider, index: int) -> None:
+    """lambda/function.py の 1 回分の呼び出しで追加されるメトリクスを再現する"""
+    provider.add_metric(name="OrderValidationSuccess", unit=MetricUnit.Count, value=1)
+    provider.add_metric(
+        name="OrderAmount",
+        unit=MetricUnit.NoUnit,
+        value=float(1500 * (index % 5 + 1)),
+        resolution=MetricResolution.High,
+    )
+    provider.add_metadata(
+        key="order_details",
+        value={
+            "order_id": f"ORD-{index:08d}",
+            "product_id": f"PROD-{index % 500:05d}",
+            "quantity": index % 5 + 1,
+            "total_amount": str(1500 * (index % 5 + 1)),
+        },
+    )
+    provider.add_metric(name="OrderProcessed", unit=MetricUnit.Count, value=1)
+    provider.add_metric(name="APISuccess", unit=MetricUnit.Count, value=1)
+
+
+def run(provider: AmazonCloudWatchEMFProvider, invocations: int) -> tuple[list[float], list[float]]:
+    add_latencies, flush_latencies = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index in range(invocations):
+            start = time.perf_counter()
+            add_handler_metrics(provider, index)
+            added = time.perf_counter()
+            provider.flush_metrics()
+            flushed = time.perf_counter()
+            add_latencies.append((added - start) * 1_000_000)
+            flush_latencies.append((flushed - added) * 1_000_000)
+    return add_latencies, flush_latencies
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--invocations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    # Powertools の clear_metrics() がデフォルトディメンションを再設定する際の警告を抑止
+    warnings.simplefilter("ignore")
+
+    print(f"invocations={args.invocations}")
+    print(f"{'provider':<12}{'add p50 (us)':>14}{'flush p50 (us)':>16}{'flush p99 (us)':>16}")
+    for name, provider_class in (("powertools", AmazonCloudWatchEMFProvider), ("templated", TemplatedEMFProvider)):
+        provider = provider_class(namespace="EcommerceApp", service="ecommerce-api")
+        provider.set_default_dimensions(environment="dev")
+        add_latencies, flush_latencies = run(provider, args.invocations)
+        print(
+            f"{name:<12}{statistics.median(add_latencies):>14.1f}"
+            f"{statistics.median(flush_latencies):>16.1f}{percentile(flush_latencies, 0.99):>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import urllib.request
+from bisect import bisect_left
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from numbers import Number
+from typing import Any, Callable
+
+from aws_lambda_powertools.metrics import MetricResolution, MetricUnit
+from aws_lambda_powertools.metrics.exceptions import (
+    MetricValueError,
+    SchemaValidationError,
+)
+from aws_lambda_powertools.metrics.functions import (
+    extract_cloudwatch_metric_resolution_value,
+    extract_cloudwatch_metric_unit_value,
+    is_metrics_disabled,
+)
+from aws_lambda_powertools.metrics.provider.cloudwatch_emf.exceptions import MetricNameError
+
+# EMF の制約
+MAX_DIMENSIONS = 29
+MAX_METRICS = 100  # 1 ブロブあたりのメトリクス数、1 メトリクスあたりの値の数の上限
+MAX_METRIC_NAME_LENGTH = 255
+
+METRIC_UNITS = [unit.value for unit in MetricUnit]
+METRIC_UNIT_OPTIONS = list(MetricUnit.__members__)
+METRIC_RESOLUTIONS = [resolution.value for resolution in MetricResolution]
+
+EXTENSION_NAME = "metrics-aggregator"
+
+logger = logging.getLogger(__name__)
+
+# (ディメンション名, 値) のタプル。ディメンションセットの識別に使用
+DimensionKey = tuple[tuple[str, str], ...]
+
+
+@dataclass(frozen=True)
+class DistributionBuckets:
+    """分布メトリクスの値を代表値に量子化するバケット定義
+
+    boundaries を指定した場合は、値を含む区間 (前の境界値, 境界値] の中点を代表値とする
+    (区間の上端に寄せると常に大きい側に偏るため)。誤差は区間の幅の半分以下になる。
+    最初の境界値以下の値・最後の境界値を超える値と boundaries 未指定の場合は、有効数字 significant_digits 桁に
+    偶数丸め (round half to even。ちょうど中間の値は末尾が偶数になる側に丸める) で丸める
+    (相対誤差は 0.5 * 10^(1 - significant_digits) 以下で、上下どちらにも偏らない)。
+
+    既定の significant_digits=4 は金額向けの精度 (相対誤差 0.05% 以下。例: 12,345 円は 12,340 円、12,355 円は 12,360 円)。
+    """
+
+    boundaries: Sequence[float] | None = None
+    significant_digits: int = 4
+
+    def quantize(self, value: float) -> float:
+        if self.boundaries:
+            index = bisect_left(self.boundaries, value)
+            if 0 < index < len(self.boundaries):
+                return (self.boundaries[index - 1] + self.boundaries[index]) / 2
+        return float(f"{value:.{self.significant_digits - 1}e}")
+
+
+DEFAULT_BUCKETS = DistributionBuckets()
+
+
+@dataclass
+class AggregatedMetric:
+    """集約中のメトリクス
+
+    Count 単位は合計値のみ、分布メトリクスは代表値ごとの件数を保持し、
+    それ以外の単位は観測値をすべて保持する。
+    """
+
+    unit: str
+    resolution: int
+    buckets: DistributionBuckets | None = None
+    total: float = 0.0
+    values: list[float] = field(default_factory=list)
+    counts: dict[float, int] = field(default_factory=dict)
+
+    @property
+    def is_counter(self) -> bool:
+        return self.buckets is None and self.unit == MetricUnit.Count.value
+
+    def add(self, value: float) -> None:
+        if self.buckets is not None:
+            bucket = self.buckets.quantize(value)
+            self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        elif self.is_counter:
+            self.total += value
+        else:
+            self.values.append(value)
+
+    def chunks(self) -> list[float | list[float] | dict[str, list[float]]]:
+        """EMF に出力する値を 100 件ずつに分割して返す
+
+        分布メトリクスは EMF の Values/Counts 配列として出力する。
+        """
+        if self.buckets is not None:
+            items = sorted(self.counts.items())
+            return [
+                {
+                    "Values": [bucket for bucket, _ in items[i : i + MAX_METRICS]],
+                    "Counts": [count for _, count in items[i : i + MAX_METRICS]],
+                }
+                for i in range(0, len(items), MAX_METRICS)
+            ]
+        if self.is_counter:
+            return [self.total]
+        return [self.values[i : i + MAX_METRICS] for i in range(0, len(self.values), MAX_METRICS)]
+
+
+class MetricAggregator:
+    """ウォームな実行環境をまたいでメトリクスを集約し、まとめて EMF として出力する
+
+    高カーディナリティなディメンション (product_id など) を持つメトリクスを
+    呼び出しごとに出力すると EMF ブロブ数がリクエスト数に比例して増えるため、
+    ディメンションセットごとにメモリ上で集約し、以下のいずれかのタイミングで出力する。
+
+    - 前回のフラッシュから flush_interval 秒が経過した
+    - 集約中のエントリ数が max_entries に達した
+    - 実行環境のシャットダウン (register_shutdown_flush を参照)
+
+    経過時間のしきい値は add_metric() / add_distribution() のときにしか確認しないため、
+    呼び出しがなくなったアイドルな実行環境ではシャットダウンまで出力されない。
+    各呼び出しの終了時に flush_if_needed() を呼び出すと、区間が閉じたメトリクスを次の呼び出しを待たずに出力できる。
+
+    値はストレージ解像度 (60 秒 / 1 秒) の区間ごとに集約するため、
+    出力されるタイムスタンプは各区間の開始時刻になる。
+    Count 単位のメトリクスは合計値 1 件として出力されるため、
+    CloudWatch 上の Sum は変わらないが SampleCount は集約後の件数になる。
+    """
+
+    def __init__(
+        self,
+        namespace: str | None = None,
+        service: str | None = None,
+        default_dimensions: dict[str, str] | None = None,
+        flush_interval: float = 60.0,
+        max_entries: int = 1000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.namespace = namespace or os.getenv("POWERTOOLS_METRICS_NAMESPACE")
+        service = service or os.getenv("POWERTOOLS_SERVICE_NAME")
+
+        self.default_dimensions: dict[str, str] = {}
+        if service:
+            self.default_dimensions["service"] = service
+        self.default_dimensions.update(default_dimensions or {})
+
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self._clock = clock
+
+        # (区間の開始時刻 [ms], ディメンションセット) -> メトリクス名 -> 集約値
+        self._buckets: dict[tuple[int, DimensionKey], dict[str, AggregatedMetric]] = {}
+        self._entries = 0
+        self._last_flush = clock()
+
+    def add_metric(
+        self,
+        name: str,
+        unit: MetricUnit | str,
+        value: float,
+        dimensions: dict[str, str] | None = None,
+        resolution: MetricResolution | int = 60,
+    ) -> None:
+        """メトリクスを集約に追加する
+
+        バリデーションは追加時に行うため、フラッシュ時には失敗しない。
+        """
+        self._add(name, unit, value, dimensions, resolution, buckets=None)
+
+    def add_distribution(
+        self,
+        name: str,
+        unit: MetricUnit | str,
+        value: float,
+        dimensions: dict[str, str] | None = None,
+        resolution: MetricResolution | int = 60,
+        buckets: DistributionBuckets = DEFAULT_BUCKETS,
+    ) -> None:
+        """分布メトリクスを集約に追加する
+
+        値はバケットの代表値に量子化され、代表値ごとの件数として保持される。
+        同じ値が繰り返し記録されるメトリクス (金額・レイテンシなど) の出力サイズを抑えられる。
+        """
+        self._add(name, unit, value, dimensions, resolution, buckets=buckets)
+
+    def _add(
+        self,
+        name: str,
+        unit: MetricUnit | str,
+        value: float,
+        dimensions: dict[str, str] | None,
+        resolution: MetricResolution | int,
+        buckets: DistributionBuckets | None,
+    ) -> None:
+        name = name.strip()
+        if not 1 <= len(name) <= MAX_METRIC_NAME_LENGTH:
+            raise MetricNameError(f"The metric name should be between 1 and {MAX_METRIC_NAME_LENGTH} characters")
+        if not isinstance(value, Number):
+            raise MetricValueError(f"{value} is not a valid number")
+
+        unit = extract_cloudwatch_metric_unit_value(
+            metric_units=METRIC_UNITS,
+            metric_valid_options=METRIC_UNIT_OPTIONS,
+            unit=unit,
+        )
+        resolution = extract_cloudwatch_metric_resolution_value(
+            metric_resolutions=METRIC_RESOLUTIONS,
+            resolution=resolution,
+        )
+
+        dimension_set = {**self.default_dimensions, **(dimensions or {})}
+        if len(dimension_set) > MAX_DIMENSIONS:
+            raise SchemaValidationError(f"Maximum number of dimensions exceeded ({MAX_DIMENSIONS})")
+        dimension_key = tuple(sorted((key, str(val)) for key, val in dimension_set.items()))
+
+        bucket_start = int(self._clock() // resolution * resolution * 1000)
+        metrics = self._buckets.setdefault((bucket_start, dimension_key), {})
+
+        metric = metrics.get(name)
+        if metric is None:
+            metric = metrics[name] = AggregatedMetric(unit=unit, resolution=resolution, buckets=buckets)
+            self._entries += 1
+        metric.add(float(value))
+
+        self.flush_if_needed()
+
+    def flush_if_needed(self) -> bool:
+        """しきい値 (経過時間・エントリ数) を超えていればフラッシュする"""
+        if self._entries >= self.max_entries or self._clock() - self._last_flush >= self.flush_interval:
+            self.flush()
+            return True
+        return False
+
+    def serialize(self) -> list[dict[str, Any]]:
+        """集約済みメトリクスを EMF 形式に変換する
+
+        1 ブロブに含めるメトリクス数・値の数は EMF の上限 (100) を超えないように分割する。
+        """
+        if self.namespace is None:
+            raise SchemaValidationError("Must contain a metric namespace.")
+
+        blobs: list[dict[str, Any]] = []
+
+        for (bucket_start, dimension_key), metrics in self._buckets.items():
+            chunked = {name: metric.chunks() for name, metric in metrics.items()}
+            rounds = max((len(chunks) for chunks in chunked.values()), default=0)
+
+            for round_index in range(rounds):
+                names = [name for name, chunks in chunked.items() if round_index < len(chunks)]
+
+                for start in range(0, len(names), MAX_METRICS):
+                    blob_names = names[start : start + MAX_METRICS]
+                    definitions = []
+                    for name in blob_names:
+                        definition: dict[str, Any] = {"Name": name, "Unit": metrics[name].unit}
+                        # 高解像度メトリクスのみ StorageResolution を付与 (Powertools と同じ)
+                        if metrics[name].resolution == 1:
+                            definition["StorageResolution"] = 1
+                        definitions.append(definition)
+
+                    blobs.append(
+                        {
+                            "_aws": {
+                                "Timestamp": bucket_start,
+                                "CloudWatchMetrics": [
+                                    {
+                                        "Namespace": self.namespace,
+                                        "Dimensions": [[key for key, _ in dimension_key]],
+                                        "Metrics": definitions,
+                                    }
+                                ],
+                            },
+                            **dict(dimension_key),
+                            **{name: chunked[name][round_index] for name in blob_names},
+                        }
+                    )
+
+        return blobs
+
+    def flush(self) -> None:
+        """集約済みメトリクスを標準出力に EMF として出力し、集約をリセットする"""
+        if self._buckets and not is_metrics_disabled():
+            for blob in self.serialize():
+                print(json.dumps(blob, separators=(",", ":")))
+
+        self._buckets.clear()
+        self._entries = 0
+        self._last_flush = self._clock()
+
+
+def register_shutdown_flush(aggregator: MetricAggregator) -> bool:
+    """実行環境のシャットダウン時に集約済みメトリクスをフラッシュする
+
+    内部拡張機能として Extensions API に登録すると、Lambda はシャットダウン時に
+    ランタイムプロセスへ SIGTERM を送信するようになる。
+    SIGTERM を受け取ったら残りのメトリクスをフラッシュして終了する。
+    INIT フェーズ (モジュールの読み込み時) に呼び出すこと。
+
+    登録できた場合は True を返す。Lambda 以外の環境や登録に失敗した場合は (INIT を失敗させずに) False を返すため、
+    呼び出し側は各呼び出しの終了時に flush() してメトリクスを失わないようにする。
+    """
+    runtime_api = os.getenv("AWS_LAMBDA_RUNTIME_API")
+    if not runtime_api:
+        return False
+
+    register_request = urllib.request.Request(
+        f"http://{runtime_api}/2020-01-01/extension/register",
+        data=json.dumps({"events": []}).encode(),
+        headers={"Lambda-Extension-Name": EXTENSION_NAME},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(register_request, timeout=1) as response:
+            extension_id = response.headers["Lambda-Extension-Identifier"]
+    except OSError:
+        logger.exception("Failed to register the metrics extension; metrics will be flushed after each invocation")
+        return False
+    if not extension_id:
+        logger.error("Extensions API returned no extension identifier; metrics will be flushed after each invocation")
+        return False
+
+    def wait_for_events() -> None:
+        # 登録した拡張機能は Next API を呼び出して INIT の完了を通知する必要がある
+        next_request = urllib.request.Request(
+            f"http://{runtime_api}/2020-01-01/extension/event/next",
+            headers={"Lambda-Extension-Identifier": extension_id},
+        )
+        while True:
+            with urllib.request.urlopen(next_request) as response:
+                response.read()
+
+    threading.Thread(target=wait_for_events, name=EXTENSION_NAME, daemon=True).start()
+
+    previous_handler = signal.getsignal(signal.SIGTERM)
+
+    def handle_sigterm(signum, frame) -> None:
+        aggregator.flush()
+        if callable(previous_handler):
+            previous_handler(signum, frame)
+        else:
+            sys.exit(0)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    return True
@@ -0,0 +1,131 @@
+import json
+import time
+import warnings
+from typing import Any
+
+from aws_lambda_powertools.metrics.exceptions import SchemaValidationError
+from aws_lambda_powertools.metrics.functions import is_metrics_disabled
+from aws_lambda_powertools.metrics.provider.cloudwatch_emf.cloudwatch import (
+    AmazonCloudWatchEMFProvider,
+)
+
+# キャッシュするテンプレート数の上限 (ディメンション値の組み合わせが増え続けた場合の保護)
+MAX_TEMPLATES = 128
+
+
+def _dump(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+class EMFTemplate:
+    """EMF ブロブのうち、値以外の固定部分を事前に生成したテンプレート
+
+    名前空間・ディメンションセット・メトリクス定義が同じであれば、
+    フラッシュ時に変わるのはタイムスタンプ・メタデータ・メトリクス値だけなので、
+    それ以外の部分は一度だけ JSON 文字列に変換して再利用する。
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        dimensions: dict[str, str],
+        definitions: list[dict[str, Any]],
+    ):
+        directive = [{"Namespace": namespace, "Dimensions": [list(dimensions)], "Metrics": definitions}]
+        self._directive = ',"CloudWatchMetrics":' + _dump(directive) + "}"
+        self._dimensions = "".join(f",{_dump(name)}:{_dump(value)}" for name, value in dimensions.items())
+        self._metric_keys = [f",{_dump(definition['Name'])}:" for definition in definitions]
+
+    def render(self, timestamp: int, metadata: list[str], values: list[list[float]]) -> str:
+        """タイムスタンプ・シリアライズ済みメタデータ・メトリクス値を埋め込んで EMF を生成する"""
+        parts = ['{"_aws":{"Timestamp":', str(timestamp), self._directive, self._dimensions, *metadata]
+        for key, metric_values in zip(self._metric_keys, values):
+            parts.append(key)
+            parts.append("[" + ",".join(map(repr, metric_values)) + "]")
+        parts.append("}")
+        return "".join(parts)
+
+
+class TemplatedEMFProvider(AmazonCloudWatchEMFProvider):
+    """テンプレートを使って EMF を出力する Metrics プロバイダー
+
+    メトリクス・ディメンションのバリデーションは Powertools と同様に追加時に行い、
+    メタデータも add_metadata の時点で JSON に変換しておく (シリアライズできない値はここで失敗する)。
+    フラッシュ時は (名前空間, ディメンションセット, メトリクス定義) ごとにキャッシュした
+    テンプレートに値を埋め込むだけになる。
+
+    出力は Powertools の serialize_metric_set() と同じ内容になるが、
+    ディメンションやメトリクスと同名のメタデータキーは出力しない。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._templates: dict[tuple, EMFTemplate] = {}
+        self._metadata_fragments: dict[str, str] = {}
+
+    def add_metadata(self, key: str, value: Any) -> None:
+        super().add_metadata(key=key, value=value)
+        key = key if isinstance(key, str) else str(key)
+        self._metadata_fragments[key] = f",{_dump(key)}:{_dump(value)}"
+
+    def clear_metrics(self) -> None:
+        # デフォルトディメンションは add_dimension を経由せず直接復元する
+        # (経由すると呼び出しのたびに「追加済み」の警告が発生する)
+        self.metric_set.clear()
+        self.dimension_set.clear()
+        self.dimension_set.update(self.default_dimensions)
+        self.metadata_set.clear()
+        self._metadata_fragments.clear()
+
+    def render_metric_set(self) -> str:
+        """現在のメトリクスセットを EMF の JSON 文字列に変換する"""
+        if self.service and not self.dimension_set.get("service"):
+            self.add_dimension(name="service", value=self.service)
+
+        if not self.metric_set:
+            raise SchemaValidationError("Must contain at least one metric.")
+
+        if self.namespace is None:
+            raise SchemaValidationError("Must contain a metric namespace.")
+
+        definitions = tuple(
+            (name, metric["Unit"], metric["StorageResolution"]) for name, metric in self.metric_set.items()
+        )
+        key = (self.namespace, tuple(self.dimension_set.items()), definitions)
+
+        template = self._templates.get(key)
+        if template is None:
+            if len(self._templates) >= MAX_TEMPLATES:
+                self._templates.clear()
+            template = self._templates[key] = EMFTemplate(
+                namespace=self.namespace,
+                dimensions=dict(self.dimension_set),
+                definitions=[
+                    # 高解像度メトリクスのみ StorageResolution を付与 (Powertools と同じ)
+                    {"Name": name, "Unit": unit, **({"StorageResolution": 1} if resolution == 1 else {})}
+                    for name, unit, resolution in definitions
+                ],
+            )
+
+        metadata = [
+            fragment
+            for name, fragment in self._metadata_fragments.items()
+            if name not in self.dimension_set and name not in self.metric_set
+        ]
+
+        return template.render(
+            timestamp=self.timestamp or int(time.time() * 1000),
+            metadata=metadata,
+            values=[metric["Value"] for metric in self.metric_set.values()],
+        )
+
+    def flush_metrics(self, raise_on_empty_metrics: bool = False) -> None:
+        if not raise_on_empty_metrics and not self.metric_set:
+            warnings.warn(
+                "No application metrics to publish. The cold-start metric may be published if enabled. "
+                "If application metrics should never be empty, consider using 'raise_on_empty_metrics'",
+                stacklevel=2,
+            )
+        elif not is_metrics_disabled():
+            print(self.render_metric_set())
+            self.clear_metrics()
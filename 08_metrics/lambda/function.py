@@ -7,15 +7,31 @@ from aws_lambda_powertools import Metrics
 from aws_lambda_powertools.metrics import MetricResolution, MetricUnit
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+from aggregation import MetricAggregator, register_shutdown_flush
+from emf import TemplatedEMFProvider
+
 # 環境変数から取得
 STAGE = os.getenv("STAGE", "dev")
 
 # Metrics のインスタンス化
-metrics = Metrics(service="ecommerce-api")
+# フラッシュ時は事前生成した EMF テンプレートに値を埋め込むだけにする
+metrics = Metrics(provider=TemplatedEMFProvider(service="ecommerce-api"))
 
 # デフォルトディメンションの設定
 metrics.set_default_dimensions(environment=STAGE)
 
+# 高カーディナリティなディメンションを持つメトリクス・分布メトリクスの集約
+# 呼び出しごとに EMF を出力せず、ウォームな実行環境内で集約してからまとめて出力する
+aggregator = MetricAggregator(
+    service="ecommerce-api",
+    default_dimensions={"environment": STAGE},
+    flush_interval=60,
+)
+
+# 実行環境のシャットダウン時に未出力のメトリクスをフラッシュ
+# 登録できなかった場合は呼び出しごとにフラッシュする (集約は呼び出し内に限られる)
+SHUTDOWN_FLUSH_REGISTERED = register_shutdown_flush(aggregator)
+
 
 def validate_order(order_data: dict[str, Any]) -> bool:
     """注文データのバリデーション"""
@@ -44,9 +60,10 @@ def calculate_total_amount(price: Decimal, quantity: int) -> Decimal:
     total = price * quantity
 
     # 高解像度メトリクスで注文金額を記録 (1秒の粒度)
-    metrics.add_metric(
+    # 分布メトリクスとして量子化し、Values/Counts 配列に圧縮して出力
+    aggregator.add_distribution(
         name="OrderAmount",
-        unit=MetricUnit.None_,
+        unit=MetricUnit.NoUnit,
         value=float(total),
         resolution=MetricResolution.High,
     )
@@ -61,11 +78,14 @@ def process_order(order_data: dict[str, Any]) -> dict[str, Any]:
     quantity = order_data["quantity"]
     price = Decimal(str(order_data["price"]))
 
-    # ディメンションを追加して特定の商品の注文数を追跡
-    metrics.add_dimension(name="product_id", value=product_id)
-
     # 商品ごとの注文数をメトリクスとして記録
-    metrics.add_metric(name="OrdersPerProduct", unit=MetricUnit.Count, value=1)
+    # product_id ディメンションは高カーディナリティのため集約してから出力
+    aggregator.add_metric(
+        name="OrdersPerProduct",
+        unit=MetricUnit.Count,
+        value=1,
+        dimensions={"product_id": product_id},
+    )
 
     # 合計金額の計算
     total_amount = calculate_total_amount(price, quantity)
@@ -129,3 +149,10 @@ def lambda_handler(event: dict[str, Any], context: LambdaContext) -> dict[str, A
             "statusCode": 500,
             "body": json.dumps({"error": "Internal server error"}),
         }
+
+    finally:
+        # 区間が閉じた集約は次の呼び出しを待たずに出力する (アイドルな実行環境にためたままにしない)
+        if SHUTDOWN_FLUSH_REGISTERED:
+            aggregator.flush_if_needed()
+        else:
+            aggregator.flush()
@@ -0,0 +1,199 @@
+import json
+import logging
+import random
+import signal
+
+from aws_lambda_powertools.metrics import EphemeralMetrics, MetricResolution, MetricUnit
+
+from aggregation import MAX_METRICS, DistributionBuckets, MetricAggregator, register_shutdown_flush
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_699_999_980.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def parse_emf(blob: dict) -> dict:
+    """EMF ブロブを CloudWatch と同じ手順で (ディメンション, メトリクス名) -> 値 に展開する"""
+    parsed = {}
+    for directive in blob["_aws"]["CloudWatchMetrics"]:
+        for dimension_names in directive["Dimensions"]:
+            dimensions = tuple(sorted((name, blob[name]) for name in dimension_names))
+            for definition in directive["Metrics"]:
+                value = blob[definition["Name"]]
+                if isinstance(value, dict):
+                    values = [v for v, count in zip(value["Values"], value["Counts"]) for _ in range(count)]
+                else:
+                    values = value if isinstance(value, list) else [value]
+                parsed[(directive["Namespace"], dimensions, definition["Name"], definition["Unit"])] = values
+    return parsed
+
+
+def test_aggregated_output_parses_like_powertools():
+    clock = FakeClock()
+    aggregator = MetricAggregator(namespace="EcommerceApp", service="ecommerce-api", clock=clock)
+    aggregator.add_metric(name="OrdersPerProduct", unit=MetricUnit.Count, value=1, dimensions={"product_id": "P1"})
+
+    metrics = EphemeralMetrics(namespace="EcommerceApp", service="ecommerce-api")
+    metrics.add_dimension(name="product_id", value="P1")
+    metrics.add_metric(name="OrdersPerProduct", unit=MetricUnit.Count, value=1)
+    expected = metrics.serialize_metric_set()
+
+    (blob,) = aggregator.serialize()
+
+    assert json.loads(json.dumps(blob)).keys() == expected.keys()
+    assert parse_emf(blob) == parse_emf(expected)
+
+
+def test_counts_are_summed_per_dimension_set():
+    aggregator = MetricAggregator(namespace="EcommerceApp", service="ecommerce-api", clock=FakeClock())
+    for product_id in ["P1", "P2", "P1", "P1"]:
+        aggregator.add_metric(
+            name="OrdersPerProduct",
+            unit=MetricUnit.Count,
+            value=1,
+            dimensions={"product_id": product_id},
+        )
+
+    parsed = {}
+    for blob in aggregator.serialize():
+        parsed.update(parse_emf(blob))
+
+    assert parsed == {
+        ("EcommerceApp", (("product_id", "P1"), ("service", "ecommerce-api")), "OrdersPerProduct", "Count"): [3.0],
+        ("EcommerceApp", (("product_id", "P2"), ("service", "ecommerce-api")), "OrdersPerProduct", "Count"): [1.0],
+    }
+
+
+def test_values_are_split_at_emf_limit():
+    aggregator = MetricAggregator(namespace="EcommerceApp", clock=FakeClock())
+    for i in range(250):
+        aggregator.add_metric(name="Latency", unit=MetricUnit.Milliseconds, value=i)
+
+    blobs = aggregator.serialize()
+
+    assert [len(blob["Latency"]) for blob in blobs] == [MAX_METRICS, MAX_METRICS, 50]
+    assert sum(sum(blob["Latency"]) for blob in blobs) == sum(range(250))
+
+
+def test_high_resolution_metrics_keep_per_second_timestamps():
+    clock = FakeClock()
+    aggregator = MetricAggregator(namespace="EcommerceApp", clock=clock)
+    aggregator.add_metric(name="OrderAmount", unit=MetricUnit.NoUnit, value=1, resolution=MetricResolution.High)
+    clock.now += 1
+    aggregator.add_metric(name="OrderAmount", unit=MetricUnit.NoUnit, value=2, resolution=MetricResolution.High)
+
+    blobs = aggregator.serialize()
+
+    assert [blob["_aws"]["Timestamp"] for blob in blobs] == [1_699_999_980_000, 1_699_999_981_000]
+    assert all(blob["_aws"]["CloudWatchMetrics"][0]["Metrics"][0]["StorageResolution"] == 1 for blob in blobs)
+
+
+def test_flushes_on_interval(capsys):
+    clock = FakeClock()
+    aggregator = MetricAggregator(namespace="EcommerceApp", flush_interval=60, clock=clock)
+    aggregator.add_metric(name="OrdersPerProduct", unit=MetricUnit.Count, value=1)
+    clock.now += 30
+    aggregator.add_metric(name="OrdersPerProduct", unit=MetricUnit.Count, value=1)
+    assert capsys.readouterr().out == ""
+
+    clock.now += 30
+    aggregator.add_metric(name="OrdersPerProduct", unit=MetricUnit.Count, value=1)
+
+    # 1 分ごとの区間に分けて出力される
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["OrdersPerProduct"] for line in lines] == [2.0, 1.0]
+
+
+def test_flushes_on_max_entries(capsys):
+    aggregator = MetricAggregator(namespace="EcommerceApp", max_entries=3, clock=FakeClock())
+    for product_id in ["P1", "P2", "P3"]:
+        aggregator.add_metric(
+            name="OrdersPerProduct",
+            unit=MetricUnit.Count,
+            value=1,
+            dimensions={"product_id": product_id},
+        )
+
+    assert len(capsys.readouterr().out.splitlines()) == 3
+
+
+def test_distribution_buckets_quantize():
+    assert DistributionBuckets(significant_digits=2).quantize(12345.0) == 12000.0
+    assert DistributionBuckets(significant_digits=3).quantize(0.012345) == 0.0123
+    # 偶数丸め (ちょうど中間の値は末尾が偶数になる側に丸める)
+    assert DistributionBuckets().quantize(12345.0) == 12340.0
+    assert DistributionBuckets().quantize(12355.0) == 12360.0
+
+    buckets = DistributionBuckets(boundaries=[100, 1000, 10000])
+    assert buckets.quantize(50) == 50.0
+    assert buckets.quantize(150) == 550.0
+    assert buckets.quantize(1000) == 550.0
+    assert buckets.quantize(1001) == 5500.0
+    assert buckets.quantize(123456) == 123500.0
+
+
+def test_distribution_buckets_error_is_bounded_and_unbiased():
+    rng = random.Random(0)
+    amounts = [round(rng.lognormvariate(7.5, 1.0), 2) * rng.randint(1, 5) for _ in range(100_000)]
+
+    buckets = DistributionBuckets()
+    errors = [(buckets.quantize(amount) - amount) / amount for amount in amounts]
+    assert max(map(abs, errors)) <= 0.0005
+    # 合計 (平均) は上下どちらにも偏らない
+    assert abs(sum(map(buckets.quantize, amounts)) / sum(amounts) - 1) < 1e-5
+
+    boundaries = list(range(0, 200_001, 100))
+    buckets = DistributionBuckets(boundaries=boundaries)
+    inside = [amount for amount in amounts if 0 < amount <= boundaries[-1]]
+    assert max(abs(buckets.quantize(amount) - amount) for amount in inside) <= 50
+    assert abs(sum(map(buckets.quantize, inside)) / sum(inside) - 1) < 1e-3
+
+
+def test_distribution_emits_values_and_counts():
+    aggregator = MetricAggregator(namespace="EcommerceApp", clock=FakeClock())
+    for value in [1500, 1510, 4500, 1500, 3000]:
+        aggregator.add_distribution(
+            name="OrderAmount", unit=MetricUnit.NoUnit, value=value, buckets=DistributionBuckets(significant_digits=2)
+        )
+
+    (blob,) = aggregator.serialize()
+
+    assert blob["OrderAmount"] == {"Values": [1500.0, 3000.0, 4500.0], "Counts": [3, 1, 1]}
+
+
+def test_distribution_is_split_at_emf_limit():
+    aggregator = MetricAggregator(namespace="EcommerceApp", clock=FakeClock())
+    for value in range(1, 251):
+        aggregator.add_distribution(
+            name="OrderAmount",
+            unit=MetricUnit.NoUnit,
+            value=value,
+            buckets=DistributionBuckets(significant_digits=3),
+        )
+
+    blobs = aggregator.serialize()
+
+    assert [len(blob["OrderAmount"]["Values"]) for blob in blobs] == [MAX_METRICS, MAX_METRICS, 50]
+    assert sum(sum(blob["OrderAmount"]["Counts"]) for blob in blobs) == 250
+
+
+def test_shutdown_flush_registration_failure_does_not_break_init(monkeypatch, caplog):
+    # Extensions API に接続できない (ポート 1 は待ち受けていない)
+    monkeypatch.setenv("AWS_LAMBDA_RUNTIME_API", "127.0.0.1:1")
+    previous_handler = signal.getsignal(signal.SIGTERM)
+
+    with caplog.at_level(logging.ERROR):
+        assert register_shutdown_flush(MetricAggregator(namespace="EcommerceApp")) is False
+
+    assert "Failed to register the metrics extension" in caplog.text
+    assert signal.getsignal(signal.SIGTERM) is previous_handler
+
+
+def test_shutdown_flush_is_not_registered_outside_lambda(monkeypatch):
+    monkeypatch.delenv("AWS_LAMBDA_RUNTIME_API", raising=False)
+
+    assert register_shutdown_flush(MetricAggregator(namespace="EcommerceApp")) is False
@@ -0,0 +1,54 @@
+import json
+import time
+
+from aws_lambda_powertools.metrics import MetricResolution, MetricUnit
+
+from emf import TemplatedEMFProvider
+
+
+def build_provider() -> TemplatedEMFProvider:
+    provider = TemplatedEMFProvider(namespace="EcommerceApp", service="ecommerce-api")
+    provider.set_default_dimensions(environment="dev")
+    provider.set_timestamp(int(time.time()) * 1000)
+    return provider
+
+
+def add_order_metrics(provider: TemplatedEMFProvider) -> None:
+    provider.add_metric(name="OrderValidationSuccess", unit=MetricUnit.Count, value=1)
+    provider.add_metric(name="OrderAmount", unit=MetricUnit.NoUnit, value=4500.0, resolution=MetricResolution.High)
+    provider.add_metric(name="OrderAmount", unit=MetricUnit.NoUnit, value=1500.0, resolution=MetricResolution.High)
+    provider.add_metadata(key="order_details", value={"order_id": "ORD-12345", "quantity": 3})
+    provider.add_metric(name="OrderProcessed", unit=MetricUnit.Count, value=1)
+
+
+def test_render_matches_powertools_serialization():
+    provider = build_provider()
+    add_order_metrics(provider)
+
+    assert json.loads(provider.render_metric_set()) == provider.serialize_metric_set()
+
+
+def test_template_is_reused_across_flushes(capsys):
+    provider = build_provider()
+
+    outputs = []
+    for _ in range(3):
+        add_order_metrics(provider)
+        provider.flush_metrics()
+        outputs.append(json.loads(capsys.readouterr().out))
+
+    assert len(provider._templates) == 1
+    assert outputs[0] == outputs[1] == outputs[2]
+    assert outputs[0]["order_details"] == {"order_id": "ORD-12345", "quantity": 3}
+
+
+def test_metadata_is_cleared_after_flush(capsys):
+    provider = build_provider()
+    add_order_metrics(provider)
+    provider.flush_metrics()
+    capsys.readouterr()
+
+    provider.add_metric(name="APISuccess", unit=MetricUnit.Count, value=1)
+    provider.flush_metrics()
+
+    assert "order_details" not in json.loads(capsys.readouterr().out)
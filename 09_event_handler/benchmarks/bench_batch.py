@@ -0,0 +1,78 @@
+"""注文作成のスループット計測 (単件 POST /orders と一括 POST /orders:batch)
+
+lambda/function.py の lambda_handler (Logger のコンテキスト注入・相関 ID・Tracer を含む) に
+合成した API Gateway REST イベントを渡し、1 秒あたりに作成できる注文数を比較する。
+ログの整形コストも含めるため、ログは無効化せずに /dev/null へ出力する。
+
+使い方:
+    python benchmarks/bench_batch.py [--orders 5000] [--batch-sizes 10 50 100]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+import function  # noqa: E402
+from events import FakeLambdaContext, api_gateway_event  # noqa: E402
+from order_store import OrderStore  # noqa: E402
+
+
+def order_payload(index: int) -> dict:
+    return {"product_id": f"PROD-{index % 1000:05d}", "quantity": index % 5 + 1, "customer_id": f"CUST-{index % 500:06d}"}
+
+
+def run_single(orders: int) -> float:
+    """単件 POST で注文を作成し、orders/sec を返す"""
+    context = FakeLambdaContext()
+    events = [api_gateway_event("POST", "/orders", body=order_payload(i)) for i in range(orders)]
+
+    start = time.perf_counter()
+    for event in events:
+        response = function.lambda_handler(event, context)
+        assert response["statusCode"] == 201, response
+    return orders / (time.perf_counter() - start)
+
+
+def run_batch(orders: int, batch_size: int) -> float:
+    """一括 POST で注文を作成し、orders/sec を返す"""
+    context = FakeLambdaContext()
+    events = [
+        api_gateway_event("POST", "/orders:batch", body={"orders": [order_payload(i) for i in range(offset, offset + batch_size)]})
+        for offset in range(0, orders, batch_size)
+    ]
+
+    start = time.perf_counter()
+    for event in events:
+        response = function.lambda_handler(event, context)
+        assert response["statusCode"] == 207, response
+        assert all(result["status"] == 201 for result in json.loads(response["body"])["results"])
+    return len(events) * batch_size / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=5_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 50, 100])
+    args = parser.parse_args()
+
+    function.logger.registered_handler.setStream(open(os.devnull, "w"))
+
+    print(f"orders={args.orders}")
+    print(f"{'mode':<14}{'orders/sec':>12}{'speedup':>9}")
+
+    function.orders_db = OrderStore()
+    baseline = run_single(args.orders)
+    print(f"{'single':<14}{baseline:>12.0f}{1:>8.1f}x")
+
+    for batch_size in args.batch_sizes:
+        function.orders_db = OrderStore()
+        throughput = run_batch(args.orders, batch_size)
+        print(f"{f'batch={batch_size}':<14}{throughput:>12.0f}{throughput / baseline:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
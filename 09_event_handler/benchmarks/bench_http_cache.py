@@ -0,0 +1,99 @@
+"""繰り返し読み取り時のレスポンスサイズとレイテンシの計測
+
+lambda/function.py のハンドラーを CompiledRestResolver (圧縮・ETag なし) と
+CachingRestResolver (gzip 圧縮 + ETag/304 + プリフライトのキャッシュ) に登録し、
+同じリクエストを繰り返したときのクライアントへの送信バイト数 (Base64 デコード後) と
+app.resolve のレイテンシを比較する。
+
+シナリオ:
+    GET /orders (初回)        Accept-Encoding: gzip、If-None-Match なし
+    GET /orders (再読み込み)  初回の ETag を If-None-Match に指定
+    GET /orders/<id> (再読み込み)
+    OPTIONS /orders           CORS プリフライト
+
+使い方:
+    python benchmarks/bench_http_cache.py [--orders 10000] [--limit 100] [--requests 2000]
+"""
+import argparse
+import base64
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+import function  # noqa: E402
+from bench_order_store import generate_orders  # noqa: E402
+from events import FakeLambdaContext, api_gateway_event  # noqa: E402
+from http_cache import CachingRestResolver  # noqa: E402
+from routing import CompiledRestResolver  # noqa: E402
+
+
+def build_app(resolver_class: type[CompiledRestResolver]) -> CompiledRestResolver:
+    app = resolver_class(cors=function.cors_config)
+    app.get("/orders")(function.get_orders)
+    app.get("/orders/<order_id>")(function.get_order)
+    return app
+
+
+def sent_bytes(response: dict) -> int:
+    body = response["body"]
+    return len(base64.b64decode(body)) if response["isBase64Encoded"] else len(body.encode())
+
+
+def measure(app: CompiledRestResolver, event: dict, requests: int) -> tuple[float, int, int]:
+    """(p50 [us], ステータスコード, 送信バイト数) を返す"""
+    context = FakeLambdaContext()
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = app.resolve(event, context)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(samples), response["statusCode"], sent_bytes(response)
+
+
+def etag_of(app: CompiledRestResolver, event: dict) -> str:
+    response = app.resolve(event, FakeLambdaContext())
+    return response["multiValueHeaders"].get("ETag", ['"none"'])[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2_000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    for order in generate_orders(args.orders, customers=max(1, args.orders // 10)):
+        function.orders_db.add(order)
+    order_id = next(function.orders_db.iter())["order_id"]
+
+    gzip_header = {"Accept-Encoding": "gzip, deflate, br"}
+    list_event = api_gateway_event("GET", "/orders", query={"limit": str(args.limit)}, headers=gzip_header)
+    item_event = api_gateway_event("GET", f"/orders/{order_id}", resource="/orders/{order_id}", headers=gzip_header)
+
+    print(f"orders={args.orders} limit={args.limit} requests={args.requests}")
+    print(f"{'scenario':<26}{'resolver':<10}{'status':>7}{'bytes':>9}{'p50 (us)':>11}")
+    for name, resolver_class in [("baseline", CompiledRestResolver), ("caching", CachingRestResolver)]:
+        app = build_app(resolver_class)
+        list_etag = etag_of(app, list_event)
+        item_etag = etag_of(app, item_event)
+
+        scenarios = [
+            ("GET /orders (first)", list_event),
+            ("GET /orders (repeat)", {**list_event, "headers": {**gzip_header, "If-None-Match": list_etag}}),
+            ("GET /orders/<id> (repeat)", {**item_event, "headers": {**gzip_header, "If-None-Match": item_etag}}),
+            ("OPTIONS /orders", api_gateway_event("OPTIONS", "/orders")),
+        ]
+        for scenario, event in scenarios:
+            event["multiValueHeaders"] = {key: [value] for key, value in event["headers"].items()}
+            p50, status, size = measure(app, event, args.requests)
+            print(f"{scenario:<26}{name:<10}{status:>7}{size:>9}{p50:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
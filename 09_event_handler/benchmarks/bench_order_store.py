@@ -0,0 +1,99 @@
+"""GET /orders の絞り込み処理のレイテンシ計測
+
+従来の dict 全件コピー + 線形フィルタと、OrderStore のセカンダリインデックスを使った
+取得を、100,000 件の注文で比較する。
+
+使い方:
+    python benchmarks/bench_order_store.py [--orders 100000] [--limit 10] [--repeat 200]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from order_store import OrderStore  # noqa: E402
+
+STATUSES = ["pending", "processing", "shipped", "delivered", "cancelled"]
+
+
+def generate_orders(orders: int, customers: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "order_id": f"ORD-{i:08d}",
+            "product_id": f"PROD-{rng.randrange(1000):05d}",
+            "quantity": rng.randint(1, 5),
+            "customer_id": f"CUST-{rng.randrange(customers):06d}",
+            "status": rng.choices(STATUSES, weights=[5, 5, 20, 65, 5])[0],
+            "created_at": "2024-01-01T00:00:00",
+        }
+        for i in range(orders)
+    ]
+
+
+def baseline_get_orders(orders_db: dict, status: str | None, customer_id: str | None, limit: int) -> dict:
+    """従来の get_orders の処理"""
+    orders = list(orders_db.values())
+    if status:
+        orders = [o for o in orders if o.get("status") == status]
+    if customer_id:
+        orders = [o for o in orders if o.get("customer_id") == customer_id]
+    return {"orders": orders[:limit], "count": len(orders)}
+
+
+def store_get_orders(store: OrderStore, status: str | None, customer_id: str | None, limit: int) -> dict:
+    orders = list(islice(store.iter(status=status, customer_id=customer_id), limit))
+    return {"orders": orders, "count": store.count(status=status, customer_id=customer_id)}
+
+
+def measure(func, repeat: int) -> tuple[float, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    orders = generate_orders(args.orders, args.customers)
+    orders_db = {order["order_id"]: dict(order) for order in orders}
+    store = OrderStore()
+    for order in orders:
+        store.add(dict(order))
+
+    customer_id = orders[0]["customer_id"]
+    scenarios = [
+        ("no filter", None, None),
+        ("status=pending", "pending", None),
+        ("status=delivered", "delivered", None),
+        ("customer_id", None, customer_id),
+        ("status+customer", "delivered", customer_id),
+    ]
+
+    print(f"orders={args.orders} limit={args.limit}")
+    print(f"{'scenario':<18}{'dict p50 (us)':>15}{'store p50 (us)':>16}{'dict p99 (us)':>15}{'store p99 (us)':>16}")
+    for name, status, customer in scenarios:
+        expected = baseline_get_orders(orders_db, status, customer, args.limit)
+        assert store_get_orders(store, status, customer, args.limit) == expected, name
+
+        base_p50, base_p99 = measure(lambda: baseline_get_orders(orders_db, status, customer, args.limit), args.repeat)
+        store_p50, store_p99 = measure(lambda: store_get_orders(store, status, customer, args.limit), args.repeat)
+        print(f"{name:<18}{base_p50:>15.1f}{store_p50:>16.1f}{base_p99:>15.1f}{store_p99:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""GET /orders のレスポンス生成時間とメモリ割り当ての計測
+
+従来のハンドラー (全件コピー + フィルタ + スライス + レスポンス全体の json.dumps) と、
+カーソルページング + 注文ごとの JSON 断片キャッシュによるレスポンス生成を比較する。
+メモリ割り当ては tracemalloc のピーク値で計測する。
+
+使い方:
+    python benchmarks/bench_pagination.py [--orders 100000 1000000] [--limit 100]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from bench_order_store import generate_orders  # noqa: E402
+from order_store import OrderStore  # noqa: E402
+
+
+def baseline_response(orders_db: dict, status: str | None, limit: int) -> str:
+    """従来の get_orders + リゾルバーによるシリアライズ"""
+    orders = list(orders_db.values())
+    if status:
+        orders = [o for o in orders if o.get("status") == status]
+    return json.dumps({"orders": orders[:limit], "count": len(orders)}, separators=(",", ":"))
+
+
+def paged_response(store: OrderStore, status: str | None, limit: int, cursor: str | None) -> str:
+    """lambda/function.py の get_orders と同じレスポンス生成"""
+    orders, next_cursor = store.page(limit=limit, status=status, cursor=cursor)
+    count = store.count(status=status)
+    return "".join(
+        [
+            '{"orders":[',
+            ",".join(store.to_json(order) for order in orders),
+            f'],"count":{count},"next_cursor":{json.dumps(next_cursor)}}}',
+        ]
+    )
+
+
+def measure(func, repeat: int) -> tuple[float, float]:
+    """(レイテンシ p50 [ms], 割り当てピーク [KiB]) を返す"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return statistics.median(samples), peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"limit={args.limit}")
+    print(f"{'orders':>9}  {'scenario':<26}{'p50 (ms)':>10}{'peak (KiB)':>12}")
+    for size in args.orders:
+        orders = generate_orders(size, customers=size // 10)
+        orders_db = {order["order_id"]: order for order in orders}
+        store = OrderStore()
+        for order in orders:
+            store.add(order)
+
+        # 中間あたりのページのカーソル
+        _, middle_cursor = store.page(limit=size // 2)
+
+        scenarios = [
+            ("baseline", lambda: baseline_response(orders_db, None, args.limit)),
+            ("baseline status=pending", lambda: baseline_response(orders_db, "pending", args.limit)),
+            ("paged first page", lambda: paged_response(store, None, args.limit, None)),
+            ("paged middle page", lambda: paged_response(store, None, args.limit, middle_cursor)),
+            ("paged status=pending", lambda: paged_response(store, "pending", args.limit, None)),
+        ]
+        for name, func in scenarios:
+            p50, peak = measure(func, args.repeat)
+            print(f"{size:>9}  {name:<26}{p50:>10.3f}{peak:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""ルート解決のレイテンシ計測
+
+APIGatewayRestResolver (全ルートの正規表現を順に照合) と CompiledRestResolver
+(Trie で候補を絞り込んでから照合) で、登録ルート数ごとの解決レイテンシを比較する。
+ルートは /resourceN, /resourceN/<id>, /resourceN/<id>/items/<item_id> を
+GET/POST/PUT/DELETE で登録し、合成した API Gateway REST イベントで解決する。
+
+使い方:
+    python benchmarks/bench_routing.py [--routes 12 48 152 600] [--requests 5000]
+"""
+import argparse
+import logging
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aws_lambda_powertools.event_handler import APIGatewayRestResolver  # noqa: E402
+
+from events import FakeLambdaContext, api_gateway_event  # noqa: E402
+from routing import CompiledRestResolver, RouteTable  # noqa: E402
+
+METHODS = ["GET", "POST", "PUT", "DELETE"]
+TEMPLATES = ["/resource{n}", "/resource{n}/<id>", "/resource{n}/<id>/items/<item_id>"]
+
+
+def build_app(resolver_class: type[APIGatewayRestResolver], routes: int) -> APIGatewayRestResolver:
+    app = resolver_class()
+    for index in range(routes):
+        rule = TEMPLATES[index // len(METHODS) % len(TEMPLATES)].format(n=index // (len(METHODS) * len(TEMPLATES)))
+        app.route(rule=rule, method=METHODS[index % len(METHODS)])(lambda **kwargs: {"ok": True})
+    return app
+
+
+def concrete_path(rule: str, rng: random.Random) -> str:
+    return rule.replace("<id>", str(rng.randrange(10_000))).replace("<item_id>", str(rng.randrange(100)))
+
+
+def build_events(app: APIGatewayRestResolver, requests: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    routes = app._static_routes + app._dynamic_routes
+    events = []
+    for _ in range(requests):
+        route = rng.choice(routes)
+        events.append(api_gateway_event(route.method, concrete_path(route.path, rng)))
+    return events
+
+
+def measure(app: APIGatewayRestResolver, events: list[dict]) -> tuple[float, float]:
+    context = FakeLambdaContext()
+    samples = []
+    for event in events:
+        start = time.perf_counter()
+        response = app.resolve(event, context)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+        assert response["statusCode"] == 200, response
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def linear_lookup(routes: list, method: str, path: str):
+    """APIGatewayRestResolver._resolve と同じ線形探索"""
+    for route in routes:
+        if method != route.method:
+            continue
+        if route.rule.match(path):
+            return route
+    return None
+
+
+def compiled_lookup(table: RouteTable, method: str, path: str):
+    for route in table.candidates(method, path):
+        if route.rule.match(path):
+            return route
+    return None
+
+
+def measure_lookup(lookup, target, requests: list[tuple[str, str]]) -> float:
+    """ルート探索のみの平均時間 [us]"""
+    start = time.perf_counter()
+    for method, path in requests:
+        lookup(target, method, path)
+    return (time.perf_counter() - start) / len(requests) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", type=int, nargs="+", default=[12, 48, 152, 600])
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print(f"requests={args.requests}")
+    print(
+        f"{'routes':>7}  {'lookup linear':>14}{'lookup compiled':>16}"
+        f"{'resolve linear':>16}{'resolve compiled':>18}{'p99 linear':>12}{'p99 compiled':>14}  (us)"
+    )
+    for routes in args.routes:
+        linear = build_app(APIGatewayRestResolver, routes)
+        compiled = build_app(CompiledRestResolver, routes)
+        events = build_events(linear, args.requests)
+
+        # ルート探索のみ
+        registered = linear._static_routes + linear._dynamic_routes
+        requests = [(event["httpMethod"], event["path"]) for event in events]
+        lookup_linear = measure_lookup(linear_lookup, registered, requests)
+        lookup_compiled = measure_lookup(compiled_lookup, RouteTable(registered), requests)
+
+        # app.resolve 全体
+        linear_p50, linear_p99 = measure(linear, events)
+        compiled_p50, compiled_p99 = measure(compiled, events)
+        print(
+            f"{routes:>7}  {lookup_linear:>14.2f}{lookup_compiled:>16.2f}"
+            f"{linear_p50:>16.1f}{compiled_p50:>18.1f}{linear_p99:>12.1f}{compiled_p99:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
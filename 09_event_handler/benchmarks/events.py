@@ -0,0 +1,55 @@
+"""ベンチマーク用の API Gateway REST イベントと LambdaContext の生成"""
+import json
+from dataclasses import dataclass
+from typing import Any
+from uuid import uuid4
+
+
+@dataclass
+class FakeLambdaContext:
+    """ローカル実行用の LambdaContext"""
+
+    function_name: str = "order-api"
+    function_version: str = "$LATEST"
+    memory_limit_in_mb: int = 128
+    invoked_function_arn: str = "arn:aws:lambda:ap-northeast-1:123456789012:function:order-api"
+    aws_request_id: str = "00000000-0000-0000-0000-000000000000"
+    log_group_name: str = "/aws/lambda/order-api"
+    log_stream_name: str = "2024/01/01/[$LATEST]00000000000000000000000000000000"
+
+    def get_remaining_time_in_millis(self) -> int:
+        return 30_000
+
+
+def api_gateway_event(
+    method: str,
+    path: str,
+    resource: str | None = None,
+    query: dict[str, str] | None = None,
+    body: Any = None,
+    headers: dict[str, str] | None = None,
+) -> dict[str, Any]:
+    """API Gateway REST (プロキシ統合) のイベントを生成する"""
+    headers = {"Content-Type": "application/json", "Origin": "https://example.com", **(headers or {})}
+    request_id = str(uuid4())
+    return {
+        "resource": resource or path,
+        "path": path,
+        "httpMethod": method,
+        "headers": headers,
+        "multiValueHeaders": {name: [value] for name, value in headers.items()},
+        "queryStringParameters": query,
+        "multiValueQueryStringParameters": {name: [value] for name, value in query.items()} if query else None,
+        "pathParameters": None,
+        "stageVariables": None,
+        "requestContext": {
+            "resourcePath": resource or path,
+            "httpMethod": method,
+            "path": f"/prod{path}",
+            "stage": "prod",
+            "requestId": request_id,
+            "identity": {"sourceIp": "127.0.0.1"},
+        },
+        "body": body if body is None or isinstance(body, str) else json.dumps(body),
+        "isBase64Encoded": False,
+    }
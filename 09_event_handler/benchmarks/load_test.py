@@ -0,0 +1,328 @@
+"""order-api の lambda_handler を対象にしたプロセス内負荷試験
+
+合成した API Gateway REST イベント (ルート・クエリ文字列・ボディの組み合わせ) と
+FakeLambdaContext で lambda_handler をループ実行し、次を報告する。
+
+- スループット (requests/sec) と p50 / p99 レイテンシ (計測用のラップなしで実行)
+- シナリオ (ルート) ごとの p50 / p99
+- レイヤーごとの平均コスト (各レイヤーを計測用にラップして別途実行)
+    routing        RouteTable による候補の絞り込み
+    middleware     ミドルウェアチェーン・例外ハンドラー (ルート解決全体 - routing - handler)
+    handler        ルートのハンドラー (@tracer.capture_method を含む)
+    serialization  ResponseBuilder.build (ETag・圧縮・ヘッダーのシリアライズ)
+    resolver       イベントの変換・コンテキストの設定など app.resolve の残り
+    decorators     @logger.inject_lambda_context / @tracer.capture_lambda_handler
+                   (lambda_handler 全体 - app.resolve)
+
+Logger / Tracer の有効・無効は import 前の環境変数で切り替える。
+Logger を有効にした場合も出力は /dev/null に捨てる (整形コストは計測に含まれる)。
+Tracer を有効にした場合は Lambda 環境を模した環境変数を設定し、X-Ray デーモン宛ての
+UDP 送信まで行う (デーモンが存在しなくても送信は失敗しない)。
+
+使い方:
+    python benchmarks/load_test.py [--requests 20000] [--logger on|off] [--tracer on|off]
+    python benchmarks/load_test.py --matrix    # Logger / Tracer の 4 通りを別プロセスで比較
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from functools import wraps
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from bench_order_store import generate_orders  # noqa: E402
+from events import FakeLambdaContext, api_gateway_event  # noqa: E402
+
+LAYERS = ["routing", "middleware", "handler", "serialization", "resolver", "decorators"]
+
+# Tracer を有効にするための Lambda 実行環境の環境変数
+LAMBDA_ENV = {
+    "LAMBDA_TASK_ROOT": str(Path(__file__).resolve().parents[1] / "lambda"),
+    "AWS_LAMBDA_FUNCTION_NAME": "order-api",
+    "_X_AMZN_TRACE_ID": "Root=1-5759e988-bd862e3fe1be46a994272793;Parent=53995c3f42cd8ad8;Sampled=1",
+    "AWS_XRAY_DAEMON_ADDRESS": "127.0.0.1:2000",
+}
+
+# (シナリオ名, 重み)
+SCENARIOS = [
+    ("GET /orders", 30),
+    ("GET /orders?status", 15),
+    ("GET /orders/<id>", 25),
+    ("GET /orders/<id> (304)", 5),
+    ("POST /orders", 10),
+    ("PUT /orders/<id>", 5),
+    ("POST /orders:batch", 3),
+    ("OPTIONS /orders", 5),
+    ("GET /unknown (404)", 2),
+]
+
+
+def configure_environment(logger_enabled: bool, tracer_enabled: bool) -> None:
+    """function モジュールの import 前に Logger / Tracer の設定を環境変数で行う"""
+    os.environ["POWERTOOLS_LOG_LEVEL"] = "INFO" if logger_enabled else "CRITICAL"
+    if tracer_enabled:
+        os.environ.update(LAMBDA_ENV)
+        os.environ.pop("POWERTOOLS_TRACE_DISABLED", None)
+    else:
+        os.environ["POWERTOOLS_TRACE_DISABLED"] = "true"
+
+
+def build_events(order_ids: list[str], requests: int, seed: int = 0) -> list[tuple[str, dict]]:
+    """シナリオの重みに従って (シナリオ名, イベント) を生成する"""
+    rng = random.Random(seed)
+    names = [name for name, _ in SCENARIOS]
+    weights = [weight for _, weight in SCENARIOS]
+    gzip_header = {"Accept-Encoding": "gzip, deflate, br"}
+
+    def payload() -> dict:
+        return {
+            "product_id": f"PROD-{rng.randrange(1000):05d}",
+            "quantity": rng.randint(1, 5),
+            "customer_id": f"CUST-{rng.randrange(1000):06d}",
+        }
+
+    events = []
+    for name in rng.choices(names, weights=weights, k=requests):
+        order_id = rng.choice(order_ids)
+        if name == "GET /orders":
+            event = api_gateway_event("GET", "/orders", query={"limit": str(rng.choice([10, 50, 100]))}, headers=gzip_header)
+        elif name == "GET /orders?status":
+            query = {"status": rng.choice(["pending", "shipped", "delivered"]), "limit": "20"}
+            event = api_gateway_event("GET", "/orders", query=query, headers=gzip_header)
+        elif name == "GET /orders/<id>":
+            event = api_gateway_event("GET", f"/orders/{order_id}", resource="/orders/{order_id}")
+        elif name == "GET /orders/<id> (304)":
+            # ETag は計測前に解決して差し替える
+            event = api_gateway_event("GET", f"/orders/{order_id}", resource="/orders/{order_id}")
+        elif name == "POST /orders":
+            event = api_gateway_event("POST", "/orders", body=payload())
+        elif name == "PUT /orders/<id>":
+            body = {"quantity": rng.randint(1, 5)}
+            event = api_gateway_event("PUT", f"/orders/{order_id}", resource="/orders/{order_id}", body=body)
+        elif name == "POST /orders:batch":
+            event = api_gateway_event("POST", "/orders:batch", body={"orders": [payload() for _ in range(10)]})
+        elif name == "OPTIONS /orders":
+            event = api_gateway_event("OPTIONS", "/orders")
+        else:
+            event = api_gateway_event("GET", "/unknown")
+        events.append((name, event))
+    return events
+
+
+def with_if_none_match(event: dict, etag: str) -> dict:
+    headers = {**event["headers"], "If-None-Match": etag}
+    return {**event, "headers": headers, "multiValueHeaders": {name: [value] for name, value in headers.items()}}
+
+
+class LayerTimer:
+    """各レイヤーを計測用にラップし、リクエストごとの所要時間を集計する"""
+
+    def __init__(self):
+        self.current: dict[str, float] = defaultdict(float)
+        self.totals: dict[str, float] = defaultdict(float)
+        self.requests = 0
+
+    def wrap(self, name: str, func):
+        current = self.current
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                current[name] += time.perf_counter() - start
+
+        return timed
+
+    def finish(self, total: float) -> None:
+        """1 リクエスト分の計測値をレイヤーに分解して加算する"""
+        c = self.current
+        layers = {
+            "routing": c["routing"],
+            "middleware": c["dispatch"] - c["routing"] - c["handler"],
+            "handler": c["handler"],
+            "serialization": c["serialization"],
+            "resolver": c["resolve"] - c["dispatch"] - c["serialization"],
+            "decorators": total - c["resolve"],
+        }
+        for name, value in layers.items():
+            self.totals[name] += value
+        self.requests += 1
+        c.clear()
+
+    def mean_us(self) -> dict[str, float]:
+        return {name: self.totals[name] / self.requests * 1_000_000 for name in LAYERS}
+
+
+def instrument(function_module, timer: LayerTimer) -> None:
+    """function モジュールのリゾルバーとハンドラーを計測用にラップする"""
+    import http_cache
+
+    app = function_module.app
+    # ミドルウェアスタックは route.func から構築されるため、差し替えた後に再構築させる
+    for route in app._static_routes + app._dynamic_routes:
+        route.func = timer.wrap("handler", route.func)
+        route._middleware_stack = route.func
+        route._middleware_stack_built = False
+
+    table = app._compiled_routes()
+    table.candidates = timer.wrap("routing", table.candidates)
+    app._resolve = timer.wrap("dispatch", app._resolve)
+    app.resolve = timer.wrap("resolve", app.resolve)
+    http_cache.ConditionalResponseBuilder.build = timer.wrap("serialization", http_cache.ConditionalResponseBuilder.build)
+
+
+def run(args: argparse.Namespace) -> dict:
+    configure_environment(args.logger == "on", args.tracer == "on")
+
+    import function
+    from order_store import OrderStore
+
+    function.logger.registered_handler.setStream(open(os.devnull, "w"))
+
+    def fresh_store() -> list[str]:
+        function.orders_db = OrderStore()
+        orders = generate_orders(args.orders, customers=max(1, args.orders // 10))
+        for order in orders:
+            function.orders_db.add(order)
+        return [order["order_id"] for order in orders]
+
+    order_ids = fresh_store()
+    events = build_events(order_ids, args.requests, seed=args.seed)
+    context = FakeLambdaContext()
+
+    # 304 シナリオ用の ETag を解決
+    etags: dict[str, str] = {}
+    for index, (name, event) in enumerate(events):
+        if name.endswith("(304)"):
+            path = event["path"]
+            if path not in etags:
+                response = function.lambda_handler(event, context)
+                etags[path] = response["multiValueHeaders"]["ETag"][0]
+            events[index] = (name, with_if_none_match(event, etags[path]))
+
+    def drive(timer: LayerTimer | None = None) -> dict[str, list[float]]:
+        samples: dict[str, list[float]] = defaultdict(list)
+        for name, event in events:
+            start = time.perf_counter()
+            response = function.lambda_handler(event, context)
+            elapsed = time.perf_counter() - start
+            assert response["statusCode"] < 500, response
+            samples[name].append(elapsed)
+            if timer is not None:
+                timer.finish(elapsed)
+        return samples
+
+    # ウォームアップ
+    drive()
+
+    fresh_store()
+    start = time.perf_counter()
+    samples = drive()
+    wall = time.perf_counter() - start
+
+    fresh_store()
+    timer = LayerTimer()
+    instrument(function, timer)
+    drive(timer)
+
+    latencies = sorted(value for values in samples.values() for value in values)
+    return {
+        "logger": args.logger,
+        "tracer": args.tracer,
+        "requests": len(latencies),
+        "rps": len(latencies) / wall,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "scenarios": {
+            name: {
+                "requests": len(values),
+                "p50": percentile(sorted(values), 0.5),
+                "p99": percentile(sorted(values), 0.99),
+            }
+            for name, values in samples.items()
+        },
+        "layers": timer.mean_us(),
+    }
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """パーセンタイル [us]"""
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))] * 1_000_000
+
+
+def print_result(result: dict) -> None:
+    print(f"logger={result['logger']} tracer={result['tracer']} requests={result['requests']}")
+    print(f"  throughput {result['rps']:.0f} req/s  p50 {result['p50']:.1f} us  p99 {result['p99']:.1f} us")
+    print(f"  {'scenario':<26}{'requests':>9}{'p50 (us)':>11}{'p99 (us)':>11}")
+    for name, _ in SCENARIOS:
+        scenario = result["scenarios"].get(name)
+        if scenario:
+            print(f"  {name:<26}{scenario['requests']:>9}{scenario['p50']:>11.1f}{scenario['p99']:>11.1f}")
+    total = sum(result["layers"].values())
+    print(f"  {'layer':<26}{'mean (us)':>9}{'share':>11}")
+    for name in LAYERS:
+        value = result["layers"][name]
+        print(f"  {name:<26}{value:>9.1f}{value / total:>10.1%}")
+
+
+def run_matrix(args: argparse.Namespace) -> None:
+    """Logger / Tracer の組み合わせごとに別プロセスで計測し、結果を並べて表示する"""
+    results = []
+    for logger in ["off", "on"]:
+        for tracer in ["off", "on"]:
+            command = [
+                sys.executable,
+                __file__,
+                "--json",
+                f"--logger={logger}",
+                f"--tracer={tracer}",
+                f"--requests={args.requests}",
+                f"--orders={args.orders}",
+                f"--seed={args.seed}",
+            ]
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"requests={args.requests} orders={args.orders}")
+    header = f"{'logger':<8}{'tracer':<8}{'req/s':>8}{'p50':>8}{'p99':>8}" + "".join(f"{name:>14}" for name in LAYERS)
+    print(header + "  (us)")
+    for result in results:
+        layers = "".join(f"{result['layers'][name]:>14.1f}" for name in LAYERS)
+        print(
+            f"{result['logger']:<8}{result['tracer']:<8}{result['rps']:>8.0f}"
+            f"{result['p50']:>8.1f}{result['p99']:>8.1f}{layers}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--orders", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--logger", choices=["on", "off"], default="on")
+    parser.add_argument("--tracer", choices=["on", "off"], default="on")
+    parser.add_argument("--matrix", action="store_true", help="Logger / Tracer の 4 通りを比較する")
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力する")
+    args = parser.parse_args()
+
+    if args.matrix:
+        run_matrix(args)
+        return
+
+    result = run(args)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print_result(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,8 @@ class EventHandlerStack(Stack):
             self,
             "OrderApi",
             rest_api_name="Order API",
+            # gzip 圧縮したレスポンス (Base64) をバイナリとしてクライアントに返す
+            binary_media_types=["*/*"],
             deploy_options=apigw.StageOptions(
                 stage_name="prod",
                 tracing_enabled=True,
@@ -51,12 +53,21 @@ class EventHandlerStack(Stack):
         orders = api.root.add_resource("orders")
         orders.add_method("GET", integration)
         orders.add_method("POST", integration)
+        # CORS プリフライトは Lambda 関数 (CORSConfig) で応答する
+        orders.add_method("OPTIONS", integration)
+
+        # /orders:batch リソース (一括作成・更新)
+        orders_batch = api.root.add_resource("orders:batch")
+        orders_batch.add_method("POST", integration)
+        orders_batch.add_method("PUT", integration)
+        orders_batch.add_method("OPTIONS", integration)
 
         # /orders/{order_id} リソース
         order = orders.add_resource("{order_id}")
         order.add_method("GET", integration)
         order.add_method("PUT", integration)
         order.add_method("DELETE", integration)
+        order.add_method("OPTIONS", integration)
 
         # 出力
         CfnOutput(self, "ApiEndpoint", value=api.url)
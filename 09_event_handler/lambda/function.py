@@ -5,7 +5,6 @@ from uuid import uuid4
 
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.event_handler import (
-    APIGatewayRestResolver,
     CORSConfig,
     Response,
     content_types,
@@ -17,6 +16,9 @@ from aws_lambda_powertools.event_handler.exceptions import (
 from aws_lambda_powertools.logging import correlation_paths
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+from http_cache import CachingRestResolver
+from order_store import OrderStore
+
 logger = Logger(service="order-api")
 tracer = Tracer(service="order-api")
 
@@ -27,25 +29,57 @@ cors_config = CORSConfig(
     max_age=300,
 )
 
-app = APIGatewayRestResolver(cors=cors_config)
+# ルートをメソッド・静的セグメントの Trie にコンパイルして解決するリゾルバー
+# GET のレスポンスには ETag を付与し (If-None-Match が一致すれば 304)、1 KiB 以上は gzip 圧縮する
+app = CachingRestResolver(cors=cors_config, compress_min_size=1024)
+
+# 注文の作成に必要なフィールド
+REQUIRED_FIELDS = ("product_id", "quantity", "customer_id")
+# 一括作成・更新で 1 リクエストに含められる注文数の上限
+MAX_BATCH_SIZE = 100
 
 # サンプルデータ (実際は DynamoDB などを使用)
-orders_db: dict[str, dict[str, Any]] = {}
+# status / customer_id のセカンダリインデックスで絞り込みを高速化
+orders_db = OrderStore()
 
 
 @app.get("/orders")
 @tracer.capture_method
 def get_orders():
-    """全注文の取得"""
+    """全注文の取得 (カーソルによるページング)"""
     status = app.current_event.get_query_string_value(name="status", default_value=None)
+    customer_id = app.current_event.get_query_string_value(name="customer_id", default_value=None)
     limit = app.current_event.get_query_string_value(name="limit", default_value="10")
+    cursor = app.current_event.get_query_string_value(name="cursor", default_value=None)
+
+    # 負の値や数字以外の limit は islice / int の内部のメッセージを返さないように先に確認する
+    if not (limit.isascii() and limit.isdigit()):
+        raise ValueError(f"Invalid limit: {limit}")
+
+    # インデックスから limit 件だけを取り出す (全件のコピー・走査は行わない)
+    # 不正な cursor は ValueError となり 400 を返す
+    orders, next_cursor = orders_db.page(
+        limit=int(limit),
+        status=status,
+        customer_id=customer_id,
+        cursor=cursor,
+    )
+    count = orders_db.count(status=status, customer_id=customer_id)
+
+    # ページ内の注文だけを (キャッシュ済みの) JSON 断片から組み立てる
+    body = "".join(
+        [
+            '{"orders":[',
+            ",".join(orders_db.to_json(order) for order in orders),
+            f'],"count":{count},"next_cursor":{json.dumps(next_cursor)}}}',
+        ]
+    )
 
-    orders = list(orders_db.values())
-
-    if status:
-        orders = [o for o in orders if o.get("status") == status]
-
-    return {"orders": orders[: int(limit)], "count": len(orders)}
+    return Response(
+        status_code=200,
+        content_type=content_types.APPLICATION_JSON,
+        body=body,
+    )
 
 
 @app.get("/orders/<order_id>")
@@ -55,35 +89,106 @@ def get_order(order_id: str):
     if order_id not in orders_db:
         raise NotFoundError(f"Order {order_id} not found")
 
-    return {"order": orders_db[order_id]}
+    # キャッシュ済みの JSON 断片からレスポンスを組み立てる
+    return Response(
+        status_code=200,
+        content_type=content_types.APPLICATION_JSON,
+        body='{"order":' + orders_db.to_json(orders_db.get(order_id)) + "}",
+    )
+
 
+def check_quantity(quantity: Any) -> None:
+    """数量が正の整数か確認する (bool は int のサブクラスのため除く)"""
+    if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity <= 0:
+        raise BadRequestError("quantity must be a positive integer")
 
-@app.post("/orders")
-@tracer.capture_method
-def create_order():
-    """新規注文の作成"""
-    body: dict[str, Any] = app.current_event.json_body
 
-    required_fields = ["product_id", "quantity", "customer_id"]
-    if not all(field in body for field in required_fields):
+def new_order(body: dict[str, Any], created_at: str) -> dict[str, Any]:
+    """リクエストの内容から注文を生成する (必須フィールドの欠落・不正な型は BadRequestError)"""
+    if not isinstance(body, dict) or not all(field in body for field in REQUIRED_FIELDS):
         raise BadRequestError("Missing required fields")
+    for field in ("product_id", "customer_id"):
+        if not isinstance(body[field], str):
+            raise BadRequestError(f"{field} must be a string")
+    check_quantity(body["quantity"])
 
-    order_id = str(uuid4())
-    order = {
-        "order_id": order_id,
+    return {
+        "order_id": str(uuid4()),
         "product_id": body["product_id"],
         "quantity": body["quantity"],
         "customer_id": body["customer_id"],
         "status": "pending",
-        "created_at": datetime.now().isoformat(),
+        "created_at": created_at,
     }
 
-    orders_db[order_id] = order
-    logger.info("Order created", extra={"order_id": order_id})
+
+def order_changes(body: dict[str, Any], updated_at: str) -> dict[str, Any]:
+    """リクエストの内容から注文の変更内容を生成する (不正な値は BadRequestError)"""
+    if not isinstance(body, dict):
+        raise BadRequestError("Request body must be an object")
+    if "status" in body and not isinstance(body["status"], str):
+        raise BadRequestError("status must be a string")
+    if "quantity" in body:
+        check_quantity(body["quantity"])
+
+    changes = {field: body[field] for field in ["quantity", "status"] if field in body}
+    changes["updated_at"] = updated_at
+    return changes
+
+
+def batch_items(body: Any) -> list[Any]:
+    """一括リクエストの orders 配列を取り出す"""
+    items = body.get("orders") if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items:
+        raise BadRequestError("orders must be a non-empty list")
+    if len(items) > MAX_BATCH_SIZE:
+        raise BadRequestError(f"orders must not contain more than {MAX_BATCH_SIZE} items")
+    return items
+
+
+@app.post("/orders")
+@tracer.capture_method
+def create_order():
+    """新規注文の作成"""
+    body: dict[str, Any] = app.current_event.json_body
+
+    order = new_order(body, created_at=datetime.now().isoformat())
+
+    orders_db.add(order)
+    logger.info("Order created", extra={"order_id": order["order_id"]})
 
     return {"order": order}, 201
 
 
+@app.post("/orders:batch")
+@tracer.capture_method
+def create_orders():
+    """注文の一括作成
+
+    全件のバリデーション (必須フィールド・型) を先に行い、妥当な注文だけをまとめてストアに追加する。
+    不正な注文はストアに渡す前に 400 として結果に含めるため、妥当な注文の追加は 1 件ずつ失敗しない。
+    結果は注文ごとのステータス (201 / 400) を持つ 207 Multi-Status で返す。
+    """
+    items = batch_items(app.current_event.json_body)
+    created_at = datetime.now().isoformat()
+
+    results: list[dict[str, Any]] = []
+    orders: list[dict[str, Any]] = []
+    for index, item in enumerate(items):
+        try:
+            order = new_order(item, created_at=created_at)
+        except BadRequestError as ex:
+            results.append({"index": index, "status": 400, "error": ex.msg})
+            continue
+        orders.append(order)
+        results.append({"index": index, "status": 201, "order": order})
+
+    orders_db.add_many(orders)
+    logger.info("Orders created", extra={"created_count": len(orders), "failed_count": len(items) - len(orders)})
+
+    return {"results": results}, 207
+
+
 @app.put("/orders/<order_id>")
 @tracer.capture_method
 def update_order(order_id: str):
@@ -93,13 +198,46 @@ def update_order(order_id: str):
 
     body: dict[str, Any] = app.current_event.json_body
 
-    for field in ["quantity", "status"]:
-        if field in body:
-            orders_db[order_id][field] = body[field]
+    changes = order_changes(body, updated_at=datetime.now().isoformat())
 
-    orders_db[order_id]["updated_at"] = datetime.now().isoformat()
+    return {"order": orders_db.update(order_id, changes)}
 
-    return {"order": orders_db[order_id]}
+
+@app.put("/orders:batch")
+@tracer.capture_method
+def update_orders():
+    """注文の一括更新
+
+    不正な要素 (オブジェクトでない・order_id が文字列でない・変更内容が不正) は 400、
+    order_id の注文が存在しない場合は 404 として結果に含める。
+    結果は注文ごとのステータス (200 / 400 / 404) を持つ 207 Multi-Status で返す。
+    """
+    items = batch_items(app.current_event.json_body)
+    updated_at = datetime.now().isoformat()
+
+    results: list[dict[str, Any]] = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({"index": index, "status": 400, "error": "Order must be an object"})
+            continue
+        order_id = item.get("order_id")
+        if not isinstance(order_id, str):
+            results.append({"index": index, "status": 400, "error": "order_id must be a string"})
+            continue
+        if order_id not in orders_db:
+            results.append({"index": index, "status": 404, "error": f"Order {order_id} not found"})
+            continue
+        try:
+            changes = order_changes(item, updated_at=updated_at)
+        except BadRequestError as ex:
+            results.append({"index": index, "status": 400, "error": ex.msg})
+            continue
+        results.append({"index": index, "status": 200, "order": orders_db.update(order_id, changes)})
+
+    updated = sum(1 for result in results if result["status"] == 200)
+    logger.info("Orders updated", extra={"updated_count": updated, "failed_count": len(items) - updated})
+
+    return {"results": results}, 207
 
 
 @app.delete("/orders/<order_id>")
@@ -109,7 +247,7 @@ def delete_order(order_id: str):
     if order_id not in orders_db:
         raise NotFoundError(f"Order {order_id} not found")
 
-    del orders_db[order_id]
+    orders_db.delete(order_id)
 
     return Response(
         status_code=204,
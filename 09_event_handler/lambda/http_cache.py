@@ -0,0 +1,173 @@
+import gzip
+import hashlib
+from functools import partial
+from typing import Any
+
+from aws_lambda_powertools.event_handler import CORSConfig
+from aws_lambda_powertools.event_handler.api_gateway import ResponseBuilder
+from aws_lambda_powertools.event_handler.util import extract_origin_header
+
+from routing import CompiledRestResolver
+
+# この長さ [bytes] 以上のレスポンスを gzip 圧縮する (小さいレスポンスは圧縮しても効果が薄い)
+COMPRESS_MIN_SIZE = 1024
+# 圧縮レベル (Powertools の既定値 9 より高速で、JSON では圧縮率の差がほとんどない)
+COMPRESS_LEVEL = 6
+# 圧縮結果をキャッシュするエントリ数の上限
+MAX_COMPRESSED = 256
+# ETag を付与して条件付きリクエストに応答するメソッド
+CONDITIONAL_METHODS = frozenset({"GET", "HEAD"})
+
+
+def compute_etag(payload: bytes) -> str:
+    """レスポンスのバイト列から強い ETag を計算する
+
+    改ざん検知ではなく内容の同一性判定に使うため、ハードウェア支援が効いて高速な SHA-1 を使う。
+    """
+    return '"' + hashlib.sha1(payload, usedforsecurity=False).hexdigest() + '"'
+
+
+def _opaque_tag(tag: str) -> str:
+    # If-None-Match は弱い比較 (W/ を無視) で照合する。gzip 版の ETag も同じ内容として扱う
+    tag = tag.strip().removeprefix("W/").strip('"')
+    return tag.removesuffix("-gzip")
+
+
+def etag_matches(if_none_match: str | list[str] | None, etag: str) -> bool:
+    """If-None-Match ヘッダーの値が ETag に一致するか判定する"""
+    if not if_none_match:
+        return False
+    if isinstance(if_none_match, list):
+        if_none_match = ",".join(if_none_match)
+
+    expected = _opaque_tag(etag)
+    return any(tag.strip() == "*" or _opaque_tag(tag) == expected for tag in if_none_match.split(","))
+
+
+def _accepts_gzip(accept_encoding: str | list[str] | None) -> bool:
+    if isinstance(accept_encoding, list):
+        accept_encoding = ",".join(accept_encoding)
+    return "gzip" in (accept_encoding or "")
+
+
+class ConditionalResponseBuilder(ResponseBuilder):
+    """ETag による条件付き GET とサイズしきい値付きの gzip 圧縮を行う ResponseBuilder
+
+    GET / HEAD の 200 レスポンスには、シリアライズ済みのレスポンスボディから計算した ETag を付与し、
+    If-None-Match が一致すれば本文を返さずに 304 を返す (圧縮はしないが、ETag と Vary は 200 と同じ値を返す)。
+    圧縮は compress_min_size 以上のレスポンスに対して、クライアントが gzip を受け付ける場合のみ行う。
+    ルートの compress=True はしきい値に関係なく圧縮し、Response(compress=False) は圧縮しない。
+    同じ内容のレスポンスは ETag をキーに圧縮結果を再利用する。
+    """
+
+    def __init__(
+        self,
+        *args,
+        compress_min_size: int = COMPRESS_MIN_SIZE,
+        compressed_cache: dict[str, bytes] | None = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.compress_min_size = compress_min_size
+        self.compressed_cache = compressed_cache if compressed_cache is not None else {}
+
+    def _route(self, event, cors: CORSConfig | None):
+        if self.route is None:
+            return
+        if self.route.cors:
+            self._add_cors(event, cors or CORSConfig())
+        if self.route.cache_control:
+            self._add_cache_control(self.route.cache_control)
+
+        body = self.response.body
+        if not body or not isinstance(body, (str, bytes)):
+            return
+        payload = body.encode() if isinstance(body, str) else body
+        # resolved_headers_field はアクセスのたびに辞書を生成するため一度だけ取得する
+        headers = event.resolved_headers_field
+
+        etag = None
+        if self.response.status_code == 200 and event.http_method in CONDITIONAL_METHODS:
+            etag = compute_etag(payload)
+
+        # 304 でも 200 と同じ表現 (エンコーディング) の ETag と Vary を返すため、圧縮するかどうかを先に決める
+        if self.response.compress is not None:
+            compress = self.response.compress
+        else:
+            compress = self.route.compress or len(payload) >= self.compress_min_size
+        encode = compress and _accepts_gzip(headers.get("accept-encoding"))
+
+        if compress:
+            self.response.headers["Vary"] = "Accept-Encoding"
+        if etag is not None:
+            self.response.headers["ETag"] = etag[:-1] + '-gzip"' if encode else etag
+            if etag_matches(headers.get("if-none-match"), etag):
+                self.response.status_code = 304
+                self.response.body = ""
+                return
+
+        if encode:
+            self.response.body = self._gzip(payload, etag)
+            self.response.headers["Content-Encoding"] = "gzip"
+
+    def _gzip(self, payload: bytes, etag: str | None) -> bytes:
+        compressed = self.compressed_cache.get(etag) if etag is not None else None
+        if compressed is None:
+            # mtime を固定して同じ内容からは同じバイト列を生成する
+            compressed = gzip.compress(payload, compresslevel=COMPRESS_LEVEL, mtime=0)
+            if etag is not None:
+                if len(self.compressed_cache) >= MAX_COMPRESSED:
+                    self.compressed_cache.clear()
+                self.compressed_cache[etag] = compressed
+        return compressed
+
+
+class CachingRestResolver(CompiledRestResolver):
+    """レスポンスの条件付き GET・圧縮と、CORS プリフライト応答のキャッシュを行うリゾルバー
+
+    プリフライト (OPTIONS) の応答は Origin ヘッダーから決まる許可オリジンごとにしか変わらないため、
+    一度生成した応答を保持して以降はルート解決・ミドルウェアを経由せずに返す。
+    OPTIONS ルートやミドルウェアが登録されている場合はキャッシュしない。
+    """
+
+    def __init__(self, *args, compress_min_size: int = COMPRESS_MIN_SIZE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compressed: dict[str, bytes] = {}
+        self._response_builder_class = partial(
+            ConditionalResponseBuilder,
+            compress_min_size=compress_min_size,
+            compressed_cache=self._compressed,
+        )
+        # 許可オリジン -> 生成済みのプリフライト応答
+        self._preflight_responses: dict[str | None, dict[str, Any]] = {}
+        self._preflight_table = None
+
+    def resolve(self, event: dict[str, Any], context) -> dict[str, Any]:
+        if event.get("httpMethod") != "OPTIONS" or self._cors is None or self._router_middlewares:
+            return super().resolve(event, context)
+
+        proxy_event = self._to_proxy_event(event)
+        path = self._remove_prefix(proxy_event.path)
+        table = self._compiled_routes()
+        if any(route.rule.match(path) for route in table.candidates("OPTIONS", path)):
+            return super().resolve(event, context)
+
+        # ルートが追加されると Access-Control-Allow-Methods が変わるため破棄する
+        if table is not self._preflight_table:
+            self._preflight_responses.clear()
+            self._preflight_table = table
+
+        origin = self._cors.allowed_origin(extract_origin_header(proxy_event.resolved_headers_field))
+        response = self._preflight_responses.get(origin)
+        if response is None:
+            response = self._preflight_responses[origin] = super().resolve(event, context)
+        return _copy_response(response)
+
+
+def _copy_response(response: dict[str, Any]) -> dict[str, Any]:
+    # 呼び出し側でヘッダーが変更されてもキャッシュに影響しないようにコピーする
+    copied = dict(response)
+    for key in ("headers", "multiValueHeaders"):
+        if key in copied:
+            copied[key] = {name: list(value) if isinstance(value, list) else value for name, value in copied[key].items()}
+    return copied
@@ -0,0 +1,201 @@
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Iterator
+from itertools import count, islice
+from typing import Any
+
+# セカンダリインデックスを張るフィールド
+INDEXED_FIELDS = ("status", "customer_id")
+
+
+class OrderStore:
+    """セカンダリインデックス付きのインメモリ注文ストア
+
+    注文は作成順 (シーケンス番号順) に保持し、status と customer_id について
+    シーケンス番号のソート済みリストをインデックスとして維持する。
+    絞り込み時は全件を走査せずにインデックスから必要な件数だけを取り出せる。
+    ページングのカーソルにはシーケンス番号を使い、二分探索で再開位置を求める。
+    """
+
+    def __init__(self):
+        self._orders: dict[str, dict[str, Any]] = {}
+        self._seq_by_id: dict[str, int] = {}
+        self._id_by_seq: dict[int, str] = {}
+        self._seqs: list[int] = []
+        self._sequence = count()
+        # 注文 ID -> シリアライズ済み JSON (レスポンス生成時に遅延生成し、更新・削除で破棄)
+        self._json_cache: dict[str, str] = {}
+        # フィールド名 -> 値 -> シーケンス番号のソート済みリスト
+        self._indexes: dict[str, dict[Any, list[int]]] = {field: {} for field in INDEXED_FIELDS}
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._orders
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def get(self, order_id: str) -> dict[str, Any] | None:
+        return self._orders.get(order_id)
+
+    def add(self, order: dict[str, Any]) -> None:
+        """注文を追加する (追加できない注文は ValueError。その場合ストアは変更しない)"""
+        order_id = order["order_id"]
+        _check_indexed_values(order)
+        if order_id in self._orders:
+            raise ValueError(f"Order {order_id} already exists")
+
+        seq = next(self._sequence)
+        self._orders[order_id] = order
+        self._seq_by_id[order_id] = seq
+        self._id_by_seq[seq] = order_id
+        self._seqs.append(seq)
+
+        for field in INDEXED_FIELDS:
+            self._index_add(field, order.get(field), seq)
+
+    def add_many(self, orders: list[dict[str, Any]]) -> None:
+        """複数の注文をまとめて追加する (ID の重複や不正な値の注文が 1 件でもあれば 1 件も追加しない)"""
+        for order in orders:
+            _check_indexed_values(order)
+        order_ids = [order["order_id"] for order in orders]
+        if len(set(order_ids)) != len(order_ids):
+            raise ValueError("Duplicate order_id in batch")
+        for order_id in order_ids:
+            if order_id in self._orders:
+                raise ValueError(f"Order {order_id} already exists")
+
+        for order in orders:
+            self.add(order)
+
+    def update(self, order_id: str, changes: dict[str, Any]) -> dict[str, Any]:
+        """注文を更新し、変更されたフィールドのインデックスを付け替える (不正な値は ValueError)"""
+        order = self._orders[order_id]
+        _check_indexed_values(changes)
+        seq = self._seq_by_id[order_id]
+
+        for field in INDEXED_FIELDS:
+            if field in changes and changes[field] != order.get(field):
+                self._index_remove(field, order.get(field), seq)
+                self._index_add(field, changes[field], seq)
+
+        order.update(changes)
+        self._json_cache.pop(order_id, None)
+        return order
+
+    def delete(self, order_id: str) -> None:
+        """注文を削除する"""
+        order = self._orders.pop(order_id)
+        seq = self._seq_by_id.pop(order_id)
+        del self._id_by_seq[seq]
+        del self._seqs[bisect_left(self._seqs, seq)]
+        self._json_cache.pop(order_id, None)
+
+        for field in INDEXED_FIELDS:
+            self._index_remove(field, order.get(field), seq)
+
+    def iter(self, status: str | None = None, customer_id: str | None = None) -> Iterator[dict[str, Any]]:
+        """条件に一致する注文を作成順に返す"""
+        for _, order in self._scan(status=status, customer_id=customer_id):
+            yield order
+
+    def page(
+        self,
+        limit: int,
+        status: str | None = None,
+        customer_id: str | None = None,
+        cursor: str | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """条件に一致する注文を limit 件取得し、次ページのカーソルとあわせて返す"""
+        if limit < 0:
+            raise ValueError(f"Invalid limit: {limit}")
+        after = decode_cursor(cursor) if cursor else None
+        rows = list(islice(self._scan(status=status, customer_id=customer_id, after=after), limit + 1))
+
+        next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit and limit > 0 else None
+        return [order for _, order in rows[:limit]], next_cursor
+
+    def to_json(self, order: dict[str, Any]) -> str:
+        """注文を JSON に変換する (変更されるまで結果をキャッシュする)"""
+        order_id = order["order_id"]
+        serialized = self._json_cache.get(order_id)
+        if serialized is None:
+            serialized = self._json_cache[order_id] = json.dumps(order, separators=(",", ":"))
+        return serialized
+
+    def _scan(
+        self,
+        status: str | None = None,
+        customer_id: str | None = None,
+        after: int | None = None,
+    ) -> Iterator[tuple[int, dict[str, Any]]]:
+        """条件に一致する (シーケンス番号, 注文) を作成順に返す"""
+        filters = {field: value for field, value in (("status", status), ("customer_id", customer_id)) if value}
+
+        if filters:
+            # 最も件数の少ないインデックスを走査し、残りの条件は注文ごとに確認する
+            field, value = min(filters.items(), key=lambda item: len(self._indexes[item[0]].get(item[1], ())))
+            seqs = self._indexes[field].get(value, [])
+            rest = [(f, v) for f, v in filters.items() if f != field]
+        else:
+            seqs, rest = self._seqs, []
+
+        start = bisect_right(seqs, after) if after is not None else 0
+        for index in range(start, len(seqs)):
+            seq = seqs[index]
+            order = self._orders[self._id_by_seq[seq]]
+            if all(order.get(f) == v for f, v in rest):
+                yield seq, order
+
+    def count(self, status: str | None = None, customer_id: str | None = None) -> int:
+        """条件に一致する注文数を返す (単一条件ならインデックスの件数から求める)"""
+        if status and customer_id:
+            return sum(1 for _ in self.iter(status=status, customer_id=customer_id))
+        if status:
+            return len(self._indexes["status"].get(status, ()))
+        if customer_id:
+            return len(self._indexes["customer_id"].get(customer_id, ()))
+        return len(self._orders)
+
+    def _index_add(self, field: str, value: Any, seq: int) -> None:
+        if value is None:
+            return
+        insort(self._indexes[field].setdefault(value, []), seq)
+
+    def _index_remove(self, field: str, value: Any, seq: int) -> None:
+        if value is None:
+            return
+        seqs = self._indexes[field][value]
+        del seqs[bisect_left(seqs, seq)]
+        if not seqs:
+            del self._indexes[field][value]
+
+
+def _check_indexed_values(values: dict[str, Any]) -> None:
+    """インデックスを張るフィールドの値を確認する (文字列か None 以外は ValueError)
+
+    状態を変更する前に呼び出し、インデックスの更新の途中で失敗しないようにする。
+    """
+    if not isinstance(values.get("order_id", ""), str):
+        raise ValueError("order_id must be a string")
+    for field in INDEXED_FIELDS:
+        value = values.get(field)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{field} must be a string")
+
+
+def encode_cursor(seq: int) -> str:
+    """シーケンス番号を不透明なカーソル文字列に変換する"""
+    return base64.urlsafe_b64encode(str(seq).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """カーソル文字列をシーケンス番号に戻す (不正なカーソルは ValueError)"""
+    try:
+        seq = int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+    if seq < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return seq
@@ -0,0 +1,118 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+from aws_lambda_powertools.event_handler import APIGatewayRestResolver
+from aws_lambda_powertools.event_handler.api_gateway import ResponseBuilder
+
+# 動的セグメント (<order_id> など) のみで構成されるセグメント
+_PARAM_SEGMENT = re.compile(r"^<\w+>$")
+# 正規表現のメタ文字・動的セグメントを含まない静的セグメント
+_STATIC_SEGMENT = re.compile(r"^[^.^$*+?{}\[\]\\|()<>]*$")
+
+
+def _split(path: str) -> list[str]:
+    """パスをセグメントに分割する (REST API のリゾルバーは末尾の "/" を無視する)"""
+    return path.rstrip("/").split("/")[1:]
+
+
+@dataclass
+class _Node:
+    """ルート Trie のノード"""
+
+    static: dict[str, "_Node"] = field(default_factory=dict)
+    param: "_Node | None" = None
+    routes: list[Any] = field(default_factory=list)
+
+
+class RouteTable:
+    """登録済みルートをメソッドごとの Trie にコンパイルしたルートテーブル
+
+    静的セグメントは辞書で、動的セグメントはワイルドカードの子ノードでたどり、
+    パスに一致し得るルートだけを候補として返す。
+    静的セグメントと動的セグメントが混在するもの (<id>.json など) や正規表現を含むルートは
+    Trie に載せず、常に候補に含める (正規表現によるフォールバック)。
+
+    候補は元の評価順 (静的ルート → 動的ルート、それぞれ登録順) で返すため、
+    各候補を route.rule で照合すれば APIGatewayRestResolver と同じルートが選ばれる。
+    """
+
+    def __init__(self, routes: list[Any]):
+        self._order = {id(route): position for position, route in enumerate(routes)}
+        self._roots: dict[str, _Node] = {}
+        self._fallback: dict[str, list[Any]] = {}
+
+        for route in routes:
+            segments = _split(route.path)
+            if not all(_PARAM_SEGMENT.match(s) or _STATIC_SEGMENT.match(s) for s in segments):
+                self._fallback.setdefault(route.method, []).append(route)
+                continue
+
+            node = self._roots.setdefault(route.method, _Node())
+            for segment in segments:
+                if _PARAM_SEGMENT.match(segment):
+                    node.param = node.param or _Node()
+                    node = node.param
+                else:
+                    node = node.static.setdefault(segment, _Node())
+            node.routes.append(route)
+
+    def candidates(self, method: str, path: str) -> list[Any]:
+        """パスに一致し得るルートを評価順に返す"""
+        matched: list[Any] = list(self._fallback.get(method, ()))
+
+        root = self._roots.get(method)
+        if root is not None:
+            segments = _split(path)
+            stack = [(root, 0)]
+            while stack:
+                node, depth = stack.pop()
+                if depth == len(segments):
+                    matched.extend(node.routes)
+                    continue
+                child = node.static.get(segments[depth])
+                if child is not None:
+                    stack.append((child, depth + 1))
+                if node.param is not None and segments[depth]:
+                    stack.append((node.param, depth + 1))
+
+        if len(matched) > 1:
+            matched.sort(key=lambda route: self._order[id(route)])
+        return matched
+
+
+class CompiledRestResolver(APIGatewayRestResolver):
+    """ルート解決に RouteTable を使う APIGatewayRestResolver
+
+    標準のリゾルバーは登録済みの全ルートを正規表現で順に照合するため、
+    ルート数に比例して解決コストが増える。ルートテーブルは最初の解決時にコンパイルし、
+    ルートが追加された場合は再コンパイルする。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._route_table: RouteTable | None = None
+        self._route_table_size = (0, 0)
+
+    def _compiled_routes(self) -> RouteTable:
+        size = (len(self._static_routes), len(self._dynamic_routes))
+        if self._route_table is None or size != self._route_table_size:
+            self._route_table = RouteTable(self._static_routes + self._dynamic_routes)
+            self._route_table_size = size
+        return self._route_table
+
+    def _resolve(self) -> ResponseBuilder:
+        """ルートテーブルで候補を絞り込んでからルートを照合する"""
+        method = self.current_event.http_method.upper()
+        path = self._remove_prefix(self.current_event.path)
+
+        for route in self._compiled_routes().candidates(method, path):
+            match_results = route.rule.match(path)
+            if match_results:
+                # 一致したルートをリゾルバーのコンテキストに追加 (標準のリゾルバーと同じ)
+                self.append_context(_route=route, _path=path)
+
+                route_keys = self._convert_matches_into_route_keys(match_results)
+                return self._call_route(route, route_keys)
+
+        return self._handle_not_found(method=method, path=path)
@@ -0,0 +1,32 @@
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+# Lambda 関数のモジュール (lambda/ 配下) をテストから import できるようにする
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lambda"))
+
+
+def build_rest_event(method: str, path: str, headers: dict[str, str] | None = None, body: Any = None) -> dict:
+    """API Gateway REST (プロキシ統合) のイベントを生成する"""
+    headers = {"Origin": "https://example.com", **(headers or {})}
+    return {
+        "resource": path,
+        "path": path,
+        "httpMethod": method,
+        "headers": headers,
+        "multiValueHeaders": {name: [value] for name, value in headers.items()},
+        "queryStringParameters": None,
+        "multiValueQueryStringParameters": None,
+        "pathParameters": None,
+        "requestContext": {"stage": "prod", "requestId": "request-id", "httpMethod": method, "path": path},
+        "body": body if body is None or isinstance(body, str) else json.dumps(body),
+        "isBase64Encoded": False,
+    }
+
+
+@pytest.fixture
+def rest_event():
+    return build_rest_event
@@ -0,0 +1,153 @@
+import json
+
+import pytest
+
+import function
+from order_store import OrderStore
+
+
+@pytest.fixture(autouse=True)
+def orders_db(monkeypatch) -> OrderStore:
+    store = OrderStore()
+    monkeypatch.setattr(function, "orders_db", store)
+    return store
+
+
+@pytest.fixture
+def call(rest_event):
+    def call(method: str, path: str, body=None) -> tuple[int, dict]:
+        response = function.app.resolve(rest_event(method, path, body=body), {})
+        return response["statusCode"], json.loads(response["body"]) if response["body"] else None
+
+    return call
+
+
+def item(product_id: str = "P1", customer_id: str = "C1", quantity: int = 1) -> dict:
+    return {"product_id": product_id, "quantity": quantity, "customer_id": customer_id}
+
+
+def test_batch_create_returns_multi_status(call, orders_db):
+    status, body = call("POST", "/orders:batch", {"orders": [item(), {"product_id": "P2"}, "invalid", item("P3")]})
+
+    assert status == 207
+    assert [result["status"] for result in body["results"]] == [201, 400, 400, 201]
+    assert [result["index"] for result in body["results"]] == [0, 1, 2, 3]
+    assert body["results"][1]["error"] == "Missing required fields"
+    assert [order["product_id"] for order in orders_db.iter()] == ["P1", "P3"]
+
+
+@pytest.mark.parametrize(
+    ("invalid", "error"),
+    [
+        (item(customer_id={"a": 1}), "customer_id must be a string"),
+        (item(product_id=["P2"]), "product_id must be a string"),
+        (item(quantity="2"), "quantity must be a positive integer"),
+        (item(quantity=0), "quantity must be a positive integer"),
+        (item(quantity=True), "quantity must be a positive integer"),
+    ],
+)
+def test_batch_create_reports_invalid_types_per_item(call, orders_db, invalid, error):
+    orders_db.add({"order_id": "existing", **item()})
+
+    status, body = call("POST", "/orders:batch", {"orders": [item("P1"), invalid, item("P3")]})
+
+    assert status == 207
+    assert [result["status"] for result in body["results"]] == [201, 400, 201]
+    assert body["results"][1]["error"] == error
+    assert [order["product_id"] for order in orders_db.iter()] == ["P1", "P1", "P3"]
+
+
+def test_single_create_rejects_invalid_types(call, orders_db):
+    status, body = call("POST", "/orders", item(customer_id={"a": 1}))
+
+    assert status == 400
+    assert body["message"] == "customer_id must be a string"
+    assert len(orders_db) == 0
+
+
+def test_batch_created_orders_are_readable(call):
+    _, body = call("POST", "/orders:batch", {"orders": [item(), item("P2")]})
+    order = body["results"][1]["order"]
+
+    status, fetched = call("GET", f"/orders/{order['order_id']}")
+
+    assert status == 200
+    assert fetched == {"order": order}
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"orders": []},
+        {"orders": "not-a-list"},
+        {"items": [{}]},
+        [item()],
+        {"orders": [item()] * (function.MAX_BATCH_SIZE + 1)},
+    ],
+)
+def test_batch_rejects_invalid_envelope(call, orders_db, body):
+    status, _ = call("POST", "/orders:batch", body)
+
+    assert status == 400
+    assert len(orders_db) == 0
+
+
+def test_batch_update_returns_multi_status(call, orders_db):
+    _, body = call("POST", "/orders:batch", {"orders": [item(), item("P2")]})
+    first, second = (result["order"]["order_id"] for result in body["results"])
+
+    status, body = call(
+        "PUT",
+        "/orders:batch",
+        {
+            "orders": [
+                {"order_id": first, "status": "shipped"},
+                {"order_id": second, "status": 1},
+                {"order_id": "missing", "status": "shipped"},
+                {"status": "shipped"},
+            ]
+        },
+    )
+
+    assert status == 207
+    assert [result["status"] for result in body["results"]] == [200, 400, 404, 400]
+    assert body["results"][0]["order"]["status"] == "shipped"
+    assert [order["order_id"] for order in orders_db.iter(status="shipped")] == [first]
+    assert orders_db.get(second)["status"] == "pending"
+
+
+def test_batch_update_rejects_malformed_items_with_400(call):
+    _, body = call("POST", "/orders:batch", {"orders": [item()]})
+    order_id = body["results"][0]["order"]["order_id"]
+
+    status, body = call(
+        "PUT",
+        "/orders:batch",
+        {
+            "orders": [
+                "invalid",
+                {"status": "shipped"},
+                {"order_id": 1, "status": "shipped"},
+                {"order_id": [order_id], "status": "shipped"},
+                {"order_id": "missing", "status": "shipped"},
+                {"order_id": order_id, "status": "shipped"},
+            ]
+        },
+    )
+
+    assert status == 207
+    assert [(result["status"], result.get("error")) for result in body["results"]] == [
+        (400, "Order must be an object"),
+        (400, "order_id must be a string"),
+        (400, "order_id must be a string"),
+        (400, "order_id must be a string"),
+        (404, "Order missing not found"),
+        (200, None),
+    ]
+
+
+def test_single_create_still_validates_required_fields(call):
+    status, body = call("POST", "/orders", {"product_id": "P1"})
+
+    assert status == 400
+    assert body["message"] == "Missing required fields"
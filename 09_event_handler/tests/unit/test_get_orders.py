@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+import function
+from order_store import OrderStore
+
+
+@pytest.fixture(autouse=True)
+def orders_db(monkeypatch) -> OrderStore:
+    store = OrderStore()
+    for index in range(3):
+        store.add({"order_id": f"o{index}", "product_id": "P1", "quantity": 1, "customer_id": "C1", "status": "pending"})
+    monkeypatch.setattr(function, "orders_db", store)
+    return store
+
+
+@pytest.fixture
+def get_orders(rest_event):
+    def get_orders(**query) -> tuple[int, dict]:
+        event = rest_event("GET", "/orders")
+        event["queryStringParameters"] = query
+        event["multiValueQueryStringParameters"] = {name: [value] for name, value in query.items()}
+        response = function.app.resolve(event, {})
+        return response["statusCode"], json.loads(response["body"])
+
+    return get_orders
+
+
+def test_limit_returns_page(get_orders):
+    status, body = get_orders(limit="2")
+
+    assert status == 200
+    assert [order["order_id"] for order in body["orders"]] == ["o0", "o1"]
+    assert body["count"] == 3
+    assert body["next_cursor"]
+
+
+@pytest.mark.parametrize("limit", ["-1", "abc", "1.5", "", "１"])
+def test_invalid_limit_returns_400(get_orders, limit):
+    status, body = get_orders(limit=limit)
+
+    assert status == 400
+    assert body == {"error": f"Invalid limit: {limit}"}
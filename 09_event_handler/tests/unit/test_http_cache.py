@@ -0,0 +1,182 @@
+import base64
+import gzip
+import json
+
+import pytest
+from aws_lambda_powertools.event_handler import CORSConfig, Response, content_types
+
+from http_cache import CachingRestResolver, compute_etag, etag_matches
+
+LARGE = {"items": [{"id": i, "name": f"item-{i}"} for i in range(200)]}
+SMALL = {"id": 1}
+
+
+def header(response: dict, name: str) -> str | None:
+    values = response["multiValueHeaders"].get(name)
+    return values[0] if values else None
+
+
+def decoded_body(response: dict) -> bytes:
+    body = response["body"]
+    return base64.b64decode(body) if response["isBase64Encoded"] else body.encode()
+
+
+@pytest.fixture
+def app():
+    app = CachingRestResolver(cors=CORSConfig(allow_origin="https://example.com", max_age=300), compress_min_size=1024)
+
+    @app.get("/large")
+    def large():
+        return LARGE
+
+    @app.get("/small")
+    def small():
+        return SMALL
+
+    @app.get("/uncompressed")
+    def uncompressed():
+        return Response(200, content_types.APPLICATION_JSON, json.dumps(LARGE), compress=False)
+
+    @app.post("/large")
+    def create():
+        return LARGE, 201
+
+    return app
+
+
+def test_large_response_is_compressed_when_gzip_is_accepted(app, rest_event):
+    response = app.resolve(rest_event("GET", "/large", {"Accept-Encoding": "gzip, br"}), {})
+
+    assert header(response, "Content-Encoding") == "gzip"
+    assert header(response, "Vary") == "Accept-Encoding"
+    assert json.loads(gzip.decompress(decoded_body(response))) == LARGE
+
+
+def test_large_response_is_not_compressed_without_accept_encoding(app, rest_event):
+    response = app.resolve(rest_event("GET", "/large"), {})
+
+    assert header(response, "Content-Encoding") is None
+    assert header(response, "Vary") == "Accept-Encoding"
+    assert json.loads(response["body"]) == LARGE
+
+
+@pytest.mark.parametrize("path", ["/small", "/uncompressed"])
+def test_small_or_opted_out_response_is_not_compressed(app, path, rest_event):
+    response = app.resolve(rest_event("GET", path, {"Accept-Encoding": "gzip"}), {})
+
+    assert header(response, "Content-Encoding") is None
+    assert response["isBase64Encoded"] is False
+
+
+def test_etag_is_computed_from_response_bytes(app, rest_event):
+    response = app.resolve(rest_event("GET", "/small"), {})
+
+    assert header(response, "ETag") == compute_etag(response["body"].encode())
+
+
+def test_matching_if_none_match_returns_304_without_body(app, rest_event):
+    etag = header(app.resolve(rest_event("GET", "/large"), {}), "ETag")
+
+    response = app.resolve(rest_event("GET", "/large", {"If-None-Match": etag}), {})
+
+    assert response["statusCode"] == 304
+    assert response["body"] == ""
+    assert header(response, "ETag") == etag
+    assert header(response, "Access-Control-Allow-Origin") == "https://example.com"
+
+
+def test_gzip_etag_differs_but_still_matches(app, rest_event):
+    plain = header(app.resolve(rest_event("GET", "/large"), {}), "ETag")
+    compressed = header(app.resolve(rest_event("GET", "/large", {"Accept-Encoding": "gzip"}), {}), "ETag")
+
+    assert compressed == plain[:-1] + '-gzip"'
+    response = app.resolve(rest_event("GET", "/large", {"If-None-Match": compressed}), {})
+    assert response["statusCode"] == 304
+
+
+@pytest.mark.parametrize("path", ["/large", "/small"])
+@pytest.mark.parametrize("accept_encoding", [{"Accept-Encoding": "gzip"}, {}])
+def test_304_has_same_etag_and_vary_as_200(app, rest_event, path, accept_encoding):
+    full = app.resolve(rest_event("GET", path, accept_encoding), {})
+    etag = header(full, "ETag")
+
+    not_modified = app.resolve(rest_event("GET", path, {**accept_encoding, "If-None-Match": etag}), {})
+
+    assert (full["statusCode"], not_modified["statusCode"]) == (200, 304)
+    assert header(not_modified, "ETag") == etag
+    assert header(not_modified, "Vary") == header(full, "Vary")
+    assert header(not_modified, "Content-Encoding") is None
+
+
+def test_stale_if_none_match_returns_full_response(app, rest_event):
+    response = app.resolve(rest_event("GET", "/small", {"If-None-Match": '"stale"'}), {})
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == SMALL
+
+
+def test_non_get_responses_have_no_etag(app, rest_event):
+    response = app.resolve(rest_event("POST", "/large", {"If-None-Match": "*"}), {})
+
+    assert response["statusCode"] == 201
+    assert header(response, "ETag") is None
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected",
+    [
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"xyz", "abc-gzip"', True),
+        (["\"xyz\"", "\"abc\""], True),
+        ("*", True),
+        ('"xyz"', False),
+        (None, False),
+        ("", False),
+    ],
+)
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches(if_none_match, '"abc"') is expected
+
+
+def test_preflight_response_is_cached_per_allowed_origin(app, monkeypatch, rest_event):
+    calls = []
+    original = CachingRestResolver._resolve
+    monkeypatch.setattr(CachingRestResolver, "_resolve", lambda self: calls.append(1) or original(self))
+
+    first = app.resolve(rest_event("OPTIONS", "/large"), {})
+    second = app.resolve(rest_event("OPTIONS", "/small"), {})
+    other = app.resolve(rest_event("OPTIONS", "/large", {"Origin": "https://evil.example"}), {})
+
+    assert len(calls) == 2
+    assert first == second
+    assert first["statusCode"] == 204
+    assert header(first, "Access-Control-Allow-Origin") == "https://example.com"
+    assert header(first, "Access-Control-Allow-Methods") == "GET,OPTIONS,POST"
+    assert header(other, "Access-Control-Allow-Origin") is None
+
+
+def test_cached_preflight_is_not_shared_with_callers(app, rest_event):
+    first = app.resolve(rest_event("OPTIONS", "/large"), {})
+    first["multiValueHeaders"]["Access-Control-Max-Age"].append("0")
+
+    second = app.resolve(rest_event("OPTIONS", "/large"), {})
+
+    assert second["multiValueHeaders"]["Access-Control-Max-Age"] == ["300"]
+
+
+def test_preflight_cache_is_rebuilt_when_routes_are_added(app, rest_event):
+    app.resolve(rest_event("OPTIONS", "/large"), {})
+
+    app.delete("/large")(lambda: {})
+    response = app.resolve(rest_event("OPTIONS", "/large"), {})
+
+    assert header(response, "Access-Control-Allow-Methods") == "DELETE,GET,OPTIONS,POST"
+
+
+def test_registered_options_route_bypasses_preflight_cache(app, rest_event):
+    app.route("/custom", method="OPTIONS")(lambda: {"custom": True})
+
+    response = app.resolve(rest_event("OPTIONS", "/custom"), {})
+
+    assert json.loads(response["body"]) == {"custom": True}
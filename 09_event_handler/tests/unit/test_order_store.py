@@ -0,0 +1,148 @@
+from itertools import islice
+
+import pytest
+
+from order_store import OrderStore
+
+
+def make_order(order_id: str, status: str = "pending", customer_id: str = "C1") -> dict:
+    return {"order_id": order_id, "product_id": "P1", "quantity": 1, "customer_id": customer_id, "status": status}
+
+
+@pytest.fixture
+def store() -> OrderStore:
+    store = OrderStore()
+    store.add(make_order("o1", customer_id="C1"))
+    store.add(make_order("o2", customer_id="C2"))
+    store.add(make_order("o3", status="shipped", customer_id="C1"))
+    store.add(make_order("o4", customer_id="C1"))
+    return store
+
+
+def ids(orders) -> list[str]:
+    return [order["order_id"] for order in orders]
+
+
+def test_iter_filters_in_creation_order(store):
+    assert ids(store.iter()) == ["o1", "o2", "o3", "o4"]
+    assert ids(store.iter(status="pending")) == ["o1", "o2", "o4"]
+    assert ids(store.iter(customer_id="C1")) == ["o1", "o3", "o4"]
+    assert ids(store.iter(status="pending", customer_id="C1")) == ["o1", "o4"]
+    assert ids(islice(store.iter(status="pending"), 2)) == ["o1", "o2"]
+
+
+def test_update_moves_order_between_indexes(store):
+    store.update("o4", {"status": "shipped"})
+    store.update("o1", {"status": "shipped", "quantity": 3})
+
+    # インデックスを付け替えても作成順は維持される
+    assert ids(store.iter(status="shipped")) == ["o1", "o3", "o4"]
+    assert ids(store.iter(status="pending")) == ["o2"]
+    assert store.get("o1")["quantity"] == 3
+
+
+def test_delete_removes_from_indexes(store):
+    store.delete("o1")
+    store.delete("o2")
+
+    assert "o1" not in store
+    assert ids(store.iter(status="pending")) == ["o4"]
+    assert store.count(status="pending") == 1
+    assert store.count(customer_id="C2") == 0
+
+
+def test_count_matches_iteration(store):
+    for status, customer_id in [(None, None), ("pending", None), (None, "C1"), ("pending", "C1"), ("cancelled", None)]:
+        expected = len(list(store.iter(status=status, customer_id=customer_id)))
+        assert store.count(status=status, customer_id=customer_id) == expected
+
+
+def test_add_rejects_duplicate_order_id(store):
+    with pytest.raises(ValueError):
+        store.add(make_order("o1"))
+
+
+@pytest.mark.parametrize("field", ["order_id", "status", "customer_id"])
+def test_add_rejects_non_string_indexed_value_without_changing_store(store, field):
+    order = make_order("o5")
+    order[field] = {"a": 1}
+
+    with pytest.raises(ValueError, match=f"{field} must be a string"):
+        store.add(order)
+
+    assert len(store) == 4
+    assert ids(store.iter()) == ["o1", "o2", "o3", "o4"]
+    assert store.count(status="pending") == 3
+    assert store.count(customer_id="C1") == 3
+    # 失敗した後も削除・絞り込みができる
+    store.delete("o4")
+    assert ids(store.iter(status="pending", customer_id="C1")) == ["o1"]
+
+
+def test_update_rejects_non_string_indexed_value(store):
+    with pytest.raises(ValueError):
+        store.update("o1", {"status": ["shipped"]})
+
+    assert store.get("o1")["status"] == "pending"
+    assert ids(store.iter(status="pending")) == ["o1", "o2", "o4"]
+
+
+def test_add_many_appends_in_order(store):
+    store.add_many([make_order("o5", status="shipped"), make_order("o6")])
+
+    assert ids(store.iter()) == ["o1", "o2", "o3", "o4", "o5", "o6"]
+    assert ids(store.iter(status="shipped")) == ["o3", "o5"]
+
+
+@pytest.mark.parametrize("batch", [["o5", "o1"], ["o5", "o5"], ["o5", "o6", "invalid"]])
+def test_add_many_is_all_or_nothing(store, batch):
+    orders = [make_order(order_id) for order_id in batch]
+    if batch[-1] == "invalid":
+        orders[-1]["customer_id"] = {"a": 1}
+
+    with pytest.raises(ValueError):
+        store.add_many(orders)
+
+    assert "o5" not in store
+    assert len(store) == 4
+
+
+def test_page_walks_all_orders_with_cursor(store):
+    pages = []
+    cursor = None
+    while True:
+        orders, cursor = store.page(limit=2, status="pending", cursor=cursor)
+        pages.append(ids(orders))
+        if cursor is None:
+            break
+
+    assert pages == [["o1", "o2"], ["o4"]]
+
+
+def test_page_cursor_survives_deleted_order(store):
+    _, cursor = store.page(limit=2)
+    store.delete("o2")
+
+    orders, next_cursor = store.page(limit=2, cursor=cursor)
+
+    assert ids(orders) == ["o3", "o4"]
+    assert next_cursor is None
+
+
+def test_page_rejects_negative_limit(store):
+    with pytest.raises(ValueError, match="Invalid limit"):
+        store.page(limit=-1)
+
+
+def test_page_rejects_invalid_cursor(store):
+    with pytest.raises(ValueError):
+        store.page(limit=2, cursor="not-a-cursor")
+
+
+def test_to_json_cache_is_invalidated_on_update(store):
+    order = store.get("o1")
+    assert '"status":"pending"' in store.to_json(order)
+
+    store.update("o1", {"status": "shipped"})
+
+    assert '"status":"shipped"' in store.to_json(order)
@@ -0,0 +1,112 @@
+import inspect
+
+import pytest
+from aws_lambda_powertools.event_handler import APIGatewayRestResolver
+from aws_lambda_powertools.event_handler.api_gateway import ResponseBuilder
+
+from routing import CompiledRestResolver, RouteTable
+
+RULES = [
+    ("GET", "/"),
+    ("GET", "/orders"),
+    ("POST", "/orders"),
+    ("GET", "/orders/<order_id>"),
+    ("PUT", "/orders/<order_id>"),
+    ("GET", "/orders/summary"),
+    ("GET", "/orders/<order_id>/items/<item_id>"),
+    ("GET", "/order-items/<item_id>"),
+    ("GET", "/files/<name>.json"),
+    ("GET", "/proxy/.+"),
+]
+
+PATHS = [
+    "/",
+    "/orders",
+    "/orders/",
+    "/orders//",
+    "/orders/summary",
+    "/orders/ORD-1",
+    "/orders/ORD-1/items/2",
+    "/orders/ORD-1/items",
+    "/order-items/abc",
+    "/files/report.json",
+    "/files/report.csv",
+    "/proxy/a/b/c",
+    "/unknown",
+]
+
+
+def build_app(resolver_class: type[APIGatewayRestResolver]) -> APIGatewayRestResolver:
+    app = resolver_class()
+    for method, rule in RULES:
+        app.route(rule=rule, method=method)(lambda **kwargs: kwargs)
+    return app
+
+
+def linear_lookup(routes: list, method: str, path: str):
+    for route in routes:
+        if method == route.method and route.rule.match(path):
+            return route
+    return None
+
+
+@pytest.mark.parametrize("method", ["GET", "POST", "PUT", "DELETE"])
+@pytest.mark.parametrize("path", PATHS)
+def test_route_table_matches_linear_scan(method, path):
+    app = build_app(APIGatewayRestResolver)
+    routes = app._static_routes + app._dynamic_routes
+    table = RouteTable(routes)
+
+    compiled = next((route for route in table.candidates(method, path) if route.rule.match(path)), None)
+
+    assert compiled is linear_lookup(routes, method, path)
+
+
+def test_static_route_wins_over_dynamic_route():
+    app = build_app(CompiledRestResolver)
+    table = app._compiled_routes()
+
+    (first, *_) = table.candidates("GET", "/orders/summary")
+
+    assert first.path == "/orders/summary"
+
+
+def test_route_table_is_recompiled_when_routes_are_added():
+    app = build_app(CompiledRestResolver)
+    assert "/customers" not in [route.path for route in app._compiled_routes().candidates("GET", "/customers")]
+
+    app.get("/customers")(lambda: {})
+
+    assert "/customers" in [route.path for route in app._compiled_routes().candidates("GET", "/customers")]
+
+
+# CompiledRestResolver / CachingRestResolver / ConditionalResponseBuilder が依存する Powertools の内部 API
+# (メソッド名 -> 引数名)。Powertools の更新で変わった場合はここで失敗させる
+RESOLVER_INTERNALS = {
+    "_resolve": [],
+    "_call_route": ["route", "route_arguments"],
+    "_remove_prefix": ["path"],
+    "_convert_matches_into_route_keys": ["match"],
+    "_handle_not_found": ["method", "path"],
+    "_to_proxy_event": ["event"],
+}
+RESPONSE_BUILDER_INTERNALS = {
+    "_route": ["self", "event", "cors"],
+    "_add_cors": ["self", "event", "cors"],
+    "_add_cache_control": ["self", "cache_control"],
+}
+
+
+def test_powertools_internals_used_by_resolvers_are_unchanged():
+    app = build_app(APIGatewayRestResolver)
+
+    for name, parameters in RESOLVER_INTERNALS.items():
+        assert list(inspect.signature(getattr(app, name)).parameters) == parameters, name
+    for name, parameters in RESPONSE_BUILDER_INTERNALS.items():
+        assert list(inspect.signature(getattr(ResponseBuilder, name)).parameters) == parameters, name
+    assert callable(app.append_context)
+    assert hasattr(app, "_cors")
+
+    # 動的セグメントを含まないルートと含むルートは、別々のリストに登録順で保持される
+    assert [(route.method, route.path) for route in app._static_routes] == [rule for rule in RULES if "<" not in rule[1]]
+    assert [(route.method, route.path) for route in app._dynamic_routes] == [rule for rule in RULES if "<" in rule[1]]
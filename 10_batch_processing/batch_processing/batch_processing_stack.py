@@ -49,12 +49,19 @@ class BatchProcessingStack(Stack):
             environment={
                 "POWERTOOLS_SERVICE_NAME": "order-processor",
                 "POWERTOOLS_LOG_LEVEL": "INFO",
+                "POWERTOOLS_METRICS_NAMESPACE": "OrderProcessing",
+                "BATCH_MAX_WORKERS": "4",
+                # 残り時間がこれを下回ったら新しいレコードの処理を開始しない
+                "BATCH_DEADLINE_MARGIN_MS": "1000",
+                # 処理済みのメッセージと本文が同じメッセージを重複として扱う期間 (秒)
+                "BATCH_DEDUP_WINDOW_SECONDS": "60",
             },
             log_retention=logs.RetentionDays.ONE_WEEK,
             tracing=_lambda.Tracing.ACTIVE,
         )
 
         # SQS イベントソースマッピング (ReportBatchItemFailures 有効)
+        # batch_size / max_batching_window は RecommendedBatchSize / RecommendedBatchingWindow メトリクスを参考に調整する
         function.add_event_source(
             event_sources.SqsEventSource(
                 queue,
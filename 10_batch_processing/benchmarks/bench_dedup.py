@@ -0,0 +1,97 @@
+"""バッチ内の重複メッセージ排除のスループット計測
+
+一部のレコードが同じバッチ内の先行レコードと本文が同じ (メッセージ ID は異なる) SQS イベントを生成し、
+ThreadedBatchProcessor の deduplicate=False / True で 1 秒あたりの処理レコード数と
+record_handler の呼び出し回数を比較する。
+record_handler は lambda/function.py のもの (本文の JSON パースとバリデーション) に
+I/O 待ち (time.sleep) を加えたもの。
+バッチ間の重複を計測に含めないよう、バッチごとに異なる注文番号のイベントを使う。
+
+使い方:
+    python benchmarks/bench_dedup.py [--batches 200] [--batch-size 100] [--duplicate-ratio 0.3] [--latency-ms 1]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aws_lambda_powertools.utilities.batch import EventType, process_partial_response  # noqa: E402
+
+import function  # noqa: E402
+from events import FakeLambdaContext, sqs_event  # noqa: E402
+from processors import ThreadedBatchProcessor  # noqa: E402
+
+
+def counting_handler(latency: float, calls: list):
+    def record_handler(record):
+        calls.append(1)
+        if latency:
+            time.sleep(latency)  # DB 書き込みなどの I/O 待ちを模擬
+        return function.record_handler(record)
+
+    return record_handler
+
+
+def run(events: list[dict], processor: ThreadedBatchProcessor, latency: float) -> tuple[float, int, int]:
+    """(records/sec, record_handler の呼び出し回数, 失敗として報告したレコード数) を返す"""
+    calls: list = []
+    handler = counting_handler(latency, calls)
+    context = FakeLambdaContext()
+    failures = 0
+
+    start = time.perf_counter()
+    for event in events:
+        response = process_partial_response(event, handler, processor, context)
+        failures += len(response["batchItemFailures"])
+    elapsed = time.perf_counter() - start
+    return sum(len(event["Records"]) for event in events) / elapsed, len(calls), failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3)
+    parser.add_argument("--failure-ratio", type=float, default=0.05)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    function.logger.registered_handler.setStream(open(os.devnull, "w"))
+
+    events = [
+        sqs_event(
+            args.batch_size,
+            failure_ratio=args.failure_ratio,
+            seed=batch,
+            start=batch * args.batch_size,
+            duplicate_ratio=args.duplicate_ratio,
+        )
+        for batch in range(args.batches)
+    ]
+    records = args.batches * args.batch_size
+
+    print(
+        f"batches={args.batches} batch_size={args.batch_size} duplicate_ratio={args.duplicate_ratio} "
+        f"latency={args.latency_ms}ms workers={args.workers}"
+    )
+    print(f"{'dedup':<8}{'records/sec':>12}{'speedup':>9}{'handler calls':>15}{'failures':>10}")
+
+    baseline = None
+    for deduplicate in (False, True):
+        processor = ThreadedBatchProcessor(
+            EventType.SQS, max_workers=args.workers, deduplicate=deduplicate, dedup_window_seconds=0
+        )
+        throughput, calls, failures = run(events, processor, args.latency_ms / 1000)
+        baseline = baseline or throughput
+        print(
+            f"{'on' if deduplicate else 'off':<8}{throughput:>12.0f}{throughput / baseline:>8.2f}x"
+            f"{calls:>9} ({calls / records:>4.0%}){failures:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
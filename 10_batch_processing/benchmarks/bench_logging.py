@@ -0,0 +1,112 @@
+"""バッチごとのログ量と CPU 時間の計測
+
+レコードごとに 2 行のログを出力する従来の record_handler と、
+ThreadedBatchProcessor の summary_logger によるバッチ単位のサマリーログ
+(失敗したレコードのみ個別に出力) を比較する。
+ログは実際に JSON へ整形してからバイト数を数える。CPU 時間は time.process_time で計測する。
+
+使い方:
+    python benchmarks/bench_logging.py [--batches 2000] [--batch-size 10] [--failure-ratio 0.05]
+"""
+import argparse
+import io
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aws_lambda_powertools import Logger  # noqa: E402
+from aws_lambda_powertools.utilities.batch import (  # noqa: E402
+    BatchProcessor,
+    EventType,
+    process_partial_response,
+)
+from aws_lambda_powertools.utilities.batch.exceptions import BatchProcessingError  # noqa: E402
+
+import function  # noqa: E402
+from events import FakeLambdaContext, sqs_event  # noqa: E402
+from processors import ThreadedBatchProcessor  # noqa: E402
+
+
+class CountingStream(io.TextIOBase):
+    """書き込まれたバイト数だけを数えるストリーム"""
+
+    def __init__(self):
+        self.bytes = 0
+        self.lines = 0
+
+    def write(self, text: str) -> int:
+        self.bytes += len(text.encode())
+        self.lines += text.count("\n")
+        return len(text)
+
+
+def per_record_handler(logger: Logger):
+    """従来の record_handler (レコードごとに処理開始・完了のログを出力)"""
+
+    @function.tracer.capture_method
+    def record_handler(record):
+        payload: dict[str, Any] = record.json_body
+
+        logger.info("Processing order", extra={"order": payload})
+
+        if "order_id" not in payload:
+            raise ValueError("Missing order_id")
+
+        order_id = payload["order_id"]
+        quantity = payload.get("quantity", 0)
+        if quantity <= 0:
+            raise ValueError(f"Invalid quantity for order {order_id}")
+
+        logger.info(
+            "Order processed successfully",
+            extra={"order_id": order_id, "product_id": payload.get("product_id"), "quantity": quantity},
+        )
+        return {"order_id": order_id, "status": "processed"}
+
+    return record_handler
+
+
+def run(events: list[dict], handler, processor) -> float:
+    """全バッチを処理し、バッチあたりの CPU 時間 [us] を返す"""
+    context = FakeLambdaContext()
+    start = time.process_time()
+    for event in events:
+        try:
+            process_partial_response(event, handler, processor, context)
+        except BatchProcessingError:
+            pass
+    return (time.process_time() - start) / len(events) * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batches", type=int, default=2_000)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--failure-ratio", type=float, default=0.05)
+    args = parser.parse_args()
+
+    events = [
+        sqs_event(args.batch_size, failure_ratio=args.failure_ratio, seed=batch, start=batch * args.batch_size)
+        for batch in range(args.batches)
+    ]
+
+    baseline_stream = CountingStream()
+    baseline_logger = Logger(service="order-processor-baseline", stream=baseline_stream)
+    baseline_cpu = run(events, per_record_handler(baseline_logger), BatchProcessor(EventType.SQS))
+
+    summary_stream = CountingStream()
+    function.logger.registered_handler.setStream(summary_stream)
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=1, summary_logger=function.logger)
+    summary_cpu = run(events, function.record_handler, processor)
+
+    print(f"batches={args.batches} batch_size={args.batch_size} failure_ratio={args.failure_ratio}")
+    print(f"{'mode':<12}{'lines/batch':>13}{'bytes/batch':>13}{'cpu/batch (us)':>16}")
+    for name, stream, cpu in [("per-record", baseline_stream, baseline_cpu), ("summary", summary_stream, summary_cpu)]:
+        print(f"{name:<12}{stream.lines / args.batches:>13.2f}{stream.bytes / args.batches:>13.0f}{cpu:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""SQS バッチ処理のスループット計測 (逐次・スレッド・非同期の比較)
+
+合成した SQS イベント (本文サイズ・失敗率を指定) を、次の処理方式で
+lambda/function.py の record_handler に渡し、1 秒あたりの処理レコード数を比較する。
+
+- sequential: BatchProcessor (Powertools 標準の逐次処理)
+- threaded:   ThreadedBatchProcessor (max_workers 並列)
+- async:      AsyncBatchProcessor (レコードごとのコルーチンを asyncio.gather で並行実行)
+
+record_handler の前に I/O 待ち (同期版は time.sleep, 非同期版は asyncio.sleep) を挿入する。
+あわせて次を確認する。
+
+- 部分的な失敗の正しさ: batchItemFailures が無効な注文 (quantity <= 0) のメッセージ ID と
+  元のレコード順で一致すること
+- メモリ: 1 バッチの処理中に確保されたメモリのピーク (tracemalloc, スループットの計測とは別に実行)
+
+AWS への接続は不要 (LambdaContext は events.FakeLambdaContext を使う)。
+
+使い方:
+    python benchmarks/bench_throughput.py [--batches 20] [--batch-size 100] [--body-bytes 256 4096]
+        [--failure-ratio 0.1] [--latency-ms 5] [--workers 4 10] [--json]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aws_lambda_powertools.utilities.batch import (  # noqa: E402
+    AsyncBatchProcessor,
+    BatchProcessor,
+    EventType,
+    async_process_partial_response,
+    process_partial_response,
+)
+
+import function  # noqa: E402
+from events import FakeLambdaContext, sqs_event  # noqa: E402
+from processors import ThreadedBatchProcessor  # noqa: E402
+
+# order_body が生成する本文に "note" フィールドを加えたときの増分 (padding を除く)
+NOTE_OVERHEAD = len(', "note": ""')
+
+
+def sync_handler(latency: float) -> Callable:
+    def record_handler(record):
+        if latency:
+            time.sleep(latency)  # DB 書き込みなどの I/O 待ちを模擬
+        return function.record_handler(record)
+
+    return record_handler
+
+
+def async_handler(latency: float) -> Callable:
+    async def record_handler(record):
+        if latency:
+            await asyncio.sleep(latency)
+        return function.record_handler(record)
+
+    return record_handler
+
+
+def strategies(workers: list[int], latency: float) -> list[tuple[str, Callable[[], Callable[[dict, Any], dict]]]]:
+    """(名前, 処理関数を返すファクトリ) のリスト。処理関数は (イベント, コンテキスト) からレスポンスを返す"""
+
+    def sequential():
+        processor = BatchProcessor(EventType.SQS, raise_on_entire_batch_failure=False)
+        handler = sync_handler(latency)
+        return lambda event, context: process_partial_response(event, handler, processor, context)
+
+    def threaded(max_workers: int):
+        def factory():
+            processor = ThreadedBatchProcessor(EventType.SQS, max_workers, raise_on_entire_batch_failure=False)
+            handler = sync_handler(latency)
+            return lambda event, context: process_partial_response(event, handler, processor, context)
+
+        return factory
+
+    def asynchronous():
+        processor = AsyncBatchProcessor(EventType.SQS, raise_on_entire_batch_failure=False)
+        handler = async_handler(latency)
+        return lambda event, context: async_process_partial_response(event, handler, processor, context)
+
+    return [
+        ("sequential", sequential),
+        *[(f"threaded x{max_workers}", threaded(max_workers)) for max_workers in workers],
+        ("async", asynchronous),
+    ]
+
+
+def expected_failures(event: dict) -> list[str]:
+    """record_handler が失敗するレコード (quantity <= 0) のメッセージ ID"""
+    return [record["messageId"] for record in event["Records"] if json.loads(record["body"])["quantity"] <= 0]
+
+
+def padding_for(body_bytes: int) -> int:
+    """本文がおおよそ body_bytes バイトになる padding を求める"""
+    base = len(sqs_event(1)["Records"][0]["body"])
+    return max(0, body_bytes - base - NOTE_OVERHEAD)
+
+
+def peak_memory(run: Callable[[dict, Any], dict], event: dict, context: FakeLambdaContext) -> int:
+    """1 バッチの処理中に確保されたメモリのピーク (バイト)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(event, context)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def measure(factory, events: list[dict], context: FakeLambdaContext) -> dict:
+    run = factory()
+    # ウォームアップ (スレッドプールの生成など)
+    run(events[0], context)
+
+    correct = True
+    start = time.perf_counter()
+    for event in events:
+        response = run(event, context)
+        failures = [item["itemIdentifier"] for item in response["batchItemFailures"]]
+        correct = correct and failures == expected_failures(event)
+    elapsed = time.perf_counter() - start
+
+    records = sum(len(event["Records"]) for event in events)
+    return {
+        "records_per_sec": records / elapsed,
+        "failures_correct": correct,
+        "peak_memory_bytes": peak_memory(run, events[0], context),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--body-bytes", type=int, nargs="+", default=[256, 4096])
+    parser.add_argument("--failure-ratio", type=float, default=0.1)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 10])
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力する")
+    args = parser.parse_args()
+
+    function.logger.registered_handler.setStream(open(os.devnull, "w"))
+    context = FakeLambdaContext()
+    latency = args.latency_ms / 1000
+
+    results = []
+    for body_bytes in args.body_bytes:
+        padding = padding_for(body_bytes)
+        events = [
+            sqs_event(
+                args.batch_size,
+                failure_ratio=args.failure_ratio,
+                padding=padding,
+                seed=batch,
+                start=batch * args.batch_size,
+            )
+            for batch in range(args.batches)
+        ]
+        for name, factory in strategies(args.workers, latency):
+            results.append({"body_bytes": body_bytes, "processor": name, **measure(factory, events, context)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(
+        f"batches={args.batches} batch_size={args.batch_size} failure_ratio={args.failure_ratio} "
+        f"latency={args.latency_ms}ms"
+    )
+    print(f"{'body':>7}  {'processor':<14}{'records/sec':>12}{'speedup':>9}{'failures':>10}{'peak KiB':>10}")
+    baseline = {}
+    for result in results:
+        baseline.setdefault(result["body_bytes"], result["records_per_sec"])
+        speedup = result["records_per_sec"] / baseline[result["body_bytes"]]
+        print(
+            f"{result['body_bytes']:>6}B  {result['processor']:<14}{result['records_per_sec']:>12.0f}"
+            f"{speedup:>8.1f}x{'ok' if result['failures_correct'] else 'MISMATCH':>10}"
+            f"{result['peak_memory_bytes'] / 1024:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
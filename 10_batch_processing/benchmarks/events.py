@@ -0,0 +1,87 @@
+"""ベンチマーク用の SQS イベントと LambdaContext の生成"""
+import json
+import random
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class FakeLambdaContext:
+    """ローカル実行用の LambdaContext"""
+
+    function_name: str = "order-processor"
+    function_version: str = "$LATEST"
+    memory_limit_in_mb: int = 512
+    invoked_function_arn: str = "arn:aws:lambda:ap-northeast-1:123456789012:function:order-processor"
+    aws_request_id: str = "00000000-0000-0000-0000-000000000000"
+    log_group_name: str = "/aws/lambda/order-processor"
+    log_stream_name: str = "2024/01/01/[$LATEST]00000000000000000000000000000000"
+    remaining_time_in_millis: int = 30_000
+
+    def get_remaining_time_in_millis(self) -> int:
+        return self.remaining_time_in_millis
+
+
+def sqs_record(body: Any, message_id: str, group_id: str | None = None) -> dict:
+    """SQS イベントのレコードを生成する (group_id を指定すると FIFO キューのレコードになる)"""
+    attributes = {
+        "ApproximateReceiveCount": "1",
+        "SentTimestamp": "1700000000000",
+        "SenderId": "AIDAEXAMPLE",
+        "ApproximateFirstReceiveTimestamp": "1700000000001",
+    }
+    if group_id is not None:
+        attributes.update({"MessageGroupId": group_id, "MessageDeduplicationId": message_id, "SequenceNumber": "1"})
+    return {
+        "messageId": message_id,
+        "receiptHandle": f"handle-{message_id}",
+        "body": body if isinstance(body, str) else json.dumps(body),
+        "attributes": attributes,
+        "messageAttributes": {},
+        "md5OfBody": "",
+        "eventSource": "aws:sqs",
+        "eventSourceARN": "arn:aws:sqs:ap-northeast-1:123456789012:order-queue",
+        "awsRegion": "ap-northeast-1",
+    }
+
+
+def order_body(index: int, rng: random.Random, invalid: bool = False, padding: int = 0) -> dict:
+    """注文メッセージの本文を生成する (invalid=True なら record_handler で失敗する内容)"""
+    body = {
+        "order_id": f"ORD-{index:08d}",
+        "product_id": f"PROD-{rng.randrange(1000):05d}",
+        "quantity": 0 if invalid else rng.randint(1, 5),
+        "customer_id": f"CUST-{rng.randrange(10_000):06d}",
+    }
+    if padding:
+        body["note"] = "x" * padding
+    return body
+
+
+def sqs_event(
+    records: int,
+    failure_ratio: float = 0.0,
+    groups: int | None = None,
+    padding: int = 0,
+    seed: int = 0,
+    start: int = 0,
+    duplicate_ratio: float = 0.0,
+) -> dict:
+    """SQS イベントを生成する (groups を指定するとメッセージグループを順に割り当てた FIFO イベント)
+
+    duplicate_ratio を指定すると、その割合のレコードを同じバッチ内の先行レコードと本文が同じ
+    (メッセージ ID は異なる) 重複メッセージにする。
+    """
+    rng = random.Random(seed)
+    bodies: list[dict] = []
+    event_records = []
+    for index in range(start, start + records):
+        if duplicate_ratio and bodies and rng.random() < duplicate_ratio:
+            body = rng.choice(bodies)
+        else:
+            body = order_body(index, rng, invalid=rng.random() < failure_ratio, padding=padding)
+            bodies.append(body)
+        event_records.append(
+            sqs_record(body, message_id=f"msg-{index:08d}", group_id=f"group-{index % groups}" if groups else None)
+        )
+    return {"Records": event_records}
@@ -0,0 +1,52 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Callable
+
+# 実行環境 (ウォームスタート間) で処理済みのメッセージ本文を覚えておく時間と件数の上限
+DEFAULT_WINDOW_SECONDS = 60.0
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+def body_digest(body: str) -> bytes:
+    """メッセージ本文の重複判定用のハッシュ値 (セキュリティ用途ではないため SHA-1 を使う)"""
+    return hashlib.sha1(body.encode(), usedforsecurity=False).digest()
+
+
+class RecentDigests:
+    """処理済みのメッセージ本文のハッシュ値を一定時間だけ保持する
+
+    保持時間はすべて同じなので、挿入順 (OrderedDict) に並べておけば先頭から期限切れになる。
+    件数が max_entries を超えた場合は古いものから捨てる。
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self._expires: OrderedDict[bytes, float] = OrderedDict()
+
+    def __contains__(self, digest: bytes) -> bool:
+        expires = self._expires.get(digest)
+        return expires is not None and expires > self.clock()
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    def add(self, digest: bytes) -> None:
+        now = self.clock()
+        self._expires[digest] = now + self.window_seconds
+        self._expires.move_to_end(digest)
+        self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        while self._expires:
+            digest, expires = next(iter(self._expires.items()))
+            if expires > now and len(self._expires) <= self.max_entries:
+                return
+            del self._expires[digest]
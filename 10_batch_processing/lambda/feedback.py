@@ -0,0 +1,125 @@
+import math
+from dataclasses import dataclass, field
+from typing import Any
+
+# 推奨バッチサイズの計算で、1 バッチの処理に使ってよいタイムアウトの割合
+TARGET_UTILIZATION = 0.5
+# SQS イベントソースマッピングの上限 (標準キュー: 10,000 件 / FIFO キュー: 10 件, 最大 300 秒)
+SQS_MAX_BATCH_SIZE = 10_000
+SQS_FIFO_MAX_BATCH_SIZE = 10
+MAX_BATCHING_WINDOW_SECONDS = 300
+# 指数移動平均の重み (新しいバッチの観測値の割合)
+EWMA_ALPHA = 0.2
+
+
+@dataclass
+class BatchFeedback:
+    """1 バッチ分の処理状況の計測値"""
+
+    records: int = 0
+    latencies_ms: list[float] = field(default_factory=list)
+    latency_max_ms: float = 0.0
+    failed: int = 0
+    # 期限が近いため処理しなかったレコード数
+    skipped: int = 0
+    remaining_at_start_ms: int | None = None
+    remaining_at_end_ms: int | None = None
+    # SentTimestamp から推定したメッセージの到着レート [件/秒]
+    arrival_rate: float | None = None
+
+    def add_latency(self, latency_ms: float) -> None:
+        self.latencies_ms.append(latency_ms)
+        self.latency_max_ms = max(self.latency_max_ms, latency_ms)
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failed / self.records if self.records else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        feedback: dict[str, Any] = {"failure_rate": round(self.failure_rate, 4), "skipped": self.skipped}
+        if self.latencies_ms:
+            feedback["latency_avg_ms"] = round(sum(self.latencies_ms) / len(self.latencies_ms), 3)
+            feedback["latency_max_ms"] = round(self.latency_max_ms, 3)
+        if self.remaining_at_end_ms is not None:
+            feedback["remaining_ms"] = self.remaining_at_end_ms
+        return feedback
+
+
+@dataclass(frozen=True)
+class Recommendation:
+    """イベントソースマッピングの推奨設定"""
+
+    batch_size: int
+    batching_window_seconds: int | None
+
+
+def estimate_arrival_rate(sent_timestamps_ms: list[int]) -> float | None:
+    """バッチ内のメッセージの送信時刻から到着レート [件/秒] を推定する"""
+    if len(sent_timestamps_ms) < 2:
+        return None
+    span_ms = max(sent_timestamps_ms) - min(sent_timestamps_ms)
+    if span_ms <= 0:
+        return None
+    return (len(sent_timestamps_ms) - 1) / (span_ms / 1000)
+
+
+class BatchSizeAdvisor:
+    """バッチごとの計測値から、バッチサイズとバッチウィンドウの推奨値を求める
+
+    レコードあたりの処理時間と到着レートを指数移動平均でウォームスタート間にわたって平滑化する。
+
+    - バッチサイズ: タイムアウトの target_utilization 以内に処理できる件数
+      (処理時間 / 並列数 をレコードあたりのコストとする)
+    - バッチウィンドウ: 推奨バッチサイズ分のメッセージが到着するまでの時間
+      (到着レートが推定できない場合は None)
+
+    バッチサイズはイベントソースマッピングに設定できる上限 (標準キュー 10,000 件 / fifo=True なら 10 件) を超えない。
+    max_batch_size を指定した場合は、さらにその値以下にする。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        max_batch_size: int | None = None,
+        target_utilization: float = TARGET_UTILIZATION,
+        alpha: float = EWMA_ALPHA,
+        fifo: bool = False,
+    ):
+        self.max_workers = max_workers
+        self.max_batch_size = max_batch_size
+        self.fifo = fifo
+        self.target_utilization = target_utilization
+        self.alpha = alpha
+        self.latency_ms: float | None = None
+        self.arrival_rate: float | None = None
+
+    @property
+    def batch_size_limit(self) -> int:
+        """推奨するバッチサイズの上限"""
+        limit = SQS_FIFO_MAX_BATCH_SIZE if self.fifo else SQS_MAX_BATCH_SIZE
+        return limit if self.max_batch_size is None else min(self.max_batch_size, limit)
+
+    def observe(self, feedback: BatchFeedback) -> None:
+        """1 バッチ分の計測値を反映する"""
+        if feedback.latencies_ms:
+            self.latency_ms = self._ewma(self.latency_ms, sum(feedback.latencies_ms) / len(feedback.latencies_ms))
+        if feedback.arrival_rate is not None:
+            self.arrival_rate = self._ewma(self.arrival_rate, feedback.arrival_rate)
+
+    def recommend(self, budget_ms: float) -> Recommendation | None:
+        """処理に使える時間 (通常は関数のタイムアウト) から推奨設定を求める"""
+        if self.latency_ms is None:
+            return None
+
+        per_record_ms = max(self.latency_ms, 0.001) / self.max_workers
+        batch_size = math.floor(budget_ms * self.target_utilization / per_record_ms)
+        batch_size = max(1, min(self.batch_size_limit, batch_size))
+
+        window = None
+        if self.arrival_rate:
+            window = max(0, min(MAX_BATCHING_WINDOW_SECONDS, math.ceil(batch_size / self.arrival_rate)))
+
+        return Recommendation(batch_size=batch_size, batching_window_seconds=window)
+
+    def _ewma(self, current: float | None, value: float) -> float:
+        return value if current is None else current + self.alpha * (value - current)
@@ -1,19 +1,33 @@
-import json
+import os
 from typing import Any
 
-from aws_lambda_powertools import Logger, Tracer
+from aws_lambda_powertools import Logger, Metrics, Tracer
 from aws_lambda_powertools.utilities.batch import (
-    BatchProcessor,
     EventType,
     process_partial_response,
 )
 from aws_lambda_powertools.utilities.data_classes.sqs_event import SQSRecord
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+from processors import ThreadedBatchProcessor
+
 logger = Logger(service="order-processor")
 tracer = Tracer(service="order-processor")
+metrics = Metrics(service="order-processor")
 
-processor = BatchProcessor(event_type=EventType.SQS)
+# レコードをスレッドプールで並行処理する (FIFO キューではメッセージグループ内の順序を維持)
+# ログはバッチごとのサマリー 1 行と、失敗したレコードのみ出力する
+# レコードの処理時間・失敗率・残り時間とバッチサイズの推奨値はメトリクスとして出力する
+# 本文が同じメッセージ (少なくとも 1 回の配信による重複) は record_handler を呼ばずに成功扱いにする
+processor = ThreadedBatchProcessor(
+    event_type=EventType.SQS,
+    max_workers=int(os.getenv("BATCH_MAX_WORKERS", "4")),
+    summary_logger=logger,
+    metrics=metrics,
+    deadline_margin_ms=int(os.getenv("BATCH_DEADLINE_MARGIN_MS", "1000")),
+    deduplicate=True,
+    dedup_window_seconds=float(os.getenv("BATCH_DEDUP_WINDOW_SECONDS", "60")),
+)
 
 
 @tracer.capture_method
@@ -21,8 +35,6 @@ def record_handler(record: SQSRecord):
     """各レコードを処理するハンドラー"""
     payload: dict[str, Any] = record.json_body
 
-    logger.info("Processing order", extra={"order": payload})
-
     # 注文データのバリデーション
     if "order_id" not in payload:
         raise ValueError("Missing order_id")
@@ -35,7 +47,8 @@ def record_handler(record: SQSRecord):
     if quantity <= 0:
         raise ValueError(f"Invalid quantity for order {order_id}")
 
-    logger.info(
+    # 成功したレコードは個別にログを出力しない (バッチのサマリーに集計される)
+    logger.debug(
         "Order processed successfully",
         extra={
             "order_id": order_id,
@@ -48,6 +61,7 @@ def record_handler(record: SQSRecord):
 
 
 @logger.inject_lambda_context
+@metrics.log_metrics
 @tracer.capture_lambda_handler
 def lambda_handler(event: dict[str, Any], context: LambdaContext):
     return process_partial_response(
@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from aws_lambda_powertools import Logger, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+from aws_lambda_powertools.utilities.batch import BatchProcessor, EventType, ExceptionInfo
+from aws_lambda_powertools.utilities.batch.exceptions import SQSFifoMessageGroupCircuitBreakerError
+from aws_lambda_powertools.utilities.batch.types import BatchTypeModels
+from aws_lambda_powertools.utilities.typing import LambdaContext
+
+from dedup import DEFAULT_WINDOW_SECONDS, RecentDigests, body_digest
+from feedback import BatchFeedback, BatchSizeAdvisor, Recommendation, estimate_arrival_rate
+
+# 同じメッセージグループの先行レコードが失敗したため処理しなかったレコードの例外情報
+GROUP_CIRCUIT_BREAKER_EXC: ExceptionInfo = (
+    SQSFifoMessageGroupCircuitBreakerError,
+    SQSFifoMessageGroupCircuitBreakerError("A previous record from this message group failed processing"),
+    None,
+)
+
+# 新しいレコードの処理を開始しない残り時間の下限 (ミリ秒)
+DEFAULT_DEADLINE_MARGIN_MS = 1000
+
+
+class DeadlineApproachingError(Exception):
+    """Lambda のタイムアウトが近いため、レコードを処理しなかったことを表す例外"""
+
+
+# タイムアウトが近いため処理しなかったレコードの例外情報
+DEADLINE_EXC: ExceptionInfo = (
+    DeadlineApproachingError,
+    DeadlineApproachingError("Remaining time is too short to process this record"),
+    None,
+)
+
+
+@dataclass
+class _Outcome:
+    """ワーカースレッドでの 1 レコードの処理結果"""
+
+    record: dict
+    data: Any = None
+    result: Any = None
+    exc_info: ExceptionInfo | None = None
+    # 重複判定に使ったメッセージ本文のハッシュ値
+    digest: bytes | None = None
+    # 処理済みのメッセージと本文が同じため record_handler を呼ばなかったレコード
+    duplicate: bool = False
+
+
+@dataclass
+class BatchSummary:
+    """バッチ内のレコードの処理結果の集計"""
+
+    records: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    # 重複として record_handler を呼ばずに成功扱いにしたレコード数 (succeeded に含む)
+    duplicates: int = 0
+    # 例外の型名 -> 件数
+    errors: Counter = field(default_factory=Counter)
+    # record_handler の戻り値の status -> 件数
+    results: Counter = field(default_factory=Counter)
+    started: float = field(default_factory=time.perf_counter)
+
+    def add_success(self, result: Any) -> None:
+        self.succeeded += 1
+        if isinstance(result, dict) and "status" in result:
+            self.results[str(result["status"])] += 1
+
+    def add_failure(self, exception: ExceptionInfo) -> None:
+        self.failed += 1
+        self.errors[exception[0].__name__ if exception[0] else "Unknown"] += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        summary: dict[str, Any] = {
+            "records": self.records,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 3),
+        }
+        if self.duplicates:
+            summary["duplicates"] = self.duplicates
+        if self.results:
+            summary["results"] = dict(self.results)
+        if self.errors:
+            summary["errors"] = dict(self.errors)
+        return summary
+
+
+def _raw_record(record: Any) -> Any:
+    """ログ出力用に元のレコードを取り出す (データクラス・Pydantic モデルの両方に対応)"""
+    if hasattr(record, "raw_event"):
+        return record.raw_event
+    if hasattr(record, "model_dump"):
+        return record.model_dump(mode="json")
+    return str(record)
+
+
+class ThreadedBatchProcessor(BatchProcessor):
+    """スレッドプールでレコードを並行処理する BatchProcessor
+
+    record_handler が I/O 待ちを含む場合、レコードを max_workers 並列で処理して
+    バッチ全体のレイテンシを短縮する。
+
+    SQS FIFO キューのレコード (attributes.MessageGroupId を持つもの) は、
+    メッセージグループ単位で並行処理し、グループ内は到着順に逐次処理する。
+    グループ内でレコードが失敗した場合、そのグループの後続レコードは処理せずに失敗として報告する
+    (SqsFifoPartialProcessor の skip_group_on_error=True と同じ扱い)。
+
+    success_handler / failure_handler の呼び出しはメインスレッドで元のレコード順に行うため、
+    batchItemFailures や process() の戻り値は BatchProcessor と同じ順序になる。
+    スレッドプールはウォームスタート間で再利用する。
+
+    summary_logger を指定すると、レコードごとの処理結果を BatchSummary に集計し、
+    バッチごとに 1 行のサマリーログを出力する。レコード全体をログに出力するのは失敗したレコードのみ。
+
+    Lambda コンテキストが渡された場合、新しいレコードの処理を始める前に残り時間を確認し、
+    残り時間が deadline_margin_ms + レコードあたりの処理時間 (推定値) を下回ったら、
+    未処理のレコードを処理せずに失敗として報告する (SQS から再配信される)。
+
+    レコードあたりの処理時間・失敗率・残り時間を BatchFeedback に記録し、
+    BatchSizeAdvisor でバッチサイズとバッチウィンドウの推奨値を求める。
+    FIFO キューのレコードを受け取った場合は、推奨バッチサイズを FIFO キューの上限 (10 件) までにする。
+    metrics を指定すると、これらをバッチごとにメトリクスとして出力する。
+    clock はテストで時刻を差し替えるためのもの (秒を返す単調増加の関数)。
+
+    deduplicate=True (SQS のみ) の場合、メッセージ本文のハッシュ値で重複を判定し、
+    同じバッチ内で先に現れたメッセージ、または dedup_window_seconds 以内に
+    この実行環境で処理に成功したメッセージと本文が同じレコードは、
+    record_handler を呼ばずに成功として報告する (本文の JSON のパースやモデルの検証も行わない)。
+    """
+
+    def __init__(
+        self,
+        event_type: EventType,
+        max_workers: int = 4,
+        model: BatchTypeModels | None = None,
+        raise_on_entire_batch_failure: bool = True,
+        summary_logger: Logger | None = None,
+        metrics: Metrics | None = None,
+        advisor: BatchSizeAdvisor | None = None,
+        deadline_margin_ms: int = DEFAULT_DEADLINE_MARGIN_MS,
+        clock: Callable[[], float] = time.perf_counter,
+        deduplicate: bool = False,
+        dedup_window_seconds: float = DEFAULT_WINDOW_SECONDS,
+    ):
+        if max_workers < 1:
+            raise ValueError("max_workers must be greater than 0")
+        if deduplicate and event_type != EventType.SQS:
+            raise ValueError("deduplicate is only supported for SQS events")
+        super().__init__(event_type, model, raise_on_entire_batch_failure)
+        self.max_workers = max_workers
+        self.summary_logger = summary_logger
+        self.metrics = metrics
+        self.advisor = advisor if advisor is not None else BatchSizeAdvisor(max_workers=max_workers)
+        self.deadline_margin_ms = deadline_margin_ms
+        self.clock = clock
+        self.recent = RecentDigests(window_seconds=dedup_window_seconds, clock=clock) if deduplicate else None
+        self.summary = BatchSummary()
+        self.feedback = BatchFeedback()
+        self._context: LambdaContext | None = None
+        self._executor: ThreadPoolExecutor | None = None
+
+    def __call__(self, records: list[dict], handler: Callable, lambda_context: LambdaContext | None = None):
+        # 基底クラスは lambda_context が None のとき前回の値を残すため、残り時間の確認用に別に保持する
+        self._context = lambda_context
+        return super().__call__(records, handler, lambda_context)
+
+    def _prepare(self):
+        super()._prepare()
+        if any(self._message_group_id(record) is not None for record in self.records):
+            self.advisor.fifo = True
+        self.summary = BatchSummary(records=len(self.records))
+        self.feedback = BatchFeedback(
+            records=len(self.records),
+            remaining_at_start_ms=self._remaining_ms(),
+            arrival_rate=estimate_arrival_rate(self._sent_timestamps()),
+        )
+
+    def _clean(self):
+        self.feedback.remaining_at_end_ms = self._remaining_ms()
+        self.advisor.observe(self.feedback)
+        budget_ms = self.feedback.remaining_at_start_ms
+        recommendation = self.advisor.recommend(budget_ms) if budget_ms is not None else None
+
+        if self.metrics is not None:
+            self._add_metrics(recommendation)
+            if self.recent is not None:
+                self.metrics.add_metric(name="DuplicateRecords", unit=MetricUnit.Count, value=self.summary.duplicates)
+
+        # 全件失敗時は super()._clean() が例外を送出するため、サマリーはその前に出力する
+        if self.summary_logger is not None:
+            extra: dict[str, Any] = {"batch": self.summary.to_dict(), "feedback": self.feedback.to_dict()}
+            if recommendation is not None:
+                extra["recommendation"] = {
+                    "batch_size": recommendation.batch_size,
+                    "batching_window_seconds": recommendation.batching_window_seconds,
+                }
+            self.summary_logger.info("Batch processed", extra=extra)
+        super()._clean()
+
+    def _add_metrics(self, recommendation: Recommendation | None) -> None:
+        feedback = self.feedback
+        self.metrics.add_metric(name="BatchSize", unit=MetricUnit.Count, value=feedback.records)
+        self.metrics.add_metric(name="FailedRecords", unit=MetricUnit.Count, value=feedback.failed)
+        self.metrics.add_metric(name="SkippedRecords", unit=MetricUnit.Count, value=feedback.skipped)
+        self.metrics.add_metric(name="FailureRate", unit=MetricUnit.Percent, value=feedback.failure_rate * 100)
+        # レコードごとの値を出力し、CloudWatch 側でパーセンタイルを集計できるようにする
+        for latency_ms in feedback.latencies_ms:
+            self.metrics.add_metric(name="RecordLatency", unit=MetricUnit.Milliseconds, value=latency_ms)
+        if feedback.remaining_at_end_ms is not None:
+            self.metrics.add_metric(
+                name="RemainingTimeHeadroom", unit=MetricUnit.Milliseconds, value=feedback.remaining_at_end_ms
+            )
+        if recommendation is not None:
+            self.metrics.add_metric(name="RecommendedBatchSize", unit=MetricUnit.Count, value=recommendation.batch_size)
+            if recommendation.batching_window_seconds is not None:
+                self.metrics.add_metric(
+                    name="RecommendedBatchingWindow",
+                    unit=MetricUnit.Seconds,
+                    value=recommendation.batching_window_seconds,
+                )
+
+    def success_handler(self, record, result: Any):
+        self.summary.add_success(result)
+        return super().success_handler(record, result)
+
+    def failure_handler(self, record, exception: ExceptionInfo):
+        self.summary.add_failure(exception)
+        self.feedback.failed += 1
+        if exception[0] is DeadlineApproachingError:
+            self.feedback.skipped += 1
+        if self.summary_logger is not None:
+            self.summary_logger.error(
+                "Record processing failed",
+                extra={"record": _raw_record(record), "error": f"{exception[0].__name__}: {exception[1]}"},
+                exc_info=exception if exception[2] is not None else None,
+            )
+        return super().failure_handler(record, exception)
+
+    def process(self) -> list[tuple]:
+        outcomes: list[_Outcome | None] = [None] * len(self.records)
+        if self.recent is not None:
+            self._mark_duplicates(outcomes)
+
+        def run_group(indexes: list[int]) -> None:
+            for position, index in enumerate(indexes):
+                if self._deadline_near():
+                    for skipped in indexes[position:]:
+                        outcomes[skipped] = _Outcome(record=self.records[skipped], exc_info=DEADLINE_EXC)
+                    return
+                outcome = self._execute(self.records[index], outcomes[index])
+                outcomes[index] = outcome
+                if outcome.exc_info is not None:
+                    for skipped in indexes[position + 1 :]:
+                        outcomes[skipped] = _Outcome(record=self.records[skipped], exc_info=GROUP_CIRCUIT_BREAKER_EXC)
+                    return
+
+        groups = self._groups(outcomes)
+        if self.max_workers == 1 or len(self.records) <= 1:
+            for indexes in groups:
+                run_group(indexes)
+        else:
+            futures = [self._get_executor().submit(run_group, indexes) for indexes in groups]
+            for future in futures:
+                future.result()
+
+        return [self._complete(outcome) for outcome in outcomes]
+
+    def _remaining_ms(self) -> int | None:
+        # テストなどで残り時間を返さないコンテキストが渡された場合は期限を確認しない
+        get_remaining_time = getattr(self._context, "get_remaining_time_in_millis", None)
+        return get_remaining_time() if get_remaining_time is not None else None
+
+    def _deadline_near(self) -> bool:
+        """新しいレコードの処理を始めるとタイムアウトに間に合わない可能性があるか"""
+        remaining_ms = self._remaining_ms()
+        if remaining_ms is None:
+            return False
+        # 前回までの推定値と、同じバッチ内で計測した最大値の大きい方を使う
+        expected_ms = max(self.advisor.latency_ms or 0.0, self.feedback.latency_max_ms)
+        return remaining_ms - expected_ms < self.deadline_margin_ms
+
+    def _sent_timestamps(self) -> list[int]:
+        if self.event_type != EventType.SQS:
+            return []
+        timestamps = []
+        for record in self.records:
+            sent = (record.get("attributes") or {}).get("SentTimestamp")
+            if sent is not None:
+                timestamps.append(int(sent))
+        return timestamps
+
+    def _mark_duplicates(self, outcomes: list[_Outcome | None]) -> None:
+        """本文のハッシュ値を求め、重複するレコードを処理済み (成功) にする"""
+        seen: set[bytes] = set()
+        for index, record in enumerate(self.records):
+            digest = body_digest(record.get("body") or "")
+            duplicate = digest in seen or digest in self.recent
+            seen.add(digest)
+            outcomes[index] = _Outcome(record=record, digest=digest, duplicate=duplicate)
+
+    def _groups(self, outcomes: list[_Outcome | None]) -> list[list[int]]:
+        """並行処理の単位 (レコードのインデックスのリスト) に分割する (重複したレコードは除く)"""
+        groups: dict[Any, list[int]] = {}
+        for index, record in enumerate(self.records):
+            if outcomes[index] is not None and outcomes[index].duplicate:
+                continue
+            group_id = self._message_group_id(record)
+            # メッセージグループを持たないレコードはそれぞれ独立に処理する
+            groups.setdefault(group_id if group_id is not None else ("record", index), []).append(index)
+        return list(groups.values())
+
+    def _message_group_id(self, record: dict) -> str | None:
+        if self.event_type != EventType.SQS:
+            return None
+        return (record.get("attributes") or {}).get("MessageGroupId")
+
+    def _execute(self, record: dict, outcome: _Outcome | None = None) -> _Outcome:
+        """レコードを処理する (ワーカースレッドで実行し、結果の記録はメインスレッドで行う)"""
+        if outcome is None:
+            outcome = _Outcome(record=record)
+        started = self.clock()
+        try:
+            outcome.data = self._to_batch_type(record=record, event_type=self.event_type, model=self.model)
+            if self._handler_accepts_lambda_context:
+                outcome.result = self.handler(record=outcome.data, lambda_context=self.lambda_context)
+            else:
+                outcome.result = self.handler(record=outcome.data)
+        except Exception:
+            outcome.exc_info = sys.exc_info()
+        # 同じバッチの後続レコードの期限判定に使うため、ワーカースレッドで直接記録する
+        self.feedback.add_latency((self.clock() - started) * 1000)
+        return outcome
+
+    def _complete(self, outcome: _Outcome) -> tuple:
+        """処理結果を BatchProcessor._process_record と同じ方法で記録する"""
+        if outcome.duplicate:
+            self.summary.duplicates += 1
+            return self.success_handler(record=outcome.record, result=None)
+
+        if outcome.exc_info is None:
+            # 処理に成功したメッセージのみ覚えておく (失敗したメッセージは再配信時に再び処理する)
+            if outcome.digest is not None:
+                self.recent.add(outcome.digest)
+            return self.success_handler(record=outcome.record, result=outcome.result)
+
+        # 変換できなかったレコード (モデルのバリデーションに失敗したポイズンピルなど) や
+        # 処理しなかったレコードは、モデルを使わずにデータクラスへ変換して報告する
+        data = outcome.data
+        if data is None:
+            data = self._to_batch_type(record=outcome.record, event_type=self.event_type)
+        return self.failure_handler(record=data, exception=outcome.exc_info)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch-processor")
+        return self._executor
@@ -0,0 +1,55 @@
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+# Lambda 関数のモジュール (lambda/ 配下) をテストから import できるようにする
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lambda"))
+
+
+class FakeClock:
+    """テスト用の時計 (秒)"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def build_sqs_record(body: Any, message_id: str, group_id: str | None = None) -> dict:
+    """SQS イベントのレコードを生成する"""
+    attributes = {
+        "ApproximateReceiveCount": "1",
+        "SentTimestamp": "1700000000000",
+        "SenderId": "AIDAEXAMPLE",
+        "ApproximateFirstReceiveTimestamp": "1700000000001",
+    }
+    if group_id is not None:
+        attributes.update({"MessageGroupId": group_id, "MessageDeduplicationId": message_id, "SequenceNumber": "1"})
+    return {
+        "messageId": message_id,
+        "receiptHandle": f"handle-{message_id}",
+        "body": body if isinstance(body, str) else json.dumps(body),
+        "attributes": attributes,
+        "messageAttributes": {},
+        "md5OfBody": "",
+        "eventSource": "aws:sqs",
+        "eventSourceARN": "arn:aws:sqs:ap-northeast-1:123456789012:order-queue",
+        "awsRegion": "ap-northeast-1",
+    }
+
+
+@pytest.fixture
+def sqs_record():
+    return build_sqs_record
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
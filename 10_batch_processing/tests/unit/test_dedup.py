@@ -0,0 +1,127 @@
+import pytest
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.utilities.batch import EventType, process_partial_response
+
+from dedup import RecentDigests, body_digest
+from processors import ThreadedBatchProcessor
+
+
+def counting_handler(calls: list):
+    def handler(record):
+        payload = record.json_body
+        calls.append(record.message_id)
+        if payload.get("fail"):
+            raise ValueError(f"failed {payload['id']}")
+        return {"status": "processed"}
+
+    return handler
+
+
+def failed_ids(response: dict) -> list[str]:
+    return [item["itemIdentifier"] for item in response["batchItemFailures"]]
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_duplicates_in_batch_are_successes_without_handler_call(sqs_record, max_workers):
+    records = [
+        sqs_record({"id": 0}, "m0"),
+        sqs_record({"id": 1}, "m1"),
+        sqs_record({"id": 0}, "m2"),
+        sqs_record({"id": 2, "fail": True}, "m3"),
+        sqs_record({"id": 1}, "m4"),
+    ]
+    calls = []
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=max_workers, deduplicate=True)
+
+    response = process_partial_response({"Records": records}, counting_handler(calls), processor)
+
+    assert failed_ids(response) == ["m3"]
+    assert sorted(calls) == ["m0", "m1", "m3"]
+    assert [record["messageId"] for record in processor.success_messages] == ["m0", "m1", "m2", "m4"]
+    assert processor.summary.duplicates == 2
+
+
+def test_duplicates_are_skipped_within_window_across_batches(sqs_record, clock):
+    calls = []
+    processor = ThreadedBatchProcessor(
+        EventType.SQS, max_workers=1, clock=clock, deduplicate=True, dedup_window_seconds=60
+    )
+    handler = counting_handler(calls)
+
+    process_partial_response({"Records": [sqs_record({"id": 0}, "m0")]}, handler, processor)
+    clock.advance(30)
+    process_partial_response({"Records": [sqs_record({"id": 0}, "m1")]}, handler, processor)
+    clock.advance(31)
+    process_partial_response({"Records": [sqs_record({"id": 0}, "m2")]}, handler, processor)
+
+    # m1 は m0 の 30 秒後なので重複、m2 は m0 の処理から 61 秒後なので再び処理する
+    assert calls == ["m0", "m2"]
+
+
+def test_failed_messages_are_not_remembered(sqs_record):
+    calls = []
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=1, deduplicate=True)
+    records = [sqs_record({"id": 0, "fail": True}, "m0"), sqs_record({"id": 1}, "m1")]
+    handler = counting_handler(calls)
+
+    process_partial_response({"Records": records}, handler, processor)
+    # 失敗したメッセージが再配信された場合は再び処理する
+    response = process_partial_response({"Records": records}, handler, processor)
+
+    assert calls == ["m0", "m1", "m0"]
+    assert failed_ids(response) == ["m0"]
+
+
+def test_duplicates_are_not_validated(sqs_record):
+    records = [sqs_record("not json", "m0"), sqs_record("not json", "m1"), sqs_record({"id": 1}, "m2")]
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=1, deduplicate=True)
+
+    response = process_partial_response({"Records": records}, counting_handler([]), processor)
+
+    assert failed_ids(response) == ["m0"]
+
+
+def test_dedup_disabled_by_default(sqs_record):
+    records = [sqs_record({"id": 0}, f"m{i}") for i in range(3)]
+    calls = []
+
+    process_partial_response({"Records": records}, counting_handler(calls), ThreadedBatchProcessor(EventType.SQS, 2))
+
+    assert sorted(calls) == ["m0", "m1", "m2"]
+
+
+def test_emits_duplicate_metric(sqs_record):
+    records = [sqs_record({"id": 0}, f"m{i}") for i in range(3)]
+    metrics = Metrics(namespace="Test", service="dedup-test")
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=1, metrics=metrics, deduplicate=True)
+
+    try:
+        process_partial_response({"Records": records}, counting_handler([]), processor)
+        metric_set = metrics.serialize_metric_set()
+    finally:
+        metrics.clear_metrics()
+
+    assert metric_set["DuplicateRecords"] == [2.0]
+
+
+def test_dedup_requires_sqs():
+    with pytest.raises(ValueError):
+        ThreadedBatchProcessor(EventType.KinesisDataStreams, deduplicate=True)
+
+
+def test_recent_digests_evicts_oldest_entries(clock):
+    recent = RecentDigests(window_seconds=10, max_entries=2, clock=clock)
+    first, second, third = (body_digest(body) for body in ("a", "b", "c"))
+
+    recent.add(first)
+    clock.advance(1)
+    recent.add(second)
+    recent.add(third)
+
+    assert first not in recent
+    assert second in recent and third in recent
+
+    clock.advance(10)
+    assert second not in recent
+    recent.add(first)
+    assert len(recent) == 1
@@ -0,0 +1,182 @@
+import pytest
+from aws_lambda_powertools import Metrics
+from aws_lambda_powertools.utilities.batch import EventType, process_partial_response
+
+from feedback import (
+    SQS_FIFO_MAX_BATCH_SIZE,
+    SQS_MAX_BATCH_SIZE,
+    BatchFeedback,
+    BatchSizeAdvisor,
+    Recommendation,
+    estimate_arrival_rate,
+)
+from processors import DeadlineApproachingError, ThreadedBatchProcessor
+
+
+class FakeContext:
+    """テスト用の時計 (clock フィクスチャ) の時刻から残り時間を返す Lambda コンテキスト"""
+
+    def __init__(self, clock, timeout_ms: int):
+        self.clock = clock
+        self.deadline = clock.now + timeout_ms / 1000
+
+    def get_remaining_time_in_millis(self) -> int:
+        return int((self.deadline - self.clock.now) * 1000)
+
+
+def slow_handler(clock, seconds: float):
+    def handler(record):
+        clock.advance(seconds)
+        return record.json_body["id"]
+
+    return handler
+
+
+def failed_ids(response: dict) -> list[str]:
+    return [item["itemIdentifier"] for item in response["batchItemFailures"]]
+
+
+def test_stops_picking_records_when_deadline_is_near(sqs_record, clock):
+    records = [sqs_record({"id": i}, f"m{i}") for i in range(10)]
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=1, deadline_margin_ms=1000, clock=clock)
+
+    # 1 件 1 秒、残り 5.5 秒: 残り時間 - 処理時間の推定値 が 1 秒を下回る 5 件目以降は処理しない
+    response = process_partial_response(
+        {"Records": records}, slow_handler(clock, 1.0), processor, FakeContext(clock, timeout_ms=5500)
+    )
+
+    assert failed_ids(response) == [f"m{i}" for i in range(4, 10)]
+    assert [exception[0] for exception in processor.exceptions] == [DeadlineApproachingError] * 6
+    assert processor.feedback.skipped == 6
+    assert processor.feedback.remaining_at_end_ms == 1500
+
+
+def test_deadline_skips_remaining_records_of_fifo_groups(sqs_record, clock):
+    records = [sqs_record({"id": i}, f"m{i}", group_id=f"g{i % 2}") for i in range(6)]
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=1, deadline_margin_ms=0, clock=clock)
+
+    response = process_partial_response(
+        {"Records": records}, slow_handler(clock, 1.0), processor, FakeContext(clock, timeout_ms=3000)
+    )
+
+    # グループ g0 (m0, m2, m4) を処理した時点で残り時間を使い切り、g1 は処理しない
+    assert failed_ids(response) == ["m1", "m3", "m5"]
+
+
+def test_entire_batch_is_reported_when_no_time_is_left(sqs_record, clock):
+    records = [sqs_record({"id": i}, f"m{i}") for i in range(3)]
+    processor = ThreadedBatchProcessor(
+        EventType.SQS, max_workers=1, raise_on_entire_batch_failure=False, deadline_margin_ms=1000, clock=clock
+    )
+
+    response = process_partial_response(
+        {"Records": records}, slow_handler(clock, 0.1), processor, FakeContext(clock, timeout_ms=500)
+    )
+
+    assert failed_ids(response) == ["m0", "m1", "m2"]
+    assert processor.feedback.latencies_ms == []
+
+
+def test_no_deadline_without_lambda_context(sqs_record, clock):
+    records = [sqs_record({"id": i}, f"m{i}") for i in range(5)]
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=1, clock=clock)
+
+    response = process_partial_response({"Records": records}, slow_handler(clock, 60.0), processor)
+
+    assert response == {"batchItemFailures": []}
+    assert processor.feedback.remaining_at_end_ms is None
+
+
+def test_records_latency_and_failure_rate(sqs_record, clock):
+    records = [sqs_record({"id": i}, f"m{i}") for i in range(4)]
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=1, clock=clock)
+
+    def handler(record):
+        clock.advance(0.05 * (record.json_body["id"] + 1))
+        if record.json_body["id"] == 3:
+            raise ValueError("boom")
+
+    process_partial_response({"Records": records}, handler, processor, FakeContext(clock, timeout_ms=30_000))
+
+    assert processor.feedback.latencies_ms == pytest.approx([50, 100, 150, 200])
+    assert processor.feedback.to_dict() == {
+        "failure_rate": 0.25,
+        "skipped": 0,
+        "latency_avg_ms": 125.0,
+        "latency_max_ms": 200.0,
+        "remaining_ms": 29_500,
+    }
+
+
+def test_emits_feedback_metrics(sqs_record, clock):
+    records = [sqs_record({"id": i}, f"m{i}") for i in range(3)]
+    for index, record in enumerate(records):
+        record["attributes"]["SentTimestamp"] = str(1_700_000_000_000 + index * 100)
+    metrics = Metrics(namespace="Test", service="feedback-test")
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=1, metrics=metrics, clock=clock)
+
+    try:
+        process_partial_response(
+            {"Records": records}, slow_handler(clock, 0.1), processor, FakeContext(clock, timeout_ms=30_000)
+        )
+        metric_set = metrics.serialize_metric_set()
+    finally:
+        metrics.clear_metrics()
+
+    assert metric_set["BatchSize"] == [3.0]
+    assert metric_set["FailureRate"] == [0.0]
+    assert metric_set["RecordLatency"] == pytest.approx([100.0] * 3)
+    assert metric_set["RemainingTimeHeadroom"] == [29_700.0]
+    # 30 秒 x 0.5 / 100 ms = 150 件、到着レート 10 件/秒 で 15 秒
+    assert metric_set["RecommendedBatchSize"] == [150.0]
+    assert metric_set["RecommendedBatchingWindow"] == [15.0]
+
+
+def test_advisor_accounts_for_concurrency_and_limits():
+    advisor = BatchSizeAdvisor(max_workers=4, max_batch_size=1000)
+    advisor.observe(BatchFeedback(latencies_ms=[100.0, 100.0]))
+
+    assert advisor.recommend(budget_ms=30_000) == Recommendation(batch_size=600, batching_window_seconds=None)
+    assert advisor.recommend(budget_ms=600_000).batch_size == 1000
+    assert advisor.recommend(budget_ms=10).batch_size == 1
+
+
+def test_advisor_caps_batch_size_at_queue_limit():
+    advisor = BatchSizeAdvisor()
+    advisor.observe(BatchFeedback(latencies_ms=[1.0]))
+    assert advisor.recommend(budget_ms=900_000).batch_size == SQS_MAX_BATCH_SIZE
+
+    fifo = BatchSizeAdvisor(max_batch_size=1000, fifo=True)
+    fifo.observe(BatchFeedback(latencies_ms=[1.0]))
+    assert fifo.recommend(budget_ms=900_000).batch_size == SQS_FIFO_MAX_BATCH_SIZE
+    assert BatchSizeAdvisor(max_batch_size=5, fifo=True).batch_size_limit == 5
+
+
+def test_processor_caps_recommendation_for_fifo_records(sqs_record, clock):
+    records = [sqs_record({"id": i}, f"m{i}", group_id="g0") for i in range(3)]
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=1, clock=clock)
+
+    process_partial_response(
+        {"Records": records}, slow_handler(clock, 0.001), processor, FakeContext(clock, timeout_ms=30_000)
+    )
+
+    assert processor.advisor.fifo is True
+    assert processor.advisor.recommend(budget_ms=30_000).batch_size == SQS_FIFO_MAX_BATCH_SIZE
+
+
+def test_advisor_smooths_latency_across_batches():
+    advisor = BatchSizeAdvisor(alpha=0.5)
+    assert advisor.recommend(budget_ms=1000) is None
+
+    advisor.observe(BatchFeedback(latencies_ms=[100.0], arrival_rate=0.02))
+    advisor.observe(BatchFeedback(latencies_ms=[300.0], arrival_rate=0.01))
+
+    assert advisor.latency_ms == 200.0
+    # 到着レートが低い場合、バッチウィンドウは上限の 300 秒になる
+    assert advisor.recommend(budget_ms=10_000) == Recommendation(batch_size=25, batching_window_seconds=300)
+
+
+def test_estimate_arrival_rate():
+    assert estimate_arrival_rate([0, 500, 1000]) == 2.0
+    assert estimate_arrival_rate([1000, 1000]) is None
+    assert estimate_arrival_rate([1000]) is None
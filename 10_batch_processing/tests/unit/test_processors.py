@@ -0,0 +1,195 @@
+import io
+import json
+import threading
+import time
+
+import pytest
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.utilities.batch import (
+    BatchProcessor,
+    EventType,
+    process_partial_response,
+)
+from aws_lambda_powertools.utilities.batch.exceptions import BatchProcessingError
+
+from processors import ThreadedBatchProcessor
+
+
+def failing_handler(record):
+    payload = record.json_body
+    if payload.get("fail"):
+        raise ValueError(f"failed {payload['id']}")
+    return payload["id"]
+
+
+def failed_ids(response: dict) -> list[str]:
+    return [item["itemIdentifier"] for item in response["batchItemFailures"]]
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_batch_item_failures_match_sequential_processor(sqs_record, max_workers):
+    records = [sqs_record({"id": i, "fail": i % 3 == 0}, f"m{i}") for i in range(10)]
+    event = {"Records": records}
+
+    expected = process_partial_response(event, failing_handler, BatchProcessor(EventType.SQS))
+    actual = process_partial_response(event, failing_handler, ThreadedBatchProcessor(EventType.SQS, max_workers))
+
+    assert actual == expected
+    assert failed_ids(actual) == ["m0", "m3", "m6", "m9"]
+
+
+def test_process_returns_results_in_record_order(sqs_record):
+    records = [sqs_record({"id": i}, f"m{i}") for i in range(8)]
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=4)
+
+    def handler(record):
+        # 先頭のレコードほど遅く終わるようにする
+        time.sleep((8 - record.json_body["id"]) * 0.002)
+        return record.json_body["id"]
+
+    with processor(records, handler):
+        results = processor.process()
+
+    assert [result for _, result, _ in results] == list(range(8))
+    assert [record["messageId"] for record in processor.success_messages] == [f"m{i}" for i in range(8)]
+
+
+def test_records_are_processed_concurrently(sqs_record):
+    records = [sqs_record({"id": i}, f"m{i}") for i in range(4)]
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=4)
+    barrier = threading.Barrier(4, timeout=5)
+
+    def handler(record):
+        # 4 レコードが同時に処理されなければタイムアウトする
+        barrier.wait()
+        return record.message_id
+
+    response = process_partial_response({"Records": records}, handler, processor)
+
+    assert response == {"batchItemFailures": []}
+
+
+def test_fifo_groups_are_sequential_within_group(sqs_record):
+    records = [sqs_record({"id": i}, f"m{i}", group_id=f"g{i % 2}") for i in range(8)]
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=4)
+    seen: dict[str, list[int]] = {"g0": [], "g1": []}
+    active: dict[str, int] = {"g0": 0, "g1": 0}
+    lock = threading.Lock()
+
+    def handler(record):
+        group = record.attributes.message_group_id
+        with lock:
+            active[group] += 1
+            assert active[group] == 1, "records of the same group ran concurrently"
+        time.sleep(0.002)
+        with lock:
+            active[group] -= 1
+            seen[group].append(record.json_body["id"])
+
+    process_partial_response({"Records": records}, handler, processor)
+
+    assert seen == {"g0": [0, 2, 4, 6], "g1": [1, 3, 5, 7]}
+
+
+def test_fifo_group_failure_skips_rest_of_group_only(sqs_record):
+    records = [
+        sqs_record({"id": 0}, "a0", group_id="a"),
+        sqs_record({"id": 1, "fail": True}, "a1", group_id="a"),
+        sqs_record({"id": 2}, "b0", group_id="b"),
+        sqs_record({"id": 3}, "a2", group_id="a"),
+        sqs_record({"id": 4}, "b1", group_id="b"),
+    ]
+    calls = []
+
+    def handler(record):
+        calls.append(record.message_id)
+        return failing_handler(record)
+
+    response = process_partial_response({"Records": records}, handler, ThreadedBatchProcessor(EventType.SQS, 4))
+
+    assert failed_ids(response) == ["a1", "a2"]
+    assert "a2" not in calls
+
+
+def test_entire_batch_failure_raises(sqs_record):
+    records = [sqs_record({"id": i, "fail": True}, f"m{i}") for i in range(3)]
+
+    with pytest.raises(BatchProcessingError):
+        process_partial_response({"Records": records}, failing_handler, ThreadedBatchProcessor(EventType.SQS, 4))
+
+
+def test_lambda_context_is_injected(sqs_record):
+    records = [sqs_record({"id": i}, f"m{i}") for i in range(3)]
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=2)
+    context = object()
+    received = []
+
+    def handler(record, lambda_context):
+        received.append(lambda_context)
+
+    process_partial_response({"Records": records}, handler, processor, context)
+
+    assert received == [context] * 3
+
+
+def test_max_workers_must_be_positive():
+    with pytest.raises(ValueError):
+        ThreadedBatchProcessor(EventType.SQS, max_workers=0)
+
+
+@pytest.fixture
+def log_stream():
+    return io.StringIO()
+
+
+@pytest.fixture
+def summary_logger(request, log_stream):
+    # Logger はサービス名ごとにハンドラーを共有するため、テストごとに別の名前を使う
+    return Logger(service=f"test-batch-{request.node.name}", stream=log_stream)
+
+
+def log_lines(log_stream) -> list[dict]:
+    return [json.loads(line) for line in log_stream.getvalue().splitlines()]
+
+
+def test_summary_logger_emits_one_summary_and_failed_records_only(sqs_record, summary_logger, log_stream):
+    records = [sqs_record({"id": i, "fail": i in (1, 4)}, f"m{i}") for i in range(6)]
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=2, summary_logger=summary_logger)
+
+    def handler(record):
+        failing_handler(record)
+        return {"status": "processed"}
+
+    process_partial_response({"Records": records}, handler, processor)
+
+    lines = log_lines(log_stream)
+    failures = [line for line in lines if line["message"] == "Record processing failed"]
+    summaries = [line for line in lines if line["message"] == "Batch processed"]
+    assert len(lines) == 3
+    assert [line["record"]["messageId"] for line in failures] == ["m1", "m4"]
+    assert failures[0]["error"] == "ValueError: failed 1"
+    assert summaries[0]["batch"]["records"] == 6
+    assert summaries[0]["batch"]["succeeded"] == 4
+    assert summaries[0]["batch"]["failed"] == 2
+    assert summaries[0]["batch"]["results"] == {"processed": 4}
+    assert summaries[0]["batch"]["errors"] == {"ValueError": 2}
+
+
+def test_summary_is_logged_before_entire_batch_failure(sqs_record, summary_logger, log_stream):
+    records = [sqs_record({"id": i, "fail": True}, f"m{i}") for i in range(2)]
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=2, summary_logger=summary_logger)
+
+    with pytest.raises(BatchProcessingError):
+        process_partial_response({"Records": records}, failing_handler, processor)
+
+    assert log_lines(log_stream)[-1]["batch"]["failed"] == 2
+
+
+def test_summary_is_reset_per_batch(sqs_record, summary_logger, log_stream):
+    processor = ThreadedBatchProcessor(EventType.SQS, max_workers=2, summary_logger=summary_logger)
+
+    for _ in range(2):
+        records = [sqs_record({"id": i}, f"m{i}") for i in range(3)]
+        process_partial_response({"Records": records}, failing_handler, processor)
+
+    assert [line["batch"]["succeeded"] for line in log_lines(log_stream)] == [3, 3]
@@ -0,0 +1,98 @@
+"""コンパイル済みルールの評価のレイテンシ計測 (ルール数 10 - 10,000)
+
+スキーマ全体のルール数を変えながら、1 コンテキストあたりの評価時間を比較する。
+
+- handler: Lambda 関数と同じく 2 つのフラグだけを評価する
+  (FeatureFlags.evaluate() x 2 / BulkFeatureFlags.evaluate_all(defaults=...))
+- all flags: すべてのフラグを評価する
+  (FeatureFlags.evaluate() をフラグごとに呼び出す / BulkFeatureFlags.evaluate_all())
+
+ルールの解釈のコストを比べるため、FeatureFlags は呼び出しごとのスキーマの検証を省いたもの
+(interpreted) を使う。compile 列はスキーマの検証とコンパイルにかかる時間 (内容が変わったときのみ発生)。
+
+使い方:
+    python benchmarks/bench_compiled.py [--rules 10 100 1000 10000] [--rules-per-flag 5] [--contexts 200]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aws_lambda_powertools.utilities.feature_flags import FeatureFlags  # noqa: E402
+
+from flags import BulkFeatureFlags  # noqa: E402
+from schemas import StaticStore, generate_contexts, generate_schema  # noqa: E402
+
+
+class InterpretedFeatureFlags(FeatureFlags):
+    """呼び出しごとのスキーマの検証を省いた FeatureFlags (ルールの解釈のコストだけを計測する)"""
+
+    def get_configuration(self) -> dict:
+        return self.store.get_configuration()
+
+
+def measure(evaluate, contexts: list[dict], repeat: int) -> tuple[float, list]:
+    """(1 コンテキストあたりの処理時間 p50 [us], 評価結果) を返す"""
+    samples = []
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [evaluate(context) for context in contexts]
+        samples.append((time.perf_counter() - start) * 1_000_000 / len(contexts))
+    return statistics.median(samples), results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 1000, 10_000])
+    parser.add_argument("--rules-per-flag", type=int, default=5)
+    parser.add_argument("--contexts", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    contexts = generate_contexts(args.contexts)
+    print(f"rules_per_flag={args.rules_per_flag} contexts={args.contexts} (us/context)")
+    print(
+        f"{'rules':>7}{'compile ms':>12}{'handler interp':>16}{'compiled':>10}"
+        f"{'all interp':>12}{'compiled':>10}{'speedup':>9}"
+    )
+    for total in args.rules:
+        store = StaticStore(generate_schema(max(1, total // args.rules_per_flag), args.rules_per_flag))
+        names = list(store.config)
+        handler_defaults = dict.fromkeys(names[:2], False)
+
+        interpreted = InterpretedFeatureFlags(store=store)
+        compiled = BulkFeatureFlags(store=store)
+        start = time.perf_counter()
+        compiled.get_configuration()
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        handler_interp, expected = measure(
+            lambda ctx: {name: interpreted.evaluate(name=name, context=ctx, default=False) for name in handler_defaults},
+            contexts,
+            args.repeat,
+        )
+        handler_compiled, results = measure(
+            lambda ctx: compiled.evaluate_all(context=ctx, defaults=handler_defaults), contexts, args.repeat
+        )
+        assert results == expected
+
+        all_interp, expected = measure(
+            lambda ctx: {name: interpreted.evaluate(name=name, context=ctx, default=False) for name in names},
+            contexts,
+            max(1, args.repeat // 2),
+        )
+        all_compiled, results = measure(lambda ctx: compiled.evaluate_all(context=ctx), contexts, args.repeat)
+        assert results == expected
+
+        print(
+            f"{total:>7}{compile_ms:>12.1f}{handler_interp:>16.1f}{handler_compiled:>10.1f}"
+            f"{all_interp:>12.1f}{all_compiled:>10.1f}{all_interp / all_compiled:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""フィーチャーフラグの一括評価のレイテンシ計測
+
+flags 個のフラグ (それぞれ rules 個のルール) のスキーマに対して、
+FeatureFlags.evaluate() をフラグごとに呼び出す方法と BulkFeatureFlags.evaluate_all() で
+すべてのフラグを評価する方法の、1 コンテキストあたりの処理時間を比較する。
+スキーマの検証の共有とルールの評価の共有の効果を分けるため、
+BulkFeatureFlags.evaluate() (検証・コンパイル済みのスキーマで評価する) をフラグごとに呼び出す方法も計測する。
+ストアはスキーマを返すだけのもの (AppConfig のキャッシュが有効な状態) を使う。
+
+使い方:
+    python benchmarks/bench_evaluate_all.py [--flags 200] [--rules 5] [--contexts 10]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aws_lambda_powertools.utilities.feature_flags import FeatureFlags  # noqa: E402
+
+from flags import BulkFeatureFlags  # noqa: E402
+from schemas import StaticStore, generate_contexts, generate_schema  # noqa: E402
+
+
+def per_flag(feature_flags: FeatureFlags, names: list[str]):
+    def evaluate(context: dict) -> dict:
+        return {name: feature_flags.evaluate(name=name, context=context, default=False) for name in names}
+
+    return evaluate
+
+
+def bulk(feature_flags: BulkFeatureFlags, names: list[str]):
+    defaults = dict.fromkeys(names, False)
+
+    def evaluate(context: dict) -> dict:
+        return feature_flags.evaluate_all(context=context, defaults=defaults)
+
+    return evaluate
+
+
+def measure(evaluate, contexts: list[dict], repeat: int) -> tuple[float, list[dict]]:
+    """(1 コンテキストあたりの処理時間 p50 [ms], 評価結果) を返す"""
+    samples = []
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [evaluate(context) for context in contexts]
+        samples.append((time.perf_counter() - start) * 1000 / len(contexts))
+    return statistics.median(samples), results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flags", type=int, default=200)
+    parser.add_argument("--rules", type=int, default=5)
+    parser.add_argument("--contexts", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    store = StaticStore(generate_schema(args.flags, args.rules))
+    names = list(store.config)
+    contexts = generate_contexts(args.contexts)
+
+    print(f"flags={args.flags} rules={args.rules} contexts={args.contexts}")
+    print(f"{'method':<22}{'ms/context':>12}{'speedup':>9}")
+    baseline, expected = measure(per_flag(FeatureFlags(store=store), names), contexts, args.repeat)
+    print(f"{'evaluate() per flag':<22}{baseline:>12.3f}{1:>8.1f}x")
+    elapsed, results = measure(per_flag(BulkFeatureFlags(store=store), names), contexts, args.repeat)
+    assert results == expected
+    print(f"{'  + compiled schema':<22}{elapsed:>12.3f}{baseline / elapsed:>8.1f}x")
+    elapsed, results = measure(bulk(BulkFeatureFlags(store=store), names), contexts, args.repeat)
+    assert results == expected
+    print(f"{'evaluate_all()':<22}{elapsed:>12.3f}{baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""評価結果のキャッシュ (cache_size) のヒット率とレイテンシの計測
+
+異なるコンテキストの数 (カーディナリティ) を変えながら、Zipf 分布 (一部のコンテキストに
+アクセスが集中する) で選んだコンテキストを評価し、キャッシュなし / ありの評価時間とヒット率を比較する。
+
+- handler: Lambda 関数と同じく 2 つのフラグだけを評価する (evaluate_all(defaults=...), フラグごとにキャッシュ)
+- all flags: すべてのフラグを評価する (evaluate_all(), 結果全体をキャッシュ)
+
+キャッシュのキーはルールが参照するコンテキストの値なので、ヒット率は異なるコンテキストの数だけでなく
+ルールが参照するキー (customer_id など値の種類が多いキーを参照するか) にも左右される。
+
+使い方:
+    python benchmarks/bench_memo.py [--cardinality 4 100 1000 10000 100000] [--cache-size 1024]
+        [--evaluations 20000] [--zipf 1.1]
+"""
+import argparse
+import random
+import sys
+import time
+from itertools import accumulate
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from flags import BulkFeatureFlags  # noqa: E402
+from schemas import StaticStore, generate_contexts, generate_schema  # noqa: E402
+
+
+def zipf_sample(population: list[dict], count: int, exponent: float, seed: int = 0) -> list[dict]:
+    """順位 k のコンテキストを 1 / k^exponent に比例する確率で count 個選ぶ"""
+    rng = random.Random(seed)
+    weights = list(accumulate(1 / (rank + 1) ** exponent for rank in range(len(population))))
+    return rng.choices(population, cum_weights=weights, k=count)
+
+
+def measure(flags: BulkFeatureFlags, contexts: list[dict], defaults: dict | None) -> tuple[float, float, list]:
+    """(1 評価あたりの処理時間 [us], ヒット率, 評価結果) を返す"""
+    flags.get_configuration()
+    start = time.perf_counter()
+    results = [flags.evaluate_all(context=context, defaults=defaults) for context in contexts]
+    elapsed = (time.perf_counter() - start) * 1_000_000 / len(contexts)
+    info = flags.cache_info()
+    return elapsed, info.hit_ratio if info else 0.0, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cardinality", type=int, nargs="+", default=[4, 100, 1000, 10_000, 100_000])
+    parser.add_argument("--cache-size", type=int, default=1024)
+    parser.add_argument("--evaluations", type=int, default=20_000)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--flags", type=int, default=20)
+    parser.add_argument("--rules-per-flag", type=int, default=5)
+    args = parser.parse_args()
+
+    store = StaticStore(generate_schema(args.flags, args.rules_per_flag))
+    handler_defaults = dict.fromkeys(list(store.config)[:2], False)
+
+    print(
+        f"flags={args.flags} rules_per_flag={args.rules_per_flag} cache_size={args.cache_size} "
+        f"evaluations={args.evaluations} zipf={args.zipf} (us/eval)"
+    )
+    print(
+        f"{'contexts':>9}{'handler off':>13}{'on':>8}{'hit':>6}{'speedup':>9}"
+        f"{'all off':>10}{'on':>8}{'hit':>6}{'speedup':>9}"
+    )
+    for cardinality in args.cardinality:
+        contexts = zipf_sample(generate_contexts(cardinality, customers=cardinality), args.evaluations, args.zipf)
+        row = f"{cardinality:>9}"
+        for defaults, width in ((handler_defaults, 13), (None, 10)):
+            off, _, expected = measure(BulkFeatureFlags(store=store), contexts, defaults)
+            on, hit_ratio, results = measure(BulkFeatureFlags(store=store, cache_size=args.cache_size), contexts, defaults)
+            assert results == expected
+            row += f"{off:>{width}.1f}{on:>8.1f}{hit_ratio:>6.0%}{off / on:>8.1f}x"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
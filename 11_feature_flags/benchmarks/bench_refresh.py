@@ -0,0 +1,141 @@
+"""スキーマの再取得の境界でのテールレイテンシの計測 (同期取得とバックグラウンド取得の比較)
+
+リクエストを模した評価 (Lambda 関数と同じく 2 つのフラグの evaluate_all) を一定時間繰り返し、
+1 回ごとのレイテンシの分布 (p50 / p99 / p99.9 / max) を比較する。
+
+- appconfig sync:       AppConfigStore と同様に max_age ごとに取得 (--fetch-ms の待ち) するストアを、
+                        期限が切れたあとの最初のリクエストの中で取得する (BulkFeatureFlags の既定の動作)
+- appconfig background: 同じストアを refresh_interval=max_age でバックグラウンドのスレッドから取得する
+- file sync / background: FileStore (check_interval=max_age) で、別のスレッドが max_age ごとに書き換える
+                          JSON ファイルを読み込む
+
+取得のたびにスキーマの内容を入れ替えるため、再取得のたびに検証とコンパイルも発生する。
+バックグラウンドでのコンパイルも GIL を取り合うため、リクエストへの影響は 0 にはならない。
+
+使い方:
+    python benchmarks/bench_refresh.py [--duration 3] [--max-age 0.5] [--fetch-ms 50] [--flags 200]
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aws_lambda_powertools.utilities.feature_flags.base import StoreProvider  # noqa: E402
+
+from flags import BulkFeatureFlags  # noqa: E402
+from schemas import generate_contexts, generate_schema  # noqa: E402
+from stores import FileStore  # noqa: E402
+
+
+class SlowStore(StoreProvider):
+    """AppConfigStore を模したストア (max_age 秒ごとに fetch 秒待って新しい辞書を返す)
+
+    取得のたびに 2 つのスキーマを交互に返す。
+    """
+
+    def __init__(self, schemas: list[str], max_age: float, fetch: float):
+        self.schemas = schemas
+        self.max_age = max_age
+        self.fetch = fetch
+        self.fetches = 0
+        self._config: dict | None = None
+        self._expires_at = 0.0
+
+    @property
+    def get_raw_configuration(self) -> dict[str, Any]:
+        if self._config is None or time.monotonic() >= self._expires_at:
+            time.sleep(self.fetch)  # GetLatestConfiguration の往復を模擬
+            self._config = json.loads(self.schemas[self.fetches % len(self.schemas)])
+            self.fetches += 1
+            self._expires_at = time.monotonic() + self.max_age
+        return self._config
+
+    def get_configuration(self) -> dict[str, Any]:
+        return self.get_raw_configuration
+
+
+def rewrite_periodically(path: Path, schemas: list[str], interval: float, stop: threading.Event) -> None:
+    index = 0
+    while not stop.wait(interval):
+        index += 1
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(schemas[index % len(schemas)])
+        tmp.replace(path)
+
+
+def run(flags: BulkFeatureFlags, contexts: list[dict], defaults: dict, duration: float) -> list[float]:
+    """duration 秒間評価を繰り返し、1 回ごとのレイテンシ [us] を返す"""
+    latencies = []
+    deadline = time.perf_counter() + duration
+    index = 0
+    while True:
+        start = time.perf_counter()
+        if start >= deadline:
+            return latencies
+        flags.evaluate_all(context=contexts[index % len(contexts)], defaults=defaults)
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+        index += 1
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--max-age", type=float, default=0.5)
+    parser.add_argument("--fetch-ms", type=float, default=50.0)
+    parser.add_argument("--flags", type=int, default=200)
+    parser.add_argument("--rules-per-flag", type=int, default=5)
+    args = parser.parse_args()
+
+    schemas = [
+        json.dumps(generate_schema(args.flags, args.rules_per_flag, seed=seed)) for seed in range(2)
+    ]
+    defaults = dict.fromkeys(list(json.loads(schemas[0]))[:2], False)
+    contexts = generate_contexts(1000)
+
+    print(
+        f"duration={args.duration}s max_age={args.max_age}s fetch={args.fetch_ms}ms "
+        f"flags={args.flags} rules_per_flag={args.rules_per_flag} (us)"
+    )
+    print(f"{'mode':<22}{'requests':>10}{'p50':>8}{'p99':>8}{'p99.9':>9}{'max':>10}{'>1ms':>6}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "features.json"
+        path.write_text(schemas[0])
+
+        for mode in ("appconfig sync", "appconfig background", "file sync", "file background"):
+            background = mode.endswith("background")
+            stop = threading.Event()
+            if mode.startswith("appconfig"):
+                store = SlowStore(schemas, 0 if background else args.max_age, args.fetch_ms / 1000)
+            else:
+                store = FileStore(path, check_interval=0 if background else args.max_age)
+                writer = threading.Thread(target=rewrite_periodically, args=(path, schemas, args.max_age, stop))
+                writer.start()
+
+            flags = BulkFeatureFlags(store=store, refresh_interval=args.max_age if background else None)
+            flags.refresh()
+            latencies = sorted(run(flags, contexts, defaults, args.duration))
+            flags.close()
+            stop.set()
+
+            slow = sum(1 for latency in latencies if latency > 1000)
+            print(
+                f"{mode:<22}{len(latencies):>10}{statistics.median(latencies):>8.1f}"
+                f"{percentile(latencies, 0.99):>8.1f}{percentile(latencies, 0.999):>9.1f}"
+                f"{latencies[-1]:>10.0f}{slow:>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""割合を指定した段階的リリース (PERCENTAGE_ROLLOUT) の評価時間の計測
+
+customer_id の p% を対象にするフラグを次の方法で表現し、1 回の評価時間と実際に対象になった割合を比較する。
+
+- rollout:            PERCENTAGE_ROLLOUT 条件 1 つ (BulkFeatureFlags)
+- chained (compiled): customer_id の下 2 桁ごとの ENDSWITH ルールを p 個並べる (BulkFeatureFlags)
+- chained (powertools): 同じスキーマを FeatureFlags.evaluate() で評価する (呼び出しごとの検証は省く)
+
+chained は連番の ID の下 2 桁で選ぶため、ID の採番順と相関があり、割合の変更時に対象を入れ替えずに
+増やすにはルールを追加し続ける必要がある。rollout はハッシュで選ぶため採番順と無関係で、割合を増やしても
+対象のユーザーは変わらない。
+
+使い方:
+    python benchmarks/bench_rollout.py [--percentages 1 10 50] [--ids 100000]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aws_lambda_powertools.utilities.feature_flags import FeatureFlags  # noqa: E402
+
+from flags import BulkFeatureFlags  # noqa: E402
+from rollout import bucket  # noqa: E402
+from schemas import StaticStore  # noqa: E402
+
+
+class InterpretedFeatureFlags(FeatureFlags):
+    """呼び出しごとのスキーマの検証を省いた FeatureFlags (ルールの解釈のコストだけを計測する)"""
+
+    def get_configuration(self) -> dict:
+        return self.store.get_configuration()
+
+
+def rollout_schema(percentage: int) -> dict:
+    condition = {"action": "PERCENTAGE_ROLLOUT", "key": "customer_id", "value": percentage}
+    return {"checkout": {"default": False, "rules": {"rollout": {"when_match": True, "conditions": [condition]}}}}
+
+
+def chained_schema(percentage: int) -> dict:
+    rules = {
+        f"suffix {suffix:02d}": {
+            "when_match": True,
+            "conditions": [{"action": "ENDSWITH", "key": "customer_id", "value": f"{suffix:02d}"}],
+        }
+        for suffix in range(percentage)
+    }
+    return {"checkout": {"default": False, "rules": rules}}
+
+
+def measure(flags: FeatureFlags, contexts: list[dict]) -> tuple[float, float]:
+    """(1 回の評価時間 [us], 対象になった割合) を返す"""
+    start = time.perf_counter()
+    enabled = sum(1 for context in contexts if flags.evaluate(name="checkout", context=context, default=False))
+    return (time.perf_counter() - start) * 1_000_000 / len(contexts), enabled / len(contexts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--percentages", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--ids", type=int, default=100_000)
+    args = parser.parse_args()
+
+    ids = [f"CUST-{index:07d}" for index in range(args.ids)]
+    contexts = [{"customer_id": customer_id} for customer_id in ids]
+
+    start = time.perf_counter()
+    for customer_id in ids:
+        bucket(customer_id)
+    print(f"ids={args.ids} bucket()={(time.perf_counter() - start) * 1e9 / len(ids):.0f}ns/id (us/eval, share)")
+    print(f"{'percent':>8}{'rollout':>16}{'chained compiled':>20}{'chained powertools':>22}")
+    for percentage in args.percentages:
+        row = f"{percentage:>7}%"
+        for flags, width in (
+            (BulkFeatureFlags(store=StaticStore(rollout_schema(percentage))), 9),
+            (BulkFeatureFlags(store=StaticStore(chained_schema(percentage))), 13),
+            (InterpretedFeatureFlags(store=StaticStore(chained_schema(percentage))), 15),
+        ):
+            elapsed, share = measure(flags, contexts)
+            row += f"{elapsed:>{width}.2f} {share:>6.2%}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""ベンチマーク用のフィーチャーフラグのスキーマ・コンテキスト・ストアの生成"""
+import random
+from typing import Any
+
+from aws_lambda_powertools.utilities.feature_flags.base import StoreProvider
+
+TIERS = ["standard", "silver", "gold", "premium"]
+REGIONS = ["ap-northeast-1", "ap-northeast-3", "us-east-1", "us-west-2", "eu-west-1"]
+CHANNELS = ["web", "ios", "android"]
+
+
+class StaticStore(StoreProvider):
+    """固定のスキーマを返すストア (AppConfigStore のキャッシュ期間中と同様に同じオブジェクトを返す)"""
+
+    def __init__(self, config: dict[str, Any]):
+        self.config = config
+
+    @property
+    def get_raw_configuration(self) -> dict[str, Any]:
+        return self.config
+
+    def get_configuration(self) -> dict[str, Any]:
+        return self.config
+
+
+def random_condition(rng: random.Random) -> dict[str, Any]:
+    """EC サイトで使いそうな条件をランダムに生成する"""
+    kind = rng.randrange(5)
+    if kind == 0:
+        return {"action": "EQUALS", "key": "tier", "value": rng.choice(TIERS)}
+    if kind == 1:
+        return {"action": "IN", "key": "region", "value": rng.sample(REGIONS, 2)}
+    if kind == 2:
+        return {"action": "EQUALS", "key": "channel", "value": rng.choice(CHANNELS)}
+    if kind == 3:
+        return {"action": "KEY_GREATER_THAN_OR_EQUAL_VALUE", "key": "cart_total", "value": rng.choice([1000, 5000, 10000])}
+    return {"action": "STARTSWITH", "key": "customer_id", "value": f"CUST-{rng.randrange(10)}"}
+
+
+def generate_schema(flags: int, rules: int, conditions: int = 2, seed: int = 0) -> dict[str, Any]:
+    """flags 個のフラグ (それぞれ rules 個のルール、ルールごとに conditions 個の条件) のスキーマを生成する"""
+    rng = random.Random(seed)
+    return {
+        f"flag_{index:05d}": {
+            "default": False,
+            "rules": {
+                f"rule_{rule:03d}": {
+                    "when_match": True,
+                    "conditions": [random_condition(rng) for _ in range(conditions)],
+                }
+                for rule in range(rules)
+            },
+        }
+        for index in range(flags)
+    }
+
+
+def generate_contexts(count: int, customers: int = 100_000, seed: int = 0) -> list[dict[str, Any]]:
+    """ルールの評価に使うコンテキストを生成する"""
+    rng = random.Random(seed)
+    return [
+        {
+            "tier": rng.choice(TIERS),
+            "region": rng.choice(REGIONS),
+            "channel": rng.choice(CHANNELS),
+            "cart_total": rng.randrange(0, 20_000, 100),
+            "customer_id": f"CUST-{rng.randrange(customers):06d}",
+        }
+        for _ in range(count)
+    ]
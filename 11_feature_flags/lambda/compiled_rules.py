@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Any, Callable
+
+from aws_lambda_powertools.utilities.feature_flags import schema
+from aws_lambda_powertools.utilities.feature_flags.feature_flags import RULE_ACTION_MAPPING
+
+from memo import MISSING, LRUCache
+from rollout import PERCENTAGE_ROLLOUT, RolloutRange
+
+EQUALS = schema.RuleAction.EQUALS.value
+# コンテキストではなく現在時刻と比較するアクション (条件の key が CURRENT_TIME などになる)
+TIME_BASED_ACTIONS = frozenset(
+    (
+        schema.RuleAction.SCHEDULE_BETWEEN_TIME_RANGE.value,
+        schema.RuleAction.SCHEDULE_BETWEEN_DATETIME_RANGE.value,
+        schema.RuleAction.SCHEDULE_BETWEEN_DAYS_OF_WEEK.value,
+    )
+)
+# コンテキストの値がリストに含まれるか (True) / 含まれないか (False) を判定するアクション
+MEMBERSHIP_ACTIONS = {
+    schema.RuleAction.IN.value: True,
+    schema.RuleAction.KEY_IN_VALUE.value: True,
+    schema.RuleAction.NOT_IN.value: False,
+    schema.RuleAction.KEY_NOT_IN_VALUE.value: False,
+}
+
+
+def schema_fingerprint(config: dict[str, Any]) -> str:
+    """スキーマの内容から求めるバージョン (内容が同じなら同じ値になる ETag 相当)"""
+    content = json.dumps(config, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(content.encode(), usedforsecurity=False).hexdigest()
+
+
+def _freeze(value: Any) -> Any:
+    """条件の値 (JSON) を辞書のキーに使える形に変換する"""
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def _is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+@dataclass(eq=False)
+class CompiledCondition:
+    """EQUALS 以外の条件 (内容が同じ条件はスキーマ全体で 1 つにまとめる)"""
+
+    id: int
+    test: Callable[[dict[str, Any]], bool]
+
+
+@dataclass(eq=False)
+class CompiledRule:
+    # スキーマ全体での評価順 (フラグの順、フラグ内はルールの順)
+    id: int
+    feature: str
+    when_match: Any
+    # EQUALS 条件の (key, value)。インデックスで判定する
+    equals: tuple[tuple[str, Any], ...]
+    # その他の条件
+    conditions: tuple[CompiledCondition, ...]
+    # 条件が参照するコンテキストのキー
+    keys: frozenset[str]
+    # 現在時刻と比較する条件を含むか
+    time_based: bool
+
+
+@dataclass(eq=False)
+class CompiledFeature:
+    name: str
+    default: Any
+    boolean: bool
+    rules: tuple[CompiledRule, ...]
+    has_rules: bool
+    # ルールが参照するコンテキストのキー (評価結果はこれらの値だけで決まる)
+    keys: tuple[str, ...]
+    # 評価結果をキャッシュできるか (現在時刻と比較する条件を含むフラグはキャッシュしない)
+    cacheable: bool
+
+    def cache_key(self, context: dict[str, Any]) -> tuple | None:
+        if not self.cacheable:
+            return None
+        return (self.name, tuple([context.get(key) for key in self.keys]))
+
+    def value(self, rule: CompiledRule | None) -> Any:
+        """一致したルール (なければ None) からフラグの値を求める (FeatureFlags.evaluate と同じ扱い)"""
+        if rule is not None:
+            return bool(rule.when_match) if self.boolean else rule.when_match
+        if not self.has_rules:
+            return bool(self.default) if self.boolean else self.default
+        return self.default
+
+
+class CompiledSchema:
+    """クロージャとインデックスにコンパイルしたフィーチャーフラグのスキーマ
+
+    - EQUALS 条件 (値がハッシュ可能で None 以外) は (key -> value -> ルール) のインデックスにまとめ、
+      コンテキストの各キーからインデックスを引いて、EQUALS 条件をすべて満たすルールだけを候補にする。
+    - その他の条件はアクションごとのクロージャにする (IN / NOT_IN などのリストは frozenset にしておく)。
+      条件の評価中の例外は on_error に渡す (FeatureFlags の validation_exception_handler と同じ扱い)。
+
+    evaluate() は対象のフラグのルールだけを評価し、evaluate_all() (全フラグ) はインデックスで絞り込んだ
+    候補のルールだけを評価するため、評価のコストはスキーマ全体のルール数に比例しない。
+
+    cache を渡すと、評価結果を (フラグ名, ルールが参照するコンテキストの値) をキーにキャッシュする。
+    キャッシュはこのスキーマのバージョンの評価結果だけを持つこと (バージョンが変わったら破棄すること)。
+    """
+
+    def __init__(self, config: dict[str, Any], on_error: Callable[[Exception], bool] | None = None):
+        self.on_error = on_error or (lambda exc: False)
+        self.features: dict[str, CompiledFeature] = {}
+        # key -> value -> その EQUALS 条件を持つルール
+        self.index: dict[str, dict[Any, list[CompiledRule]]] = {}
+        # EQUALS 条件を持たないルール (常に候補になる)
+        self.unindexed: list[CompiledRule] = []
+        self._conditions: dict[tuple, CompiledCondition] = {}
+        self.rule_count = 0
+
+        for name, feature in config.items():
+            self.features[name] = self._compile_feature(name, feature)
+
+        self.keys = tuple(sorted({key for feature in self.features.values() for key in feature.keys}))
+        self.cacheable = all(feature.cacheable for feature in self.features.values())
+
+    def evaluate(self, name: str, context: dict[str, Any], default: Any, cache: LRUCache | None = None) -> Any:
+        feature = self.features.get(name)
+        if feature is None:
+            return default
+        return self._feature_value(feature, context, {}, cache)
+
+    def evaluate_all(
+        self,
+        context: dict[str, Any],
+        defaults: dict[str, Any] | None = None,
+        cache: LRUCache | None = None,
+    ) -> dict[str, Any]:
+        """フラグ名 -> 値 を返す (defaults が None ならすべてのフラグ、それ以外は指定したフラグのみ)"""
+        # 同じ条件の評価結果をフラグ間で共有する
+        memo: dict[int, bool] = {}
+        if defaults is not None:
+            values = {}
+            for name, default in defaults.items():
+                feature = self.features.get(name)
+                values[name] = default if feature is None else self._feature_value(feature, context, memo, cache)
+            return values
+
+        # すべてのフラグの評価結果は、スキーマ全体で参照するコンテキストの値をキーにまとめてキャッシュする
+        cache_key = ("*", tuple([context.get(key) for key in self.keys])) if cache is not None and self.cacheable else None
+        if cache_key is not None:
+            cached = cache.get(cache_key)
+            if cached is not MISSING:
+                return dict(cached)
+
+        matched: dict[str, CompiledRule] = {}
+        for rule in self._candidates(context):
+            if rule.feature not in matched and self._test_conditions(rule, context, memo):
+                matched[rule.feature] = rule
+        values = {name: feature.value(matched.get(name)) for name, feature in self.features.items()}
+
+        if cache_key is not None:
+            cache.put(cache_key, values)
+            return dict(values)
+        return values
+
+    def _feature_value(
+        self, feature: CompiledFeature, context: dict[str, Any], memo: dict[int, bool], cache: LRUCache | None
+    ) -> Any:
+        cache_key = feature.cache_key(context) if cache is not None else None
+        if cache_key is not None:
+            value = cache.get(cache_key)
+            if value is not MISSING:
+                return value
+
+        value = feature.value(self._first_match(feature, context, memo))
+        if cache_key is not None:
+            cache.put(cache_key, value)
+        return value
+
+    def _first_match(self, feature: CompiledFeature, context: dict[str, Any], memo: dict[int, bool]):
+        for rule in feature.rules:
+            if self._test_equals(rule, context) and self._test_conditions(rule, context, memo):
+                return rule
+        return None
+
+    def _candidates(self, context: dict[str, Any]) -> list[CompiledRule]:
+        """EQUALS 条件をすべて満たすルールと EQUALS 条件を持たないルールを、評価順に並べて返す"""
+        hits: dict[CompiledRule, int] = {}
+        for key, value in context.items():
+            postings = self.index.get(key)
+            if postings is None:
+                continue
+            try:
+                rules = postings.get(value)
+            except TypeError:  # ハッシュ可能でないコンテキストの値は EQUALS 条件に一致しない
+                continue
+            if rules:
+                for rule in rules:
+                    hits[rule] = hits.get(rule, 0) + 1
+
+        candidates = [rule for rule, count in hits.items() if count == len(rule.equals)]
+        candidates.extend(self.unindexed)
+        candidates.sort(key=attrgetter("id"))
+        return candidates
+
+    @staticmethod
+    def _test_equals(rule: CompiledRule, context: dict[str, Any]) -> bool:
+        for key, value in rule.equals:
+            if context.get(key) != value:
+                return False
+        return True
+
+    @staticmethod
+    def _test_conditions(rule: CompiledRule, context: dict[str, Any], memo: dict[int, bool]) -> bool:
+        for condition in rule.conditions:
+            matched = memo.get(condition.id)
+            if matched is None:
+                matched = memo[condition.id] = condition.test(context)
+            if not matched:
+                return False
+        return True
+
+    def _compile_feature(self, name: str, feature: dict[str, Any]) -> CompiledFeature:
+        rules = feature.get(schema.RULES_KEY) or {}
+        compiled_rules = []
+        for rule in rules.values():
+            compiled = self._compile_rule(name, rule)
+            if compiled is not None:
+                compiled_rules.append(compiled)
+        return CompiledFeature(
+            name=name,
+            default=feature.get(schema.FEATURE_DEFAULT_VAL_KEY),
+            boolean=feature.get(schema.FEATURE_DEFAULT_VAL_TYPE_KEY, True),
+            rules=tuple(compiled_rules),
+            has_rules=bool(rules),
+            keys=tuple(sorted({key for rule in compiled_rules for key in rule.keys})),
+            cacheable=not any(rule.time_based for rule in compiled_rules),
+        )
+
+    def _compile_rule(self, feature: str, rule: dict[str, Any]) -> CompiledRule | None:
+        """ルールをコンパイルする (決して一致しないルールは None)"""
+        conditions = rule.get(schema.CONDITIONS_KEY)
+        if not conditions:
+            return None
+
+        equals: dict[str, Any] = {}
+        residual: dict[int, CompiledCondition] = {}
+        keys: set[str] = set()
+        time_based = False
+        for condition in conditions:
+            key = condition.get(schema.CONDITION_KEY, "")
+            action = condition.get(schema.CONDITION_ACTION, "")
+            value = condition.get(schema.CONDITION_VALUE)
+            if action in TIME_BASED_ACTIONS:
+                time_based = True
+            else:
+                keys.add(key)
+            # None との比較はキーがないコンテキストとも一致するため、インデックスでは扱わない
+            if action == EQUALS and value is not None and _is_hashable(value):
+                if key in equals and equals[key] != value:
+                    return None  # 同じキーに異なる値の EQUALS 条件
+                equals[key] = value
+            else:
+                if action == PERCENTAGE_ROLLOUT:
+                    # バケットの範囲と salt はここで 1 回だけ求める (salt の既定値はフラグ名)
+                    value = RolloutRange.from_condition(value, default_salt=feature)
+                compiled = self._compile_condition(key, action, value)
+                residual[compiled.id] = compiled
+
+        compiled_rule = CompiledRule(
+            id=self.rule_count,
+            feature=feature,
+            when_match=rule.get(schema.RULE_MATCH_VALUE),
+            equals=tuple(equals.items()),
+            conditions=tuple(residual.values()),
+            keys=frozenset(keys),
+            time_based=time_based,
+        )
+        self.rule_count += 1
+
+        if equals:
+            for key, value in equals.items():
+                self.index.setdefault(key, {}).setdefault(value, []).append(compiled_rule)
+        else:
+            self.unindexed.append(compiled_rule)
+        return compiled_rule
+
+    def _compile_condition(self, key: str, action: str, value: Any) -> CompiledCondition:
+        cache_key = (key, action, _freeze(value))
+        compiled = self._conditions.get(cache_key)
+        if compiled is None:
+            compiled = self._conditions[cache_key] = CompiledCondition(
+                id=len(self._conditions), test=self._condition_test(key, action, value)
+            )
+        return compiled
+
+    def _condition_test(self, key: str, action: str, value: Any) -> Callable[[dict[str, Any]], bool]:
+        on_error = self.on_error
+
+        if action == PERCENTAGE_ROLLOUT:
+            return value.test(key)
+
+        if action in MEMBERSHIP_ACTIONS and isinstance(value, list) and all(map(_is_hashable, value)):
+            positive = MEMBERSHIP_ACTIONS[action]
+            members = frozenset(value)
+
+            def test(context: dict[str, Any]) -> bool:
+                context_value = context.get(key)
+                try:
+                    return (context_value in members) is positive
+                except TypeError:  # ハッシュ可能でないコンテキストの値はリストと比較する
+                    return (context_value in value) is positive
+
+            return test
+
+        compare = RULE_ACTION_MAPPING.get(action, lambda a, b: False)
+        time_based = action in TIME_BASED_ACTIONS
+
+        def test(context: dict[str, Any]) -> bool:
+            try:
+                return compare(key if time_based else context.get(key), value)
+            except Exception as exc:
+                return on_error(exc)
+
+        return test
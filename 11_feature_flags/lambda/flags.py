@@ -0,0 +1,204 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from aws_lambda_powertools.utilities.feature_flags import FeatureFlags
+from aws_lambda_powertools.utilities.feature_flags.exceptions import ConfigurationStoreError
+from aws_lambda_powertools.utilities.feature_flags.types import JSONType
+
+from compiled_rules import CompiledSchema, schema_fingerprint
+from memo import CacheInfo, LRUCache
+from rollout import validate_schema
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """ストアから取得したスキーマとコンパイル結果 (入れ替えは参照の代入 1 回で行う)"""
+
+    config: dict
+    fingerprint: str
+    compiled: CompiledSchema
+    cache: LRUCache | None
+    # 最後にストアから取得できた時刻 (内容が変わらなかった場合も更新する)
+    loaded_at: float
+
+
+class BulkFeatureFlags(FeatureFlags):
+    """複数のフィーチャーフラグを 1 回の呼び出しで評価する FeatureFlags
+
+    evaluate() をフラグごとに呼び出すと、呼び出しのたびにストアからスキーマを取得して検証し、
+    ルールを最初から評価する。evaluate_all() は次の処理をフラグ間で共有する。
+
+    - スキーマの取得と検証 (1 回の呼び出しにつき 1 回)
+    - コンテキストの正規化 (None -> {})
+    - 条件の評価結果 (同じ key / action / value の条件は 1 回だけ評価する)
+
+    スキーマはストアの内容が変わったとき (schema_fingerprint が変わったとき) にだけ検証して
+    CompiledSchema にコンパイルし、evaluate() / evaluate_all() はコンパイル済みのスキーマで評価する。
+    ストアが同じオブジェクトを返す間 (AppConfigStore のキャッシュ期間中) はフィンガープリントも求めない。
+
+    cache_size を指定すると、評価結果を (フラグ名, ルールが参照するコンテキストの値) をキーに
+    最大 cache_size 件まで LRU でキャッシュする。同じ属性のユーザーが繰り返し評価されるワークロードでは
+    ルールの評価を省略できる。キャッシュはスキーマのバージョンが変わったときに破棄する。
+    現在時刻と比較する条件 (SCHEDULE_BETWEEN_* など) を含むフラグはキャッシュしない。
+
+    refresh_interval (秒) を指定すると、バックグラウンドのスレッドがその間隔でストアからスキーマを取得して
+    コンパイルし、評価に使うスナップショットを入れ替える。評価 (リクエスト) はストアを呼び出さないため、
+    AppConfigStore の max_age が切れたリクエストだけ取得を待つことがなくなる。
+    Lambda では実行環境の凍結中はスレッドも止まるため、max_staleness (秒) を指定すると、
+    最後の取得からそれ以上経っている場合はリクエストの中で取得する。
+
+    Powertools の条件に加えて、割合を指定した段階的リリースの条件 (PERCENTAGE_ROLLOUT, rollout.py) を使える。
+
+    評価結果は FeatureFlags.evaluate() と同じ (ルールの順序・when_match・デフォルト値の扱いも同じ)。
+    """
+
+    def __init__(
+        self,
+        *args,
+        cache_size: int = 0,
+        refresh_interval: float | None = None,
+        max_staleness: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._cache_size = cache_size
+        self._refresh_interval = refresh_interval
+        self._max_staleness = max_staleness
+        self._clock = clock
+        self._snapshot: _Snapshot | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: threading.Thread | None = None
+        self.refresh_errors = 0
+        if refresh_interval:
+            self._refresher = threading.Thread(target=self._refresh_loop, name="feature-flags-refresh", daemon=True)
+            self._refresher.start()
+
+    @property
+    def version(self) -> str | None:
+        """コンパイル済みのスキーマのバージョン (内容のフィンガープリント)"""
+        snapshot = self._snapshot
+        return snapshot.fingerprint if snapshot else None
+
+    def cache_info(self) -> CacheInfo | None:
+        """評価結果のキャッシュのヒット率など (キャッシュが無効なら None)"""
+        snapshot = self._snapshot
+        return snapshot.cache.info() if snapshot and snapshot.cache is not None else None
+
+    def get_configuration(self) -> dict:
+        return self._current().config
+
+    def evaluate(self, *, name: str, context: dict[str, Any] | None = None, default: JSONType) -> JSONType:
+        try:
+            snapshot = self._current()
+        except ConfigurationStoreError as err:
+            self.logger.debug(f"Failed to fetch feature flags from store, returning default provided, reason={err}")
+            return default
+        return snapshot.compiled.evaluate(name, context or {}, default, snapshot.cache)
+
+    def evaluate_all(
+        self,
+        *,
+        context: dict[str, Any] | None = None,
+        defaults: dict[str, JSONType] | None = None,
+    ) -> dict[str, JSONType]:
+        """フィーチャーフラグをまとめて評価し、フラグ名 -> 値 の辞書を返す
+
+        Parameters
+        ----------
+        context: dict[str, Any] | None
+            ルールの評価に使う属性 (例: {"tier": "premium"})
+        defaults: dict[str, JSONType] | None
+            評価するフラグ名 -> デフォルト値。
+            スキーマに存在しないフラグや、ストアからの取得に失敗した場合はデフォルト値を返す。
+            None の場合はスキーマのすべてのフラグを評価する (取得に失敗した場合は空の辞書を返す)。
+        """
+        try:
+            snapshot = self._current()
+        except ConfigurationStoreError as err:
+            self.logger.debug(f"Failed to fetch feature flags from store, returning defaults, reason={err}")
+            return dict(defaults or {})
+        return snapshot.compiled.evaluate_all(context or {}, defaults, snapshot.cache)
+
+    def get_enabled_features(self, *, context: dict[str, Any] | None = None) -> list[str]:
+        """値が真になるフラグの名前 (FeatureFlags.get_enabled_features() と同じく、真偽値以外のフラグは値の真偽で判定する)
+
+        evaluate_all() と同じく、コンパイル済みのスキーマとキャッシュで評価する (PERCENTAGE_ROLLOUT も使える)。
+        ストアからの取得に失敗した場合は空のリストを返す。
+        """
+        return [name for name, value in self.evaluate_all(context=context).items() if value]
+
+    def refresh(self) -> str:
+        """ストアからスキーマを取得し、内容が変わっていればコンパイルしてスナップショットを入れ替える
+
+        Returns
+        -------
+        str
+            スキーマのバージョン
+        """
+        return self._load().fingerprint
+
+    def close(self) -> None:
+        """バックグラウンドの取得を止める"""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+
+    def _current(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self._load()
+        if self._refresher is None:
+            config = self.store.get_configuration()
+            return snapshot if config is snapshot.config else self._load(config)
+        if self._max_staleness is not None and self._clock() - snapshot.loaded_at > self._max_staleness:
+            try:
+                return self._load()
+            except ConfigurationStoreError as err:
+                self.logger.debug(f"Failed to refresh stale feature flags, keeping previous version, reason={err}")
+        return snapshot
+
+    def _load(self, config: dict | None = None) -> _Snapshot:
+        # バックグラウンドの取得とリクエストの中の取得が重なっても、検証とコンパイルは 1 回だけ行う
+        with self._lock:
+            if config is None:
+                config = self.store.get_configuration()
+            current = self._snapshot
+            loaded_at = self._clock()
+            if current is not None and config is current.config:
+                snapshot = _Snapshot(config, current.fingerprint, current.compiled, current.cache, loaded_at)
+            else:
+                fingerprint = schema_fingerprint(config)
+                if current is not None and fingerprint == current.fingerprint:
+                    snapshot = _Snapshot(config, fingerprint, current.compiled, current.cache, loaded_at)
+                else:
+                    validate_schema(config, logger=self.logger)
+                    compiled = CompiledSchema(config, on_error=self._on_match_error)
+                    snapshot = _Snapshot(config, fingerprint, compiled, self._new_cache(current), loaded_at)
+            self._snapshot = snapshot
+            return snapshot
+
+    def _new_cache(self, current: _Snapshot | None) -> LRUCache | None:
+        """新しいバージョン用の空のキャッシュ (古いバージョンの評価中のリクエストとは共有しない)"""
+        if self._cache_size <= 0:
+            return None
+        if current is None or current.cache is None:
+            return LRUCache(self._cache_size)
+        return current.cache.renewed()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.wait(self._refresh_interval):
+            try:
+                self._load()
+            except Exception as exc:
+                # 取得や検証に失敗しても、前のスナップショットで評価を続ける
+                self.refresh_errors += 1
+                self.logger.warning(f"Failed to refresh feature flags, keeping previous version, reason={exc}")
+
+    def _on_match_error(self, exc: Exception) -> Any:
+        """条件の評価中の例外を validation_exception_handler で登録したハンドラーに渡す"""
+        handler = self._lookup_exception_handler(exc)
+        return handler(exc) if handler else False
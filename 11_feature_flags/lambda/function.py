@@ -1,19 +1,24 @@
 import json
 from typing import Any
 
-from aws_lambda_powertools.utilities.feature_flags import AppConfigStore, FeatureFlags
+from aws_lambda_powertools.utilities.feature_flags import AppConfigStore
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+from flags import BulkFeatureFlags
+
 # AppConfigStore の初期化
 app_config = AppConfigStore(
     environment="dev",
     application="ec-site",
     name="features",
-    max_age=120,  # キャッシュ時間 (秒)
+    max_age=0,  # 取得はバックグラウンドのスレッドが refresh_interval ごとに行うため、ストアではキャッシュしない
 )
 
-# FeatureFlags の初期化
-feature_flags = FeatureFlags(store=app_config)
+# FeatureFlags の初期化 (複数のフラグを 1 回の呼び出しで評価する)
+# - 評価結果はウォームスタート間で最大 1024 件キャッシュする (スキーマの更新時に破棄される)
+# - スキーマは 120 秒ごとにバックグラウンドで取得し、リクエストは取得を待たない
+#   (実行環境が 300 秒以上凍結されていた場合のみリクエストの中で取得する)
+feature_flags = BulkFeatureFlags(store=app_config, cache_size=1024, refresh_interval=120, max_staleness=300)
 
 
 def lambda_handler(event: dict[str, Any], context: LambdaContext) -> dict[str, Any]:
@@ -30,18 +35,17 @@ def lambda_handler(event: dict[str, Any], context: LambdaContext) -> dict[str, A
     # コンテキストの作成 (ルール評価に使用)
     ctx = {"tier": customer_tier}
 
-    # プレミアム機能の評価
-    has_premium_features: bool = feature_flags.evaluate(
-        name="premium_features",
+    # プレミアム機能と冬季セールキャンペーン (静的フラグ) をまとめて評価
+    # スキーマの取得とルールの評価はフラグ間で共有される
+    flag_values = feature_flags.evaluate_all(
         context=ctx,
-        default=False,
-    )
-
-    # 冬季セールキャンペーンの評価 (静的フラグのためコンテキスト不要)
-    apply_winter_sale: bool = feature_flags.evaluate(
-        name="winter_sale_campaign",
-        default=False,
+        defaults={
+            "premium_features": False,
+            "winter_sale_campaign": False,
+        },
     )
+    has_premium_features: bool = flag_values["premium_features"]
+    apply_winter_sale: bool = flag_values["winter_sale_campaign"]
 
     # 割引の適用
     final_price = base_price
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable
+
+# キャッシュにない (値が None の場合と区別する) ことを表す
+MISSING = object()
+
+
+@dataclass(frozen=True)
+class CacheInfo:
+    hits: int
+    misses: int
+    # キーがハッシュ可能でない (コンテキストにリストなどを含む) ためキャッシュしなかった回数
+    uncacheable: int
+    # 設定のバージョンが変わったためキャッシュを破棄した回数
+    invalidations: int
+    maxsize: int
+    currsize: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache:
+    """件数に上限のある LRU キャッシュ (ヒット率の集計つき)"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        except TypeError:
+            self.uncacheable += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        try:
+            self._data[key] = value
+        except TypeError:
+            return
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def renewed(self) -> "LRUCache":
+        """同じ上限で空のキャッシュを返す (ヒット率の集計は引き継ぎ、invalidations を 1 増やす)"""
+        cache = LRUCache(self.maxsize)
+        cache.hits, cache.misses, cache.uncacheable = self.hits, self.misses, self.uncacheable
+        cache.invalidations = self.invalidations + 1
+        return cache
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(
+            hits=self.hits,
+            misses=self.misses,
+            uncacheable=self.uncacheable,
+            invalidations=self.invalidations,
+            maxsize=self.maxsize,
+            currsize=len(self._data),
+        )
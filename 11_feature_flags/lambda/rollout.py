@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import logging
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from aws_lambda_powertools.utilities.feature_flags import schema
+from aws_lambda_powertools.utilities.feature_flags.exceptions import SchemaValidationError
+
+PERCENTAGE_ROLLOUT = "PERCENTAGE_ROLLOUT"
+BASIS_POINTS = 10_000
+ROLLOUT_START = "START"
+ROLLOUT_END = "END"
+ROLLOUT_SALT = "SALT"
+
+# 32 bit の黄金比の乗数 (CRC32 の線形な偏りを上位ビットに拡散する)
+_MULTIPLIER = 0x9E3779B1
+
+
+@dataclass(frozen=True)
+class RolloutRange:
+    """PERCENTAGE_ROLLOUT 条件のバケットの範囲 [start, end) と salt (スキーマのコンパイル時に求める)
+
+    コンテキストの値 (例: customer_id) をハッシュして 0 - 9,999 のバケット (ベーシスポイント) に割り当て、
+    バケットが範囲に含まれるかで判定する。同じ値は常に同じバケットになるため、割合を増やしても
+    すでに対象になっているユーザーは対象のまま (スティッキー) になる。
+
+    条件の value は次のいずれか。
+
+    - 数値: 対象にする割合 (%)。{"START": 0, "END": 割合 x 100} と同じ
+    - 辞書: {"START": 開始 (含む), "END": 終了 (含まない), "SALT": ハッシュの salt (省略時はフラグ名)}
+      (START / END はベーシスポイント。範囲を分ければ A/B テストのグループ分けにも使える)
+
+    salt が同じ条件はフラグが違っても同じユーザーを選ぶ。salt を省略するとフラグごとに異なるユーザーを選ぶ。
+
+    Powertools の SchemaValidator / FeatureFlags はこのアクションを扱えないため、
+    検証は validate_schema()、評価は BulkFeatureFlags (CompiledSchema) で行う。
+    """
+
+    start: int
+    end: int
+    salt: str
+
+    @classmethod
+    def from_condition(cls, value: Any, default_salt: str) -> RolloutRange:
+        if isinstance(value, dict):
+            return cls(value.get(ROLLOUT_START, 0), value[ROLLOUT_END], value.get(ROLLOUT_SALT, default_salt))
+        return cls(0, round(value * BASIS_POINTS / 100), default_salt)
+
+    def test(self, key: str) -> Callable[[dict[str, Any]], bool]:
+        """コンテキストの key の値のバケットが範囲に含まれるかを判定する関数"""
+        start, end = self.start, self.end
+        seed = zlib.crc32(f"{self.salt}:".encode())
+        if start <= 0 and end >= BASIS_POINTS:
+            return lambda context: context.get(key) is not None
+        if start >= end:
+            return lambda context: False
+
+        def test(context: dict[str, Any]) -> bool:
+            value = context.get(key)
+            if value is None:
+                return False
+            return start <= bucket(value, seed) < end
+
+        return test
+
+
+def bucket(value: Any, seed: int = 0) -> int:
+    """値のバケット (0 - 9,999)
+
+    CRC32 (zlib, C 実装) に xorshift と乗算を加えて偏りを抑え、上位ビットで範囲に写像する。
+    プロセスやバージョンによらず同じ値になる (hash() と異なり PYTHONHASHSEED の影響を受けない)。
+    """
+    data = value.encode() if isinstance(value, str) else str(value).encode()
+    h = zlib.crc32(data, seed)
+    h = ((h ^ (h >> 16)) * _MULTIPLIER) & 0xFFFFFFFF
+    return (h * BASIS_POINTS) >> 32
+
+
+def salted_bucket(value: Any, salt: str) -> int:
+    """salt を指定したバケット (条件の評価と同じ値になる)"""
+    return bucket(value, zlib.crc32(f"{salt}:".encode()))
+
+
+def validate_rollout_condition(condition: dict[str, Any], rule_name: str) -> None:
+    key = condition.get(schema.CONDITION_KEY)
+    if not key or not isinstance(key, str):
+        raise SchemaValidationError(f"'key' value must be a non empty string, rule={rule_name}")
+
+    value = condition.get(schema.CONDITION_VALUE)
+    if isinstance(value, bool) or not isinstance(value, (int, float, dict)):
+        raise SchemaValidationError(f"'value' must be a percentage or a dictionary, rule={rule_name}")
+    if not isinstance(value, dict):
+        if not 0 <= value <= 100:
+            raise SchemaValidationError(f"'value' must be between 0 and 100, rule={rule_name}")
+        return
+
+    start, end = value.get(ROLLOUT_START, 0), value.get(ROLLOUT_END)
+    if not all(isinstance(bound, int) and not isinstance(bound, bool) for bound in (start, end)):
+        raise SchemaValidationError(f"'{ROLLOUT_START}' and '{ROLLOUT_END}' must be integers, rule={rule_name}")
+    if not 0 <= start <= end <= BASIS_POINTS:
+        raise SchemaValidationError(f"Rollout range must satisfy 0 <= START <= END <= {BASIS_POINTS}, rule={rule_name}")
+    if not isinstance(value.get(ROLLOUT_SALT, ""), str):
+        raise SchemaValidationError(f"'{ROLLOUT_SALT}' must be a string, rule={rule_name}")
+
+
+def validate_schema(config: Any, logger: logging.Logger | None = None) -> None:
+    """SchemaValidator に PERCENTAGE_ROLLOUT の条件の検証を加えたもの
+
+    PERCENTAGE_ROLLOUT の条件はここで検証し、SchemaValidator には同じキーの EQUALS 条件に
+    置き換えた写しを渡す (ルールの構造・when_match などの検証はそのまま Powertools に任せる)。
+    """
+    schema.SchemaValidator(schema=_without_rollouts(config), logger=logger).validate()
+
+
+def _without_rollouts(config: Any) -> Any:
+    if not isinstance(config, dict):
+        return config
+
+    view = {}
+    for name, feature in config.items():
+        rules = feature.get(schema.RULES_KEY) if isinstance(feature, dict) else None
+        if not isinstance(rules, dict):
+            view[name] = feature
+            continue
+
+        view_rules = {}
+        for rule_name, rule in rules.items():
+            conditions = rule.get(schema.CONDITIONS_KEY) if isinstance(rule, dict) else None
+            if isinstance(conditions, list) and any(_is_rollout(condition) for condition in conditions):
+                view_conditions = []
+                for condition in conditions:
+                    if _is_rollout(condition):
+                        validate_rollout_condition(condition, rule_name)
+                        condition = {
+                            schema.CONDITION_ACTION: schema.RuleAction.EQUALS.value,
+                            schema.CONDITION_KEY: condition[schema.CONDITION_KEY],
+                            schema.CONDITION_VALUE: True,
+                        }
+                    view_conditions.append(condition)
+                rule = {**rule, schema.CONDITIONS_KEY: view_conditions}
+            view_rules[rule_name] = rule
+        view[name] = {**feature, schema.RULES_KEY: view_rules}
+    return view
+
+
+def _is_rollout(condition: Any) -> bool:
+    return isinstance(condition, dict) and condition.get(schema.CONDITION_ACTION) == PERCENTAGE_ROLLOUT
@@ -0,0 +1,76 @@
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from aws_lambda_powertools.utilities import jmespath_utils
+from aws_lambda_powertools.utilities.feature_flags.base import StoreProvider
+from aws_lambda_powertools.utilities.feature_flags.exceptions import ConfigurationStoreError
+
+
+class FileStore(StoreProvider):
+    """ローカルの JSON ファイルからスキーマを読み込むストア (AppConfigStore と同じインターフェース)
+
+    AWS に接続せずにフラグを多用する負荷試験を行うためのもの。
+    ファイルの更新時刻とサイズが変わったときだけ読み直し、それまでは同じオブジェクトを返す
+    (BulkFeatureFlags はオブジェクトが同じ間はスキーマを検証し直さない)。
+    更新の確認 (stat) は check_interval 秒に 1 回だけ行う。
+
+    書き込み途中などで読み込みに失敗した場合は、前に読み込んだ内容を返し、次の確認で読み直す
+    (最初の読み込みに失敗した場合は ConfigurationStoreError)。
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        check_interval: float = 1.0,
+        envelope: str | None = "",
+        jmespath_options: dict | None = None,
+        logger: logging.Logger | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__()
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.envelope = envelope
+        self.jmespath_options = jmespath_options
+        self.logger = logger or logging.getLogger(__name__)
+        self._clock = clock
+        self._config: dict[str, Any] | None = None
+        self._signature: tuple[int, int] | None = None
+        self._checked_at: float | None = None
+        self.loads = 0
+
+    @property
+    def get_raw_configuration(self) -> dict[str, Any]:
+        """ファイルの内容 (変わっていなければ前回と同じオブジェクト)"""
+        now = self._clock()
+        if self._config is not None and now - self._checked_at < self.check_interval:
+            return self._config
+        self._checked_at = now
+
+        try:
+            stat = self.path.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._signature:
+                return self._config
+            config = json.loads(self.path.read_bytes())
+        except (OSError, ValueError) as exc:
+            if self._config is None:
+                raise ConfigurationStoreError(f"Unable to read feature flags file {self.path}") from exc
+            self.logger.warning(f"Failed to reload feature flags file, keeping previous version, reason={exc}")
+            return self._config
+
+        self.logger.debug("Loaded feature flags file", extra={"path": str(self.path), "mtime_ns": signature[0]})
+        self._config = config
+        self._signature = signature
+        self.loads += 1
+        return config
+
+    def get_configuration(self) -> dict[str, Any]:
+        config = self.get_raw_configuration
+        if self.envelope:
+            config = jmespath_utils.query(data=config, envelope=self.envelope, jmespath_options=self.jmespath_options)
+        return config
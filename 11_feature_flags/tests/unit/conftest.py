@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+from aws_lambda_powertools.utilities.feature_flags.base import StoreProvider
+
+# Lambda 関数のモジュール (lambda/ 配下) をテストから import できるようにする
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lambda"))
+
+
+class FakeClock:
+    """テスト用の時計 (秒)"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class InMemoryStore(StoreProvider):
+    """テスト用のストア (AppConfigStore と同様に、更新されるまで同じオブジェクトを返す)"""
+
+    def __init__(self, config: dict[str, Any]):
+        self.config = config
+        self.calls = 0
+
+    @property
+    def get_raw_configuration(self) -> dict[str, Any]:
+        return self.config
+
+    def get_configuration(self) -> dict[str, Any]:
+        self.calls += 1
+        return self.config
+
+
+@pytest.fixture
+def memory_store():
+    return InMemoryStore
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+from aws_lambda_powertools.utilities.feature_flags import FeatureFlags
+
+from compiled_rules import CompiledSchema, schema_fingerprint
+from flags import BulkFeatureFlags
+
+KEYS = ["tier", "region", "qty", "tags"]
+VALUES = ["premium", "gold", "ap-northeast-1", 1, 10, True, "p"]
+
+
+class UnvalidatedFeatureFlags(FeatureFlags):
+    """比較用の FeatureFlags (スキーマの検証は BulkFeatureFlags 側で行うため省略する)"""
+
+    def get_configuration(self) -> dict:
+        return self.store.get_configuration()
+
+
+def random_condition(rng: random.Random) -> dict:
+    action = rng.choice(
+        ["EQUALS", "EQUALS", "EQUALS", "NOT_EQUALS", "IN", "NOT_IN", "STARTSWITH", "KEY_GREATER_THAN_VALUE", "VALUE_IN_KEY"]
+    )
+    if action in ("IN", "NOT_IN"):
+        value = rng.sample(VALUES, 2) + ([["nested"]] if rng.random() < 0.2 else [])
+    else:
+        value = rng.choice(VALUES)
+    return {"action": action, "key": rng.choice(KEYS), "value": value}
+
+
+def random_schema(rng: random.Random, flags: int = 30) -> dict:
+    schema = {}
+    for index in range(flags):
+        boolean = rng.random() < 0.8
+        feature = {"default": rng.choice([True, False]) if boolean else rng.choice([0, "off"])}
+        if not boolean:
+            feature["boolean_type"] = False
+        if rng.random() < 0.8:
+            feature["rules"] = {
+                f"rule {rule}": {
+                    "when_match": rng.choice([True, False]) if boolean else rng.choice([1, 2, "on"]),
+                    "conditions": [random_condition(rng) for _ in range(rng.randint(1, 3))],
+                }
+                for rule in range(rng.randint(1, 4))
+            }
+        schema[f"flag_{index}"] = feature
+    return schema
+
+
+def random_context(rng: random.Random) -> dict:
+    context = {}
+    for key in KEYS:
+        if rng.random() < 0.7:
+            context[key] = rng.choice(VALUES + [None, ["p", "premium"], "premium-plus"])
+    return context
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_compiled_schema_matches_powertools(memory_store, seed):
+    rng = random.Random(seed)
+    store = memory_store(random_schema(rng))
+    expected_flags = UnvalidatedFeatureFlags(store=store)
+    compiled_flags = BulkFeatureFlags(store=store)
+    subset = dict.fromkeys(rng.sample(sorted(store.config), 5), "default")
+
+    for _ in range(30):
+        context = random_context(rng)
+        expected = {name: expected_flags.evaluate(name=name, context=context, default=None) for name in store.config}
+
+        assert compiled_flags.evaluate_all(context=context) == expected
+        assert compiled_flags.evaluate_all(context=context, defaults=subset) == {name: expected[name] for name in subset}
+        for name in store.config:
+            assert compiled_flags.evaluate(name=name, context=context, default=None) == expected[name]
+
+
+def flag(*conditions: dict) -> dict:
+    return {"default": False, "rules": {"rule": {"when_match": True, "conditions": list(conditions)}}}
+
+
+def test_equals_conditions_are_indexed():
+    compiled = CompiledSchema(
+        {
+            "a": flag(
+                {"action": "EQUALS", "key": "tier", "value": "premium"},
+                {"action": "EQUALS", "key": "region", "value": "jp"},
+            ),
+            "b": flag({"action": "STARTSWITH", "key": "customer_id", "value": "C"}),
+            "c": flag(
+                {"action": "EQUALS", "key": "tier", "value": "gold"},
+                {"action": "EQUALS", "key": "tier", "value": "premium"},
+            ),
+        }
+    )
+
+    assert set(compiled.index) == {"tier", "region"}
+    assert [rule.feature for rule in compiled.unindexed] == ["b"]
+    # 同じキーに異なる値の EQUALS 条件を持つルールは決して一致しないためコンパイルしない
+    assert compiled.features["c"].rules == ()
+    assert [rule.feature for rule in compiled._candidates({"tier": "premium", "region": "jp"})] == ["a", "b"]
+    assert [rule.feature for rule in compiled._candidates({"tier": "premium"})] == ["b"]
+
+
+def test_schema_fingerprint_ignores_key_order():
+    assert schema_fingerprint({"a": {"default": True}, "b": {"default": False}}) == schema_fingerprint(
+        {"b": {"default": False}, "a": {"default": True}}
+    )
+    assert schema_fingerprint({"a": {"default": True}}) != schema_fingerprint({"a": {"default": False}})
@@ -0,0 +1,194 @@
+import copy
+
+import pytest
+from aws_lambda_powertools.utilities.feature_flags import FeatureFlags
+from aws_lambda_powertools.utilities.feature_flags.exceptions import ConfigurationStoreError, SchemaValidationError
+
+import compiled_rules
+from flags import BulkFeatureFlags
+
+SCHEMA = {
+    "premium_features": {
+        "default": False,
+        "rules": {
+            "customer tier equals premium": {
+                "when_match": True,
+                "conditions": [{"action": "EQUALS", "key": "tier", "value": "premium"}],
+            }
+        },
+    },
+    "winter_sale_campaign": {"default": True},
+    "beta_regions": {
+        "default": False,
+        "rules": {
+            "premium in tokyo": {
+                "when_match": True,
+                "conditions": [
+                    {"action": "EQUALS", "key": "tier", "value": "premium"},
+                    {"action": "IN", "key": "region", "value": ["ap-northeast-1", "ap-northeast-3"]},
+                ],
+            }
+        },
+    },
+    "discount_rate": {
+        "default": 0,
+        "boolean_type": False,
+        "rules": {
+            "gold": {"when_match": 20, "conditions": [{"action": "EQUALS", "key": "tier", "value": "gold"}]},
+            "premium": {"when_match": 10, "conditions": [{"action": "EQUALS", "key": "tier", "value": "premium"}]},
+        },
+    },
+    "quantity_limit": {
+        "default": False,
+        "rules": {
+            "bulk": {"when_match": True, "conditions": [{"action": "KEY_GREATER_THAN_VALUE", "key": "qty", "value": 10}]}
+        },
+    },
+    "free_shipping": {
+        "default": False,
+        "rules": {
+            "bulk premium": {
+                "when_match": True,
+                "conditions": [
+                    {"action": "KEY_GREATER_THAN_VALUE", "key": "qty", "value": 10},
+                    {"action": "EQUALS", "key": "tier", "value": "premium"},
+                ],
+            }
+        },
+    },
+}
+
+CONTEXTS = [
+    {},
+    {"tier": "premium"},
+    {"tier": "premium", "region": "ap-northeast-1"},
+    {"tier": "gold", "region": "us-east-1"},
+    {"tier": "standard", "qty": 20},
+    {"tier": "premium", "qty": 20},
+    {"qty": "many"},
+]
+
+
+class FailingStore:
+    def get_configuration(self):
+        raise ConfigurationStoreError("unavailable")
+
+
+@pytest.mark.parametrize("context", CONTEXTS)
+def test_evaluate_all_matches_evaluate(memory_store, context):
+    store = memory_store(SCHEMA)
+    expected = {name: FeatureFlags(store=store).evaluate(name=name, context=context, default=None) for name in SCHEMA}
+
+    assert BulkFeatureFlags(store=store).evaluate_all(context=context) == expected
+
+
+def test_evaluate_all_with_defaults_evaluates_only_given_flags(memory_store):
+    feature_flags = BulkFeatureFlags(store=memory_store(SCHEMA))
+
+    values = feature_flags.evaluate_all(
+        context={"tier": "premium"},
+        defaults={"premium_features": False, "winter_sale_campaign": False, "unknown_flag": "fallback"},
+    )
+
+    assert values == {"premium_features": True, "winter_sale_campaign": True, "unknown_flag": "fallback"}
+
+
+def test_evaluate_all_returns_defaults_when_store_fails():
+    feature_flags = BulkFeatureFlags(store=FailingStore())
+
+    assert feature_flags.evaluate_all(defaults={"premium_features": False}) == {"premium_features": False}
+    assert feature_flags.evaluate_all() == {}
+
+
+def test_schema_is_validated_and_compiled_once_per_version(memory_store, monkeypatch):
+    store = memory_store(SCHEMA)
+    feature_flags = BulkFeatureFlags(store=store)
+    validations = []
+    monkeypatch.setattr("rollout.schema.SchemaValidator.validate", lambda self: validations.append(self.schema))
+
+    feature_flags.evaluate_all(context={"tier": "premium"})
+    compiled, version = feature_flags._snapshot.compiled, feature_flags.version
+    feature_flags.evaluate_all(context={"tier": "gold"})
+    # 再取得で別のオブジェクトになっても、内容が同じならコンパイル済みのスキーマを使い続ける
+    store.config = copy.deepcopy(SCHEMA)
+    feature_flags.evaluate_all()
+
+    assert store.calls == 3
+    assert len(validations) == 1
+    assert feature_flags._snapshot.compiled is compiled
+
+    store.config = {**SCHEMA, "new_flag": {"default": True}}
+    assert feature_flags.evaluate_all()["new_flag"] is True
+    assert len(validations) == 2
+    assert feature_flags.version != version
+
+
+def test_invalid_schema_raises(memory_store):
+    feature_flags = BulkFeatureFlags(store=memory_store({"broken": {"rules": {}}}))
+
+    with pytest.raises(SchemaValidationError):
+        feature_flags.evaluate_all()
+
+
+@pytest.mark.parametrize("all_flags", [True, False])
+def test_conditions_shared_across_flags_are_evaluated_once(memory_store, monkeypatch, all_flags):
+    calls = []
+    monkeypatch.setitem(
+        compiled_rules.RULE_ACTION_MAPPING, "KEY_GREATER_THAN_VALUE", lambda a, b: calls.append((a, b)) or a > b
+    )
+    feature_flags = BulkFeatureFlags(store=memory_store(SCHEMA))
+    defaults = None if all_flags else {"quantity_limit": False, "free_shipping": False}
+
+    values = feature_flags.evaluate_all(context={"tier": "premium", "qty": 20}, defaults=defaults)
+
+    # qty > 10 は 2 つのフラグで使われるが 1 回だけ評価する
+    assert calls == [(20, 10)]
+    assert values["quantity_limit"] is True and values["free_shipping"] is True
+
+
+def test_evaluate_uses_compiled_schema(memory_store):
+    feature_flags = BulkFeatureFlags(store=memory_store(SCHEMA))
+
+    assert feature_flags.evaluate(name="discount_rate", context={"tier": "gold"}, default=None) == 20
+    assert feature_flags.evaluate(name="unknown", context={"tier": "gold"}, default="fallback") == "fallback"
+    assert BulkFeatureFlags(store=FailingStore()).evaluate(name="discount_rate", default=5) == 5
+
+
+def test_exception_handler_is_used_for_failed_comparisons(memory_store):
+    feature_flags = BulkFeatureFlags(store=memory_store(SCHEMA))
+
+    @feature_flags.validation_exception_handler(TypeError)
+    def treat_as_match(exc):
+        return True
+
+    assert feature_flags.evaluate(name="quantity_limit", context={"qty": "many"}, default=False) is True
+
+
+@pytest.mark.parametrize("context", CONTEXTS)
+def test_get_enabled_features_matches_powertools(memory_store, context):
+    store = memory_store(SCHEMA)
+
+    expected = FeatureFlags(store=store).get_enabled_features(context=context)
+
+    assert BulkFeatureFlags(store=store).get_enabled_features(context=context) == expected
+
+
+def test_get_enabled_features_matches_evaluate(memory_store):
+    def rollout(percentage):
+        condition = {"action": "PERCENTAGE_ROLLOUT", "key": "customer_id", "value": percentage}
+        return {"default": False, "rules": {"rollout": {"when_match": True, "conditions": [condition]}}}
+
+    schema = {**SCHEMA, "checkout_everyone": rollout(100), "checkout_half": rollout(50)}
+    feature_flags = BulkFeatureFlags(store=memory_store(schema), cache_size=64)
+    contexts = [{**context, "customer_id": f"CUST-{index:07d}"} for index, context in enumerate(CONTEXTS)]
+
+    # 2 周目はキャッシュした評価結果を使う
+    for context in contexts * 2:
+        expected = [name for name in schema if feature_flags.evaluate(name=name, context=context, default=False)]
+        enabled = feature_flags.get_enabled_features(context=context)
+
+        assert enabled == expected
+        assert "checkout_everyone" in enabled
+
+    assert feature_flags.cache_info().hits > 0
+    assert BulkFeatureFlags(store=FailingStore()).get_enabled_features() == []
@@ -0,0 +1,157 @@
+import copy
+
+from aws_lambda_powertools.utilities.feature_flags import FeatureFlags
+
+from flags import BulkFeatureFlags
+from memo import MISSING, LRUCache
+
+SCHEMA = {
+    "premium_features": {
+        "default": False,
+        "rules": {
+            "customer tier equals premium": {
+                "when_match": True,
+                "conditions": [{"action": "EQUALS", "key": "tier", "value": "premium"}],
+            }
+        },
+    },
+    "beta_regions": {
+        "default": False,
+        "rules": {
+            "tokyo": {
+                "when_match": True,
+                "conditions": [{"action": "IN", "key": "region", "value": ["ap-northeast-1", "ap-northeast-3"]}],
+            }
+        },
+    },
+    "winter_sale_campaign": {"default": True},
+}
+
+NIGHT_SALE = {
+    "default": False,
+    "rules": {
+        "night": {
+            "when_match": True,
+            "conditions": [
+                {
+                    "action": "SCHEDULE_BETWEEN_TIME_RANGE",
+                    "key": "CURRENT_TIME",
+                    "value": {"START": "00:00", "END": "23:59", "TIMEZONE": "Asia/Tokyo"},
+                }
+            ],
+        }
+    },
+}
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    info = cache.info()
+    assert (info.hits, info.misses, info.currsize) == (3, 1, 2)
+
+
+def test_lru_cache_skips_unhashable_keys():
+    cache = LRUCache(maxsize=2)
+    cache.put(("tags", ["a"]), True)
+
+    assert cache.get(("tags", ["a"])) is MISSING
+    assert len(cache) == 0
+    assert cache.info().uncacheable == 1
+
+
+def test_results_are_cached_by_referenced_context_keys(memory_store):
+    flags = BulkFeatureFlags(store=memory_store(SCHEMA), cache_size=16)
+
+    assert flags.evaluate(name="premium_features", context={"tier": "premium", "user": "a"}, default=False) is True
+    # premium_features のルールは tier だけを参照するので、user が違ってもキャッシュにヒットする
+    assert flags.evaluate(name="premium_features", context={"tier": "premium", "user": "b"}, default=False) is True
+    assert flags.evaluate(name="premium_features", context={"tier": "standard"}, default=False) is False
+
+    info = flags.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+
+
+def test_evaluate_all_caches_whole_result(memory_store):
+    flags = BulkFeatureFlags(store=memory_store(SCHEMA), cache_size=16)
+    context = {"tier": "premium", "region": "ap-northeast-1"}
+
+    first = flags.evaluate_all(context=context)
+    first["premium_features"] = "mutated"
+    second = flags.evaluate_all(context={**context, "user": "other"})
+
+    assert second == {"premium_features": True, "beta_regions": True, "winter_sale_campaign": True}
+    assert flags.cache_info().hits == 1
+
+
+def test_cache_is_invalidated_when_schema_changes(memory_store):
+    store = memory_store(SCHEMA)
+    flags = BulkFeatureFlags(store=store, cache_size=16)
+    context = {"tier": "premium"}
+    assert flags.evaluate(name="premium_features", context=context, default=False) is True
+
+    changed = copy.deepcopy(SCHEMA)
+    changed["premium_features"]["rules"]["customer tier equals premium"]["when_match"] = False
+    store.config = changed
+
+    assert flags.evaluate(name="premium_features", context=context, default=False) is False
+    info = flags.cache_info()
+    assert (info.hits, info.invalidations) == (0, 1)
+
+
+def test_cache_survives_refresh_with_same_content(memory_store):
+    store = memory_store(SCHEMA)
+    flags = BulkFeatureFlags(store=store, cache_size=16)
+    flags.evaluate(name="premium_features", context={"tier": "premium"}, default=False)
+
+    # AppConfigStore はキャッシュの期限が切れると内容が同じでも新しい辞書を返す
+    store.config = copy.deepcopy(SCHEMA)
+    flags.evaluate(name="premium_features", context={"tier": "premium"}, default=False)
+
+    info = flags.cache_info()
+    assert (info.hits, info.invalidations) == (1, 0)
+
+
+def test_time_based_flags_are_not_cached(memory_store):
+    schema = {**SCHEMA, "night_sale": NIGHT_SALE}
+    flags = BulkFeatureFlags(store=memory_store(schema), cache_size=16)
+
+    for _ in range(3):
+        flags.evaluate(name="night_sale", context={}, default=False)
+        flags.evaluate_all(context={"tier": "premium"})
+
+    info = flags.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (0, 0, 0)
+
+
+def test_cached_values_match_upstream(memory_store):
+    upstream = FeatureFlags(store=memory_store(SCHEMA))
+    flags = BulkFeatureFlags(store=memory_store(SCHEMA), cache_size=4)
+    contexts = [
+        {"tier": tier, "region": region}
+        for tier in ("premium", "standard", "gold")
+        for region in ("ap-northeast-1", "us-east-1")
+    ]
+
+    for context in contexts * 3:
+        for name in SCHEMA:
+            expected = upstream.evaluate(name=name, context=context, default=None)
+            assert flags.evaluate(name=name, context=context, default=None) == expected
+
+    info = flags.cache_info()
+    assert info.currsize == 4
+    assert info.hits > 0
+
+
+def test_cache_is_disabled_by_default(memory_store):
+    flags = BulkFeatureFlags(store=memory_store(SCHEMA))
+
+    assert flags.evaluate(name="premium_features", context={"tier": "premium"}, default=False) is True
+    assert flags.cache_info() is None
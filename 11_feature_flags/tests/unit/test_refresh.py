@@ -0,0 +1,134 @@
+import copy
+import threading
+
+from aws_lambda_powertools.utilities.feature_flags.exceptions import ConfigurationStoreError
+
+from flags import BulkFeatureFlags
+
+SCHEMA = {
+    "premium_features": {
+        "default": False,
+        "rules": {
+            "customer tier equals premium": {
+                "when_match": True,
+                "conditions": [{"action": "EQUALS", "key": "tier", "value": "premium"}],
+            }
+        },
+    },
+}
+
+DISABLED = {"premium_features": {"default": False}}
+
+
+class ControlledStore:
+    """取得のたびに get_configuration を呼び、失敗も起こせるストア"""
+
+    def __init__(self, store):
+        self.store = store
+        self.fail = False
+
+    def get_configuration(self):
+        if self.fail:
+            raise ConfigurationStoreError("unavailable")
+        return self.store.get_configuration()
+
+
+def premium(flags):
+    return flags.evaluate(name="premium_features", context={"tier": "premium"}, default=None)
+
+
+def test_requests_do_not_fetch_between_refreshes(memory_store):
+    store = memory_store(SCHEMA)
+    # 間隔を長くしてバックグラウンドの取得を起こさず、refresh() で入れ替える
+    flags = BulkFeatureFlags(store=store, refresh_interval=3600)
+    try:
+        assert premium(flags) is True
+        store.config = DISABLED
+        assert premium(flags) is True
+        assert store.calls == 1
+
+        flags.refresh()
+        assert premium(flags) is False
+        assert store.calls == 2
+    finally:
+        flags.close()
+
+
+def test_background_thread_swaps_snapshot(memory_store):
+    store = memory_store(SCHEMA)
+    flags = BulkFeatureFlags(store=store, refresh_interval=0.01)
+    try:
+        version = flags.refresh()
+        store.config = DISABLED
+        swapped = threading.Event()
+        for _ in range(500):
+            if flags.version != version:
+                swapped.set()
+                break
+            swapped.wait(0.01)
+
+        assert swapped.is_set()
+        assert premium(flags) is False
+    finally:
+        flags.close()
+
+
+def test_failed_refresh_keeps_previous_version(memory_store):
+    store = ControlledStore(memory_store(SCHEMA))
+    flags = BulkFeatureFlags(store=store, refresh_interval=0.01)
+    try:
+        flags.refresh()
+        store.fail = True
+        waiter = threading.Event()
+        for _ in range(500):
+            if flags.refresh_errors:
+                break
+            waiter.wait(0.01)
+
+        assert flags.refresh_errors > 0
+
+        assert premium(flags) is True
+    finally:
+        flags.close()
+
+
+def test_stale_snapshot_is_refreshed_in_request(memory_store, clock):
+    store = ControlledStore(memory_store(SCHEMA))
+    flags = BulkFeatureFlags(store=store, refresh_interval=3600, max_staleness=300, clock=clock)
+    try:
+        assert premium(flags) is True
+        store.store.config = DISABLED
+
+        clock.advance(299)
+        assert premium(flags) is True
+        clock.advance(2)
+        assert premium(flags) is False
+
+        # 取得に失敗した場合は古いスナップショットで評価を続ける
+        store.store.config = SCHEMA
+        store.fail = True
+        clock.advance(301)
+        assert premium(flags) is False
+    finally:
+        flags.close()
+
+
+def test_cache_is_renewed_with_new_version(memory_store):
+    store = memory_store(SCHEMA)
+    flags = BulkFeatureFlags(store=store, cache_size=8, refresh_interval=3600)
+    try:
+        premium(flags)
+        premium(flags)
+        old_cache = flags._snapshot.cache
+
+        store.config = copy.deepcopy(SCHEMA)
+        flags.refresh()
+        assert flags._snapshot.cache is old_cache
+
+        store.config = DISABLED
+        flags.refresh()
+        info = flags.cache_info()
+        assert flags._snapshot.cache is not old_cache
+        assert (info.hits, info.currsize, info.invalidations) == (1, 0, 1)
+    finally:
+        flags.close()
@@ -0,0 +1,125 @@
+import pytest
+from aws_lambda_powertools.utilities.feature_flags.exceptions import SchemaValidationError
+
+from flags import BulkFeatureFlags
+from rollout import BASIS_POINTS, bucket, salted_bucket, validate_schema
+
+IDS = [f"CUST-{index:07d}" for index in range(1_000_000)]
+
+
+def rollout_flag(value, key="customer_id"):
+    return {
+        "default": False,
+        "rules": {
+            "rollout": {
+                "when_match": True,
+                "conditions": [{"action": "PERCENTAGE_ROLLOUT", "key": key, "value": value}],
+            }
+        },
+    }
+
+
+def enabled(flags, name, ids):
+    return {
+        customer_id
+        for customer_id in ids
+        if flags.evaluate(name=name, context={"customer_id": customer_id}, default=False)
+    }
+
+
+def test_buckets_are_stable():
+    # 値が変わるとリリース中のユーザーの割り当てが入れ替わるため、固定値で確認する
+    assert bucket("CUST-0000001") == 2442
+    assert salted_bucket("CUST-0000001", "new_checkout") == 2070
+    assert salted_bucket(12345, "new_checkout") == salted_bucket("12345", "new_checkout") == 1292
+
+
+def test_buckets_are_uniform_over_one_million_ids():
+    counts = [0] * 100
+    for customer_id in IDS:
+        counts[bucket(customer_id, 0) * 100 // BASIS_POINTS] += 1
+
+    expected = len(IDS) / len(counts)
+    chi_square = sum((count - expected) ** 2 / expected for count in counts)
+    # 自由度 99 の χ² 分布の上側 0.1% 点は約 148.2
+    assert chi_square < 148.2
+    assert sum(counts[:10]) / len(IDS) == pytest.approx(0.10, abs=0.002)
+
+
+def test_rollout_is_sticky_when_percentage_grows(memory_store):
+    ids = IDS[:20_000]
+    ten = enabled(BulkFeatureFlags(store=memory_store({"checkout": rollout_flag(10)})), "checkout", ids)
+    twenty = enabled(BulkFeatureFlags(store=memory_store({"checkout": rollout_flag(20)})), "checkout", ids)
+
+    assert ten < twenty
+    assert len(ten) / len(ids) == pytest.approx(0.10, abs=0.01)
+    assert len(twenty) / len(ids) == pytest.approx(0.20, abs=0.01)
+
+
+def test_salt_defaults_to_flag_name(memory_store):
+    ids = IDS[:2_000]
+    flags = BulkFeatureFlags(
+        store=memory_store(
+            {
+                "a": rollout_flag(50),
+                "b": rollout_flag(50),
+                "c": rollout_flag({"END": 5000, "SALT": "shared"}),
+                "d": rollout_flag({"END": 5000, "SALT": "shared"}),
+            }
+        )
+    )
+
+    assert enabled(flags, "a", ids) != enabled(flags, "b", ids)
+    assert enabled(flags, "c", ids) == enabled(flags, "d", ids)
+
+
+def test_ranges_split_users_into_groups(memory_store):
+    ids = IDS[:2_000]
+    flags = BulkFeatureFlags(
+        store=memory_store(
+            {
+                "group_a": rollout_flag({"START": 0, "END": 5000, "SALT": "experiment"}),
+                "group_b": rollout_flag({"START": 5000, "END": 10000, "SALT": "experiment"}),
+            }
+        )
+    )
+    group_a, group_b = enabled(flags, "group_a", ids), enabled(flags, "group_b", ids)
+
+    assert not group_a & group_b
+    assert group_a | group_b == set(ids)
+
+
+@pytest.mark.parametrize("value, expected", [(0, False), (100, True)])
+def test_bounds(memory_store, value, expected):
+    flags = BulkFeatureFlags(store=memory_store({"checkout": rollout_flag(value)}))
+
+    assert flags.evaluate(name="checkout", context={"customer_id": "CUST-1"}, default=None) is expected
+    assert flags.evaluate(name="checkout", context={}, default=None) is False
+
+
+def test_rollout_combines_with_other_conditions(memory_store):
+    flag = rollout_flag(100)
+    flag["rules"]["rollout"]["conditions"].append({"action": "EQUALS", "key": "tier", "value": "premium"})
+    flags = BulkFeatureFlags(store=memory_store({"checkout": flag}))
+
+    assert flags.evaluate_all(context={"customer_id": "CUST-1", "tier": "premium"}) == {"checkout": True}
+    assert flags.evaluate_all(context={"customer_id": "CUST-1", "tier": "standard"}) == {"checkout": False}
+
+
+@pytest.mark.parametrize(
+    "value",
+    [101, -1, True, "10", {"START": 0}, {"START": 6000, "END": 5000}, {"END": 10001}, {"END": 10, "SALT": 1}],
+)
+def test_invalid_rollout_is_rejected(value):
+    with pytest.raises(SchemaValidationError):
+        validate_schema({"checkout": rollout_flag(value)})
+
+
+def test_other_rules_are_still_validated_by_powertools():
+    flag = rollout_flag(10)
+    flag["rules"]["rollout"]["when_match"] = "yes"  # boolean のフラグに bool 以外の値
+
+    with pytest.raises(SchemaValidationError):
+        validate_schema({"checkout": flag})
+    with pytest.raises(SchemaValidationError):
+        validate_schema({"checkout": rollout_flag(10, key="")})
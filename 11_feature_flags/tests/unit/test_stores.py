@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+from aws_lambda_powertools.utilities.feature_flags.exceptions import ConfigurationStoreError
+
+from flags import BulkFeatureFlags
+from stores import FileStore
+
+SCHEMA = {
+    "premium_features": {
+        "default": False,
+        "rules": {
+            "customer tier equals premium": {
+                "when_match": True,
+                "conditions": [{"action": "EQUALS", "key": "tier", "value": "premium"}],
+            }
+        },
+    },
+}
+
+
+def write(path, config, mtime_ns):
+    path.write_text(json.dumps(config))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_file_is_reloaded_only_when_modified(tmp_path, clock):
+    path = tmp_path / "features.json"
+    write(path, SCHEMA, 1_000_000_000)
+    store = FileStore(path, check_interval=1.0, clock=clock)
+
+    first = store.get_configuration()
+    clock.advance(2)
+    assert store.get_configuration() is first
+
+    write(path, {**SCHEMA, "new_flag": {"default": True}}, 2_000_000_000)
+    # check_interval が経過するまでは確認しない
+    assert store.get_configuration() is first
+    clock.advance(2)
+    assert "new_flag" in store.get_configuration()
+    assert store.loads == 2
+
+
+def test_missing_file_raises(tmp_path):
+    store = FileStore(tmp_path / "missing.json")
+
+    with pytest.raises(ConfigurationStoreError):
+        store.get_configuration()
+    assert BulkFeatureFlags(store=store).evaluate(name="premium_features", default=True) is True
+
+
+def test_broken_update_keeps_previous_version(tmp_path, clock):
+    path = tmp_path / "features.json"
+    write(path, SCHEMA, 1_000_000_000)
+    store = FileStore(path, check_interval=0, clock=clock)
+    first = store.get_configuration()
+
+    path.write_text('{"premium_features": ')
+    assert store.get_configuration() is first
+
+    write(path, {"winter_sale_campaign": {"default": True}}, 3_000_000_000)
+    assert store.get_configuration() == {"winter_sale_campaign": {"default": True}}
+
+
+def test_envelope_extracts_features(tmp_path):
+    path = tmp_path / "features.json"
+    path.write_text(json.dumps({"features": SCHEMA}))
+    flags = BulkFeatureFlags(store=FileStore(path, envelope="features"))
+
+    assert flags.evaluate(name="premium_features", context={"tier": "premium"}, default=False) is True
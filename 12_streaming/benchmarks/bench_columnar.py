@@ -0,0 +1,103 @@
+"""CSV の行ごとの読み込みと列ごとのバッチ読み込み (ColumnarCsvTransform) の集計スループット計測
+
+注文 CSV (gzip) を展開しながら次の方法で集計し、1 秒あたりの処理行数を比較する。
+
+- per-row Decimal: 変更前の Lambda 関数と同じ (csv.DictReader の行ごとに int() / Decimal() で計算する)
+- rows:            csv.DictReader の行を OrderAggregator.add() で集計する
+- batch <backend>: ColumnarCsvTransform (quantity を int に変換) の ColumnBatch を
+                   OrderAggregator.add_batch() で集計する (numpy は NumPy がある場合のみ)
+
+それぞれ --repeat 回計測して最も速い結果を使う。
+
+使い方:
+    python benchmarks/bench_columnar.py [--rows 1000000] [--batch-size 250 1000 10000] [--repeat 3]
+"""
+import argparse
+import csv
+import gzip
+import io
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aggregation import OrderAggregator  # noqa: E402
+from columnar import ColumnarCsvTransform, numpy  # noqa: E402
+from orders import orders_csv_gz  # noqa: E402
+
+
+def text_stream(data: bytes) -> io.TextIOWrapper:
+    return io.TextIOWrapper(gzip.GzipFile(fileobj=io.BytesIO(data)), encoding="utf-8")
+
+
+def per_row_decimal(data: bytes) -> int:
+    total_orders = 0
+    total_revenue = Decimal("0")
+    products: dict[str, dict] = {}
+    customers: set[str] = set()
+    for row in csv.DictReader(text_stream(data)):
+        total_orders += 1
+        quantity = int(row["quantity"])
+        revenue = quantity * Decimal(row["unit_price"])
+        total_revenue += revenue
+        product_name = row["product_name"]
+        if product_name not in products:
+            products[product_name] = {"quantity": 0, "revenue": Decimal("0")}
+        products[product_name]["quantity"] += quantity
+        products[product_name]["revenue"] += revenue
+        customers.add(row["customer_id"])
+    return total_orders
+
+
+def rows(data: bytes) -> int:
+    aggregator = OrderAggregator()
+    for row in csv.DictReader(text_stream(data)):
+        aggregator.add(row)
+    return aggregator.result()["total_orders"]
+
+
+def batches(batch_size: int, backend: str):
+    def run(data: bytes) -> int:
+        transform = ColumnarCsvTransform(batch_size=batch_size, types={"quantity": int}, backend=backend)
+        aggregator = OrderAggregator()
+        for batch in transform.transform(gzip.GzipFile(fileobj=io.BytesIO(data))):
+            aggregator.add_batch(batch)
+        return aggregator.result()["total_orders"]
+
+    return run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[250, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = orders_csv_gz(args.rows)
+    backends = ["list", "array"] + (["numpy"] if numpy is not None else [])
+    modes = [("per-row Decimal", per_row_decimal), ("rows", rows)]
+    modes += [
+        (f"batch {backend} x{batch_size}", batches(batch_size, backend))
+        for batch_size in args.batch_size
+        for backend in backends
+    ]
+
+    print(f"rows={args.rows} ({len(data) / 1024 / 1024:.1f}MiB gzip) numpy={'yes' if numpy is not None else 'no'}")
+    print(f"{'mode':<24}{'rows/s':>12}{'speedup':>9}")
+    baseline = None
+    for name, run in modes:
+        best = 0.0
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            count = run(data)
+            best = max(best, count / (time.perf_counter() - start))
+        assert count == args.rows
+        baseline = baseline or best
+        print(f"{name:<24}{best:>12.0f}{best / baseline:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""分割されたエクスポート (prefix 配下の複数の *.csv.gz) の並行読み込み (fan-in) のスループット計測
+
+同じ注文 (--rows 行) を 1〜64 個のオブジェクトに分けてローカル S3 (local_s3.LocalS3Client) に置き、
+Lambda 関数の prefix 指定と同じ方法 (list_objects + map_objects でオブジェクトごとに OrderAggregator で集計し、
+終わった順に merge する) で集計する。--concurrency ごとに rows/s と 1 並列に対する速度を表示する。
+
+ローカル S3 にはリクエストごとのレイテンシ (ListObjectsV2 / HeadObject / GetObject) と接続ごとの帯域を設定する。
+オブジェクトが小さいほどリクエストの待ち時間の割合が大きくなり、並行に読むことでその待ち時間を重ねられる。
+解凍と CSV の処理は GIL のため並行にならないので、CPU が 1 つの環境では処理時間そのものは短くならない。
+
+それぞれ --repeat 回計測して最も速い結果を使う。
+
+使い方:
+    python benchmarks/bench_fanin.py [--rows 1000000] [--parts 1 2 4 8 16 32 64] [--concurrency 1 4 8 16]
+        [--latency-ms 20] [--bandwidth-mib 4] [--repeat 2]
+"""
+import argparse
+import gzip
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aggregation import OrderAggregator  # noqa: E402
+from fanin import S3ObjectSummary, list_objects, map_objects  # noqa: E402
+from local_s3 import LocalS3Client  # noqa: E402
+from orders import HEADER, order_lines  # noqa: E402
+from readahead import MiB, ReadAheadS3Object  # noqa: E402
+from resumable import ResumableCsvTransform  # noqa: E402
+
+
+def put_parts(client: LocalS3Client, rows: int, parts: int) -> str:
+    """rows 行の注文を parts 個のオブジェクトに分けて置き、prefix を返す"""
+    prefix = f"exports/parts={parts}/"
+    size = -(-rows // parts)
+    for index, start in enumerate(range(0, rows, size)):
+        lines = order_lines(min(size, rows - start), seed=index, start=start)
+        body = gzip.compress((HEADER + "".join(lines)).encode(), compresslevel=6)
+        client.put_object(Bucket="bench", Key=f"{prefix}part-{index:05d}.csv.gz", Body=body)
+    return prefix
+
+
+def aggregate_prefix(client: LocalS3Client, prefix: str, concurrency: int) -> OrderAggregator:
+    """Lambda 関数の prefix 指定と同じ集計"""
+
+    def aggregate_object(summary: S3ObjectSummary) -> OrderAggregator:
+        partial = OrderAggregator()
+        s3_object = ReadAheadS3Object(bucket="bench", key=summary.key, boto3_client=client, max_workers=0)
+        s3_object.transform(ResumableCsvTransform(types={"quantity": int}), in_place=True)
+        try:
+            for batch in s3_object.transformed_stream:
+                partial.add_batch(batch)
+        finally:
+            s3_object.close()
+        return partial
+
+    aggregator = OrderAggregator()
+    objects = list_objects(client, "bench", prefix=prefix, suffix=".csv.gz")
+    for _, partial in map_objects(aggregate_object, objects, max_concurrency=concurrency):
+        aggregator.merge(partial)
+    return aggregator
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--parts", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--bandwidth-mib", type=float, default=4.0, help="接続ごとの帯域 (MiB/s)")
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        client = LocalS3Client(root, latency=args.latency_ms / 1000, bandwidth=args.bandwidth_mib * MiB)
+        prefixes = {parts: put_parts(client, args.rows, parts) for parts in args.parts}
+
+        print(f"rows={args.rows} latency={args.latency_ms}ms bandwidth={args.bandwidth_mib}MiB/s per connection")
+        print(f"{'parts':>6}{'MiB/part':>10}" + "".join(f"{f'x{c} rows/s':>16}" for c in args.concurrency))
+        for parts, prefix in prefixes.items():
+            size = sum(summary.size for summary in list_objects(client, "bench", prefix=prefix)) / parts
+            cells = []
+            baseline = None
+            for concurrency in args.concurrency:
+                elapsed = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    aggregator = aggregate_prefix(client, prefix, concurrency)
+                    elapsed.append(time.perf_counter() - start)
+                    assert aggregator.total_orders == args.rows
+                throughput = args.rows / min(elapsed)
+                baseline = baseline or throughput
+                cells.append(f"{throughput:>9.0f} ({throughput / baseline:.1f}x)")
+            print(f"{parts:>6}{size / MiB:>10.2f}" + "".join(f"{cell:>16}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""バイト範囲の並列先読み (ReadAheadS3Object) のスループット計測
+
+ローカル S3 (local_s3.LocalS3Client) にリクエストごとのレイテンシと接続ごとの帯域を設定し、
+S3Object (1 本のストリーム) と ReadAheadS3Object (max_workers 並列) を比較する。
+
+- raw: オブジェクト (乱数のバイト列) を 1 MiB ずつ最後まで読む (MiB/s)
+- orders: 注文 CSV (gzip) を is_gzip / is_csv で 1 行ずつ読み、Lambda 関数と同じ集計をする (rows/s)
+
+それぞれ --repeat 回計測して最も速い結果を使う。
+
+使い方:
+    python benchmarks/bench_readahead.py [--raw-mib 128] [--rows 500000] [--latency-ms 20]
+        [--bandwidth-mib 40] [--workers 2 4 8 16] [--chunk-mib 8] [--repeat 3]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aws_lambda_powertools.utilities.streaming import S3Object  # noqa: E402
+
+from local_s3 import LocalS3Client  # noqa: E402
+from orders import orders_csv_gz  # noqa: E402
+from readahead import MiB, ReadAheadS3Object  # noqa: E402
+
+
+def read_all(s3_object) -> int:
+    total = 0
+    while data := s3_object.read(MiB):
+        total += len(data)
+    return total
+
+
+def aggregate(s3_object) -> int:
+    """Lambda 関数と同じ集計 (行数を返す)"""
+    rows = 0
+    revenue = Decimal("0")
+    products: dict[str, Decimal] = {}
+    customers: set[str] = set()
+    for row in s3_object:
+        rows += 1
+        amount = int(row["quantity"]) * Decimal(row["unit_price"])
+        revenue += amount
+        products[row["product_name"]] = products.get(row["product_name"], Decimal("0")) + amount
+        customers.add(row["customer_id"])
+    return rows
+
+
+def measure(run) -> float:
+    """run() が返す量 / 経過秒"""
+    start = time.perf_counter()
+    amount = run()
+    return amount / (time.perf_counter() - start)
+
+
+def open_object(client: LocalS3Client, key: str, workers: int, chunk_size: int, **options):
+    if workers == 0:
+        return S3Object(bucket="bench", key=key, boto3_client=client, **options)
+    return ReadAheadS3Object(
+        bucket="bench", key=key, boto3_client=client, chunk_size=chunk_size, max_workers=workers, **options
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--raw-mib", type=int, default=128)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--bandwidth-mib", type=float, default=40.0, help="接続ごとの帯域 (MiB/s)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8, 16])
+    parser.add_argument("--chunk-mib", type=float, default=8.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    chunk_size = int(args.chunk_mib * MiB)
+    with tempfile.TemporaryDirectory() as root:
+        client = LocalS3Client(root, latency=args.latency_ms / 1000, bandwidth=args.bandwidth_mib * MiB)
+        client.put_object(Bucket="bench", Key="raw.bin", Body=random.Random(0).randbytes(args.raw_mib * MiB))
+        orders = orders_csv_gz(args.rows)
+        client.put_object(Bucket="bench", Key="orders.csv.gz", Body=orders)
+
+        print(
+            f"latency={args.latency_ms}ms bandwidth={args.bandwidth_mib}MiB/s per connection chunk={args.chunk_mib}MiB "
+            f"raw={args.raw_mib}MiB orders={args.rows} rows ({len(orders) / MiB:.1f}MiB gzip)"
+        )
+        print(f"{'reader':<16}{'raw MiB/s':>10}{'speedup':>9}{'orders rows/s':>15}{'speedup':>9}{'requests':>10}")
+        baseline = None
+        for workers in [0, *args.workers]:
+            client.requests = 0
+            raw = max(
+                measure(lambda: read_all(open_object(client, "raw.bin", workers, chunk_size))) / MiB
+                for _ in range(args.repeat)
+            )
+            throughput = max(
+                measure(
+                    lambda: aggregate(
+                        open_object(client, "orders.csv.gz", workers, chunk_size, is_gzip=True, is_csv=True)
+                    )
+                )
+                for _ in range(args.repeat)
+            )
+            requests = client.requests // args.repeat
+
+            baseline = baseline or (raw, throughput)
+            name = "sequential" if workers == 0 else f"read-ahead x{workers}"
+            print(
+                f"{name:<16}{raw:>10.1f}{raw / baseline[0]:>8.1f}x{throughput:>15.0f}"
+                f"{throughput / baseline[1]:>8.1f}x{requests:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
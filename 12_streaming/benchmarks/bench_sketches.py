@@ -0,0 +1,146 @@
+"""ユニーク数 (HyperLogLog) と売上の上位 (SpaceSaving) のメモリと精度の計測
+
+注文 CSV を生成しながら ColumnBatch で読み、同じバッチを次の方法で集計して比較する。
+
+- exact:            変更前と同じく顧客 ID の set と商品ごとの dict で数える (メモリは顧客数・商品数に比例する)
+- hll p=<n>:        HyperLogLog (レジスタ 2^n バイト) で顧客のユニーク数を推定する
+- top capacity=<n>: SpaceSaving (n 個のカウンター) で売上の上位 10 商品を追跡する
+
+メモリは集計に使うオブジェクトの大きさ (sys.getsizeof の合計)。
+HyperLogLog は真のユニーク数との相対誤差を、SpaceSaving は上位 10 商品の一致数と売上の最大の相対誤差を表示する。
+売上の合計は整数のセントで数えるため、どの方法でも正確な値になる。
+
+使い方:
+    python benchmarks/bench_sketches.py [--rows 50000000] [--customers 10000000] [--products 1000000]
+                                        [--precision 10 12 14 16] [--capacity 20 50 100 1000]
+"""
+import argparse
+import sys
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lambda"))
+
+from aggregation import TOP_PRODUCTS, to_cents  # noqa: E402
+from columnar import ColumnBatchReader  # noqa: E402
+from orders import HEADER, order_lines  # noqa: E402
+from sketches import HyperLogLog, SpaceSaving  # noqa: E402
+
+BATCH_SIZE = 1_000
+
+
+def csv_lines(rows: int, customers: int, products: int) -> Iterator[str]:
+    yield HEADER
+    yield from order_lines(rows, customers=customers, products=products)
+
+
+def size_of_strings(values) -> int:
+    return sum(map(sys.getsizeof, values))
+
+
+def exact_nbytes(customers: set[str], products: dict[str, list[int]]) -> int:
+    customer_bytes = sys.getsizeof(customers) + size_of_strings(customers)
+    product_bytes = sys.getsizeof(products) + size_of_strings(products)
+    product_bytes += sum(sys.getsizeof(counter) + size_of_strings(counter) for counter in products.values())
+    return customer_bytes + product_bytes
+
+
+def space_saving_nbytes(sketch: SpaceSaving) -> int:
+    counters = sketch._counters
+    size = sys.getsizeof(counters) + size_of_strings(counters)
+    size += sum(sys.getsizeof(counter) + size_of_strings(counter) for counter in counters.values())
+    return size + sys.getsizeof(sketch._heap) + sum(map(sys.getsizeof, sketch._heap))
+
+
+def human(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TiB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--customers", type=int, default=10_000_000)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--precision", type=int, nargs="+", default=[10, 12, 14, 16])
+    parser.add_argument("--capacity", type=int, nargs="+", default=[20, 50, 100, 1_000])
+    args = parser.parse_args()
+
+    customers: set[str] = set()
+    products: dict[str, list[int]] = {}
+    revenue_cents = 0
+    hlls = {precision: HyperLogLog(precision) for precision in args.precision}
+    tops = {capacity: SpaceSaving(capacity) for capacity in args.capacity}
+    elapsed = {"exact": 0.0, **{f"hll p={p}": 0.0 for p in hlls}, **{f"top capacity={c}": 0.0 for c in tops}}
+
+    reader = ColumnBatchReader(
+        csv_lines(args.rows, args.customers, args.products),
+        batch_size=BATCH_SIZE,
+        types={"quantity": int},
+        backend="list",
+        fieldnames=None,
+        restval=None,
+    )
+    started = time.perf_counter()
+    for batch in reader:
+        # 商品ごとの売上 (セント) と数量はバッチ内でまとめてから各方法に渡す
+        groups: dict[tuple[str, str], int] = {}
+        for key, quantity in zip(zip(batch["product_name"], batch["unit_price"]), batch["quantity"]):
+            groups[key] = groups.get(key, 0) + quantity
+        revenues = [(name, quantity * to_cents(price), quantity) for (name, price), quantity in groups.items()]
+
+        start = time.perf_counter()
+        customers.update(batch["customer_id"])
+        for name, revenue, quantity in revenues:
+            revenue_cents += revenue
+            counter = products.get(name)
+            if counter is None:
+                products[name] = [revenue, quantity]
+            else:
+                counter[0] += revenue
+                counter[1] += quantity
+        elapsed["exact"] += time.perf_counter() - start
+
+        for precision, sketch in hlls.items():
+            start = time.perf_counter()
+            sketch.update(batch["customer_id"])
+            elapsed[f"hll p={precision}"] += time.perf_counter() - start
+        for capacity, sketch in tops.items():
+            start = time.perf_counter()
+            for name, revenue, quantity in revenues:
+                sketch.add(name, revenue, quantity)
+            elapsed[f"top capacity={capacity}"] += time.perf_counter() - start
+    total = time.perf_counter() - started
+
+    exact_top = sorted(products.items(), key=lambda item: item[1][0], reverse=True)[:TOP_PRODUCTS]
+    exact_names = [name for name, _ in exact_top]
+    print(
+        f"rows={args.rows} customers={len(customers)} products={len(products)} "
+        f"revenue={revenue_cents / 100:.2f} ({total:.0f}s)"
+    )
+    print(f"{'method':<20}{'memory':>12}{'ns/row':>9}  accuracy")
+    print(f"{'exact':<20}{human(exact_nbytes(customers, products)):>12}{elapsed['exact'] / args.rows * 1e9:>9.0f}  exact")
+    for precision, sketch in hlls.items():
+        error = sketch.count() / len(customers) - 1
+        name = f"hll p={precision}"
+        print(
+            f"{name:<20}{human(sketch.nbytes):>12}{elapsed[name] / args.rows * 1e9:>9.0f}"
+            f"  unique customers {sketch.count()} ({error:+.2%}, σ={1.04 / 2 ** (precision / 2):.2%})"
+        )
+    for capacity, sketch in tops.items():
+        top = sketch.top(TOP_PRODUCTS)
+        matched = sum(entry.item == name for entry, name in zip(top, exact_names))
+        worst = max(entry.count / products[entry.item][0] - 1 for entry in top)
+        name = f"top capacity={capacity}"
+        print(
+            f"{name:<20}{human(space_saving_nbytes(sketch)):>12}{elapsed[name] / args.rows * 1e9:>9.0f}"
+            f"  top {TOP_PRODUCTS} in order {matched}/{TOP_PRODUCTS}, revenue error <= {worst:.3%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""ベンチマーク用のローカル S3 (ディレクトリをバケットとして扱い、レイテンシと帯域を模擬する)"""
+import hashlib
+import re
+import threading
+import time
+from pathlib import Path
+
+# 1 回の read で転送を模擬する単位
+TRANSFER_UNIT = 64 * 1024
+# 読み込み側が処理している間に先に受信しておける量 (TCP の受信ウィンドウ相当)
+RECEIVE_WINDOW = 1024 * 1024
+
+
+class ShapedBody:
+    """接続ごとの帯域 (bytes/sec) に合わせて返す StreamingBody 相当
+
+    読み込み側が処理している間も受信は進むが、先に受信できるのは RECEIVE_WINDOW までとする。
+    """
+
+    def __init__(self, data: bytes, start: int, end: int, bandwidth: float | None):
+        self._data = data
+        self._start = start
+        self._position = start
+        self._end = end
+        self._bandwidth = bandwidth
+        self._started = time.perf_counter()
+
+    def read(self, size: int | None = None) -> bytes:
+        end = self._end if size is None or size < 0 else min(self._end, self._position + size)
+        parts = []
+        while self._position < end:
+            step = min(TRANSFER_UNIT, end - self._position)
+            parts.append(self._data[self._position : self._position + step])
+            self._position += step
+            if self._bandwidth:
+                now = time.perf_counter()
+                received = self._position - self._start
+                # 受信ウィンドウを超えて先に受信した分は、処理の待ち時間として取り戻せない
+                self._started = max(self._started, now - (received + RECEIVE_WINDOW) / self._bandwidth)
+                delay = self._started + received / self._bandwidth - now
+                if delay > 0:
+                    time.sleep(delay)
+        return b"".join(parts)
+
+    def readline(self, size: int | None = None) -> bytes:
+        newline = self._data.find(b"\n", self._position, self._end)
+        end = self._end if newline < 0 else newline + 1
+        if size is not None and size >= 0:
+            end = min(end, self._position + size)
+        return self.read(end - self._position)
+
+    def __iter__(self):
+        return iter(self.readline, b"")
+
+    def close(self) -> None:
+        pass
+
+
+class LocalS3Client:
+    """ディレクトリ上のファイルをオブジェクトとして返す S3 クライアント
+
+    - latency: リクエストごとの最初のバイトまでの時間 (秒)
+    - bandwidth: 接続ごとの帯域 (bytes/sec, None なら無制限)
+
+    ファイルの内容はメモリに読み込んでおき、更新時刻が変わったら読み直す。
+    """
+
+    def __init__(self, root: str | Path, latency: float = 0.0, bandwidth: float | None = None):
+        self.root = Path(root)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.requests = 0
+        self._cache: dict[Path, tuple[int, bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes) -> dict:
+        path = self._path(Bucket, Key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(Body)
+        return {"ETag": self._load(path)[2]}
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        self._wait()
+        _, data, etag = self._load(self._path(Bucket, Key))
+        return {"ContentLength": len(data), "ETag": etag}
+
+    def get_object(self, Bucket: str, Key: str, Range: str | None = None, IfMatch: str | None = None, **kwargs) -> dict:
+        self._wait()
+        _, data, etag = self._load(self._path(Bucket, Key))
+        if IfMatch is not None and IfMatch != etag:
+            raise RuntimeError(f"PreconditionFailed: {Bucket}/{Key}")
+        start, end = 0, len(data)
+        if Range is not None:
+            first, last = re.fullmatch(r"bytes=(\d+)-(\d*)", Range).groups()
+            start, end = int(first), min(end, int(last) + 1) if last else end
+        body = ShapedBody(data, start, end, self.bandwidth)
+        return {"Body": body, "ContentLength": end - start, "ETag": etag}
+
+    def list_objects_v2(
+        self, Bucket: str, Prefix: str = "", ContinuationToken: str | None = None, MaxKeys: int = 1000, **kwargs
+    ) -> dict:
+        self._wait()
+        bucket = self.root / Bucket
+        # ContinuationToken は前のページの最後のキー
+        keys = sorted(
+            key
+            for key in (path.relative_to(bucket).as_posix() for path in bucket.rglob("*") if path.is_file())
+            if key.startswith(Prefix) and key > (ContinuationToken or "")
+        )
+        page = keys[:MaxKeys]
+        contents = []
+        for key in page:
+            _, data, etag = self._load(self._path(Bucket, key))
+            contents.append({"Key": key, "Size": len(data), "ETag": etag})
+        response = {"Contents": contents, "KeyCount": len(page), "IsTruncated": len(keys) > MaxKeys}
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = page[-1]
+        return response
+
+    def _wait(self) -> None:
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _path(self, bucket: str, key: str) -> Path:
+        return self.root / bucket / key
+
+    def _load(self, path: Path) -> tuple[int, bytes, str]:
+        mtime = path.stat().st_mtime_ns
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached is None or cached[0] != mtime:
+                data = path.read_bytes()
+                cached = self._cache[path] = (mtime, data, f'"{hashlib.md5(data, usedforsecurity=False).hexdigest()}"')
+            return cached
@@ -0,0 +1,24 @@
+"""ベンチマーク用の注文 CSV (gzip) の生成"""
+import gzip
+import random
+
+HEADER = "order_id,customer_id,product_name,quantity,unit_price,order_date\n"
+PRODUCTS = ["ノートPC", "マウス", "キーボード", "モニター", "USBケーブル", "ヘッドセット", "Webカメラ", "ドッキングステーション"]
+
+
+def order_lines(rows: int, customers: int = 100_000, products: int = 1_000, seed: int = 0, start: int = 0):
+    """注文の CSV 行 (ヘッダーを除く) を生成する"""
+    rng = random.Random(seed)
+    names = [f"{PRODUCTS[index % len(PRODUCTS)]}-{index:05d}" for index in range(products)]
+    prices = [rng.randrange(980, 200_000, 10) for _ in range(products)]
+    for index in range(start, start + rows):
+        product = min(int(rng.paretovariate(1.2)) - 1, products - 1)
+        yield (
+            f"ORD{index:010d},CUST{rng.randrange(customers):07d},{names[product]},"
+            f"{rng.randint(1, 5)},{prices[product]},2024-01-{index % 28 + 1:02d}\n"
+        )
+
+
+def orders_csv_gz(rows: int, compresslevel: int = 6, **kwargs) -> bytes:
+    """注文の CSV を gzip で圧縮したバイト列を生成する"""
+    return gzip.compress((HEADER + "".join(order_lines(rows, **kwargs))).encode(), compresslevel=compresslevel)
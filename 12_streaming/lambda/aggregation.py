@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any
+
+from columnar import ColumnBatch
+from sketches import DEFAULT_PRECISION, HyperLogLog, SpaceSaving
+
+TOP_PRODUCTS = 10
+# 売上の上位を追跡する商品の数 (重みの総和に対する誤差は売上の合計 / DEFAULT_TOP_CAPACITY 以下)
+DEFAULT_TOP_CAPACITY = 100
+
+
+@lru_cache(maxsize=4096)
+def to_cents(amount: str) -> int:
+    """金額の文字列 (例: "1280.50") を整数のセントにする (1 セント未満の端数がある場合は ValueError)"""
+    cents = Decimal(amount) * 100
+    if cents != cents.to_integral_value():
+        raise ValueError(f"Amount has fractional cents: {amount!r}")
+    return int(cents)
+
+
+class OrderAggregator:
+    """注文 CSV の集計 (注文数・売上・商品別の数量と売上・ユニーク顧客数)
+
+    使用するメモリは行数や顧客数・商品数によらず一定になる。
+
+    - 売上: 単価を整数のセントにして合計する (Decimal で行ごとに計算するのと同じ正確な値)
+    - ユニーク顧客数・ユニーク商品数: HyperLogLog (precision=14 で標準誤差 0.81%。1,024 件までは正確な値)
+    - 売上の上位の商品: SpaceSaving (top_capacity 個の商品を追跡する。商品が top_capacity 個以下なら正確な値)
+
+    add() は csv.DictReader の行を、add_batch() は ColumnarCsvTransform の ColumnBatch を集計する。
+    ColumnBatch の quantity 列は int に変換済みでも文字列のままでもよい。
+
+    to_dict() で途中までの集計を JSON にできる形で取り出し、from_dict() で復元して続きを集計できる
+    (ResumableCsvTransform の位置と組み合わせて、複数回の Lambda 呼び出しに分けて集計する)。
+    オブジェクトごとに集計したものは merge() で 1 つにまとめられる。
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, top_capacity: int = DEFAULT_TOP_CAPACITY):
+        self.total_orders = 0
+        self.revenue_cents = 0
+        self.customers = HyperLogLog(precision)
+        self.products = HyperLogLog(precision)
+        # 商品名 -> 売上 (セント)。数量は extra として合計する
+        self.top_products = SpaceSaving(top_capacity)
+
+    def add(self, row: dict[str, str]) -> None:
+        self.total_orders += 1
+        quantity = int(row["quantity"])
+        revenue = quantity * to_cents(row["unit_price"])
+        self.revenue_cents += revenue
+        self.customers.add(row["customer_id"])
+        self.products.add(row["product_name"])
+        self.top_products.add(row["product_name"], revenue, quantity)
+
+    def add_batch(self, batch: ColumnBatch) -> None:
+        self.total_orders += len(batch)
+        quantities = batch["quantity"]
+        if quantities and isinstance(quantities[0], str):
+            quantities = map(int, quantities)
+        # バッチ内で (商品名, 単価) ごとに数量をまとめてから、まとまりごとに売上を計算する
+        groups: dict[tuple[str, str], int] = {}
+        for key, quantity in zip(zip(batch["product_name"], batch["unit_price"]), quantities):
+            groups[key] = groups.get(key, 0) + quantity
+        for (product_name, unit_price), quantity in groups.items():
+            revenue = quantity * to_cents(unit_price)
+            self.revenue_cents += revenue
+            self.top_products.add(product_name, revenue, quantity)
+        self.customers.update(batch["customer_id"])
+        self.products.update({product_name for product_name, _ in groups})
+
+    def merge(self, other: OrderAggregator) -> None:
+        """別のオブジェクトや別の呼び出しで集計した other を合わせる (other は変更しない)"""
+        self.total_orders += other.total_orders
+        self.revenue_cents += other.revenue_cents
+        self.customers.merge(other.customers)
+        self.products.merge(other.products)
+        self.top_products.merge(other.top_products)
+
+    def to_dict(self) -> dict[str, Any]:
+        """途中までの集計 (JSON にできる形)"""
+        return {
+            "total_orders": self.total_orders,
+            "revenue_cents": self.revenue_cents,
+            "customers": self.customers.to_dict(),
+            "products": self.products.to_dict(),
+            "top_products": self.top_products.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> OrderAggregator:
+        aggregator = cls()
+        aggregator.total_orders = data["total_orders"]
+        aggregator.revenue_cents = data["revenue_cents"]
+        aggregator.customers = HyperLogLog.from_dict(data["customers"])
+        aggregator.products = HyperLogLog.from_dict(data["products"])
+        aggregator.top_products = SpaceSaving.from_dict(data["top_products"])
+        return aggregator
+
+    def result(self) -> dict[str, Any]:
+        # 商品別売上 (売上順の上位 TOP_PRODUCTS 件)
+        top_products = [
+            {"name": entry.item, "quantity": entry.extra, "revenue": entry.count / 100}
+            for entry in self.top_products.top(TOP_PRODUCTS)
+        ]
+
+        return {
+            "total_orders": self.total_orders,
+            "total_revenue": self.revenue_cents / 100,
+            "unique_customers": self.customers.count(),
+            "unique_products": self.products.count(),
+            "top_products": top_products,
+        }
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Collection, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class S3ObjectSummary:
+    """ListObjectsV2 で見つかったオブジェクト"""
+
+    key: str
+    size: int
+    etag: str
+
+
+def list_objects(
+    s3_client: S3Client,
+    bucket: str,
+    prefix: str = "",
+    suffix: str = "",
+    exclude: Collection[str] = (),
+) -> Iterator[S3ObjectSummary]:
+    """prefix で始まり suffix で終わるオブジェクト (キーの順)
+
+    ListObjectsV2 の 1,000 件ごとのページを必要になった分だけ取得する。exclude のキーは読み飛ばす。
+    """
+    options = {"Bucket": bucket, "Prefix": prefix}
+    while True:
+        response = s3_client.list_objects_v2(**options)
+        for item in response.get("Contents", []):
+            key = item["Key"]
+            if key.endswith(suffix) and key not in exclude:
+                yield S3ObjectSummary(key=key, size=item["Size"], etag=item["ETag"])
+        if not response.get("IsTruncated"):
+            return
+        options["ContinuationToken"] = response["NextContinuationToken"]
+
+
+def map_objects(
+    function: Callable[[S3ObjectSummary], T],
+    objects: Iterable[S3ObjectSummary],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    should_stop: Callable[[], bool] | None = None,
+) -> Iterator[tuple[S3ObjectSummary, T]]:
+    """objects のそれぞれに function を適用し、終わった順に (オブジェクト, 結果) を返す
+
+    同時に処理するオブジェクトは max_concurrency 個まで。objects は処理を始めるときに 1 つずつ取り出すため、
+    list_objects() のジェネレーターを渡せば数千個のオブジェクトでも一覧や結果をメモリにためない
+    (結果は呼び出し側で受け取ったらすぐにマージする)。
+
+    should_stop が True を返したら新しいオブジェクトの処理を始めず、処理中のオブジェクトが終わったところで終了する。
+    should_stop は処理していないオブジェクトが残っている場合だけ呼び出す (True を返したときは、必ず処理していない
+    オブジェクトが残っている)。また、最初のオブジェクトは should_stop によらず処理する (呼び出しごとに必ず進む)。
+    function が例外を送出した場合は、処理中のオブジェクトを待ってから同じ例外を送出する。
+
+    Example
+    -------
+        >>> objects = list_objects(s3_client, "bucket", prefix="exports/2024-01-01/", suffix=".csv.gz")
+        >>> for summary, partial in map_objects(aggregate_object, objects, max_concurrency=8):
+        >>>     aggregator.merge(partial)
+    """
+    if max_concurrency <= 0:
+        raise ValueError("max_concurrency must be positive")
+
+    objects = iter(objects)
+    pending: dict[Future[T], S3ObjectSummary] = {}
+    started = stopped = False
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="fan-in") as executor:
+        try:
+            while True:
+                while len(pending) < max_concurrency and not stopped:
+                    summary = next(objects, None)
+                    if summary is None:
+                        break
+                    if started and should_stop is not None and should_stop():
+                        stopped = True
+                        break
+                    pending[executor.submit(function, summary)] = summary
+                    started = True
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    summary = pending.pop(future)
+                    yield summary, future.result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -1,17 +1,34 @@
 import json
-from decimal import Decimal
+import os
 from typing import Any
 
+import boto3
 from aws_lambda_powertools import Logger
-from aws_lambda_powertools.utilities.streaming import S3Object
-from aws_lambda_powertools.utilities.streaming.transformations import (
-    CsvTransform,
-    GzipTransform,
-)
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
+from aggregation import OrderAggregator
+from columnar import DEFAULT_BATCH_SIZE
+from fanin import DEFAULT_MAX_CONCURRENCY, S3ObjectSummary, list_objects, map_objects
+from readahead import DEFAULT_CHUNK_SIZE, ReadAheadS3Object
+from resumable import ResumableCsvTransform, StreamPosition
+
 logger = Logger(service="order-aggregator")
 
+# 呼び出しをまたいで使い回す S3 クライアント (スレッドセーフなので複数のオブジェクトを並行に読むときも共有する)
+s3_client = boto3.client("s3")
+
+# バイト範囲の並列先読み (0 なら S3Object と同じく 1 本のストリームで読む)
+READ_AHEAD_WORKERS = int(os.environ.get("READ_AHEAD_WORKERS", "0"))
+READ_AHEAD_CHUNK_SIZE = int(os.environ.get("READ_AHEAD_CHUNK_SIZE", str(DEFAULT_CHUNK_SIZE)))
+# CSV を列ごとにまとめて読む行数
+BATCH_SIZE = int(os.environ.get("CSV_BATCH_SIZE", str(DEFAULT_BATCH_SIZE)))
+# 残り時間がこれを下回ったら集計を中断してチェックポイントを返す (ミリ秒)
+CHECKPOINT_MARGIN_MS = int(os.environ.get("CHECKPOINT_MARGIN_MS", "30000"))
+# prefix を指定した場合に同時に読むオブジェクトの数
+FAN_IN_CONCURRENCY = int(os.environ.get("FAN_IN_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY)))
+# prefix を指定した場合に集計するオブジェクトのキーの末尾
+DEFAULT_SUFFIX = ".csv.gz"
+
 
 @logger.inject_lambda_context(log_event=True)
 def lambda_handler(event: dict[str, Any], context: LambdaContext) -> dict[str, Any]:
@@ -21,69 +38,156 @@ def lambda_handler(event: dict[str, Any], context: LambdaContext) -> dict[str, A
 
     期待する CSV フォーマット:
     order_id,customer_id,product_name,quantity,unit_price,order_date
+
+    イベントの形式:
+    - {"bucket": ..., "key": ...}: 1 つのオブジェクトを集計する
+    - {"bucket": ..., "prefix": ..., "suffix": ".csv.gz"}: prefix 配下の複数のオブジェクト (分割されたエクスポート) を
+      FAN_IN_CONCURRENCY 個ずつ並行に読み、オブジェクトごとの集計をマージする
+    - {"partials": [...]}: 別々の呼び出しが返した途中の集計 (partial) をマージする
+
+    "partial": true を付けると、結果の代わりにマージできる途中の集計を {"partial": ...} で返す
+    (例: prefix を分けて並列に呼び出し、最後に partials でまとめる)。
+
+    タイムアウトまでに読み終わらない場合は statusCode 202 と途中までの集計 (checkpoint) を返す。
+    同じイベントに checkpoint を付けて再度呼び出すと、続きから集計する。
     """
+    if "partials" in event:
+        aggregator = OrderAggregator()
+        for partial in event["partials"]:
+            aggregator.merge(OrderAggregator.from_dict(partial))
+        logger.info("Merged partial aggregates", extra={"partials": len(event["partials"])})
+        return _completed(aggregator, event)
+    if "prefix" in event:
+        return _aggregate_prefix(event, context)
+    return _aggregate_key(event, context)
+
+
+def _aggregate_key(event: dict[str, Any], context: LambdaContext) -> dict[str, Any]:
     bucket = event["bucket"]
     key = event["key"]
+    checkpoint = event.get("checkpoint")
 
-    logger.info("Starting order data aggregation", extra={"bucket": bucket, "key": key})
+    logger.info("Starting order data aggregation", extra={"bucket": bucket, "key": key, "resumed": bool(checkpoint)})
 
-    # S3Object を使用してストリーミング処理
-    # is_gzip=True, is_csv=True を指定することで、
-    # gzip 解凍と CSV パースを自動的に適用
-    s3_object = S3Object(bucket=bucket, key=key, is_gzip=True, is_csv=True)
+    if checkpoint:
+        position = StreamPosition.from_dict(checkpoint["position"])
+        aggregator = OrderAggregator.from_dict(checkpoint["aggregator"])
+    else:
+        position = None
+        aggregator = OrderAggregator()
 
-    # 集計用の変数
-    total_orders = 0
-    total_revenue = Decimal("0")
-    products: dict[str, dict[str, Any]] = {}
-    customers: set[str] = set()
+    # READ_AHEAD_WORKERS を指定すると、バイト範囲を並列に先読みしながら先頭から順に処理する
+    s3_object = _open(bucket, key, position=position, read_ahead_workers=READ_AHEAD_WORKERS)
+    reader = s3_object.transformed_stream
 
-    # ストリーミングで 1 行ずつ処理
+    # ストリーミングで BATCH_SIZE 行ずつ処理
     # メモリに全データを読み込まずに処理できる
-    for row in s3_object:
-        total_orders += 1
-
-        # 売上計算
-        quantity = int(row["quantity"])
-        unit_price = Decimal(row["unit_price"])
-        revenue = quantity * unit_price
-        total_revenue += revenue
-
-        # 商品別集計
-        product_name = row["product_name"]
-        if product_name not in products:
-            products[product_name] = {"quantity": 0, "revenue": Decimal("0")}
-        products[product_name]["quantity"] += quantity
-        products[product_name]["revenue"] += revenue
-
-        # ユニーク顧客数
-        customers.add(row["customer_id"])
-
-        # 進捗ログ (1000 件ごと)
-        if total_orders % 1000 == 0:
-            logger.debug(f"Processed {total_orders} orders")
-
-    # 商品別売上をソート (売上順)
-    top_products = sorted(
-        [
-            {"name": name, "quantity": data["quantity"], "revenue": float(data["revenue"])}
-            for name, data in products.items()
-        ],
-        key=lambda x: x["revenue"],
-        reverse=True,
-    )[:10]
-
-    result = {
-        "total_orders": total_orders,
-        "total_revenue": float(total_revenue),
-        "unique_customers": len(customers),
-        "unique_products": len(products),
-        "top_products": top_products,
+    try:
+        for batch in reader:
+            aggregator.add_batch(batch)
+            logger.debug(f"Processed {aggregator.total_orders} orders")
+            if context.get_remaining_time_in_millis() < CHECKPOINT_MARGIN_MS:
+                position = reader.position
+                checkpoint = {"position": position.to_dict(), "aggregator": aggregator.to_dict()}
+                logger.warning("Stopping before timeout", extra={"rows": position.rows, "offset": position.offset})
+                return _incomplete(checkpoint)
+    finally:
+        s3_object.close()
+
+    return _completed(aggregator, event)
+
+
+def _aggregate_prefix(event: dict[str, Any], context: LambdaContext) -> dict[str, Any]:
+    bucket = event["bucket"]
+    prefix = event["prefix"]
+    checkpoint = event.get("checkpoint")
+
+    if checkpoint:
+        completed = list(checkpoint["completed"])
+        aggregator = OrderAggregator.from_dict(checkpoint["aggregator"])
+    else:
+        completed = []
+        aggregator = OrderAggregator()
+
+    logger.info(
+        "Starting order data aggregation",
+        extra={"bucket": bucket, "prefix": prefix, "resumed": bool(checkpoint), "completed": len(completed)},
+    )
+
+    def aggregate_object(summary: S3ObjectSummary) -> OrderAggregator:
+        # オブジェクトごとに別の集計 (partial) を作り、読み終えたものから順にマージする
+        # オブジェクトどうしを並行に読むため、先読みはしない (メモリは FAN_IN_CONCURRENCY 本のストリームの分で済む)
+        partial = OrderAggregator()
+        s3_object = _open(bucket, summary.key, position=None, read_ahead_workers=0)
+        try:
+            for batch in s3_object.transformed_stream:
+                partial.add_batch(batch)
+        finally:
+            s3_object.close()
+        return partial
+
+    stopped = False
+
+    def should_stop() -> bool:
+        # タイムアウトが近づいたら新しいオブジェクトを読み始めない (読み始めたオブジェクトは最後まで読む)
+        # map_objects は読んでいないオブジェクトが残っている場合だけ呼び出し、最初のオブジェクトは必ず読むため、
+        # True を返したときだけ続きがある (checkpoint を返す呼び出しも、少なくとも 1 つのオブジェクトを読み終える)
+        nonlocal stopped
+        stopped = context.get_remaining_time_in_millis() < CHECKPOINT_MARGIN_MS
+        return stopped
+
+    suffix = event.get("suffix", DEFAULT_SUFFIX)
+    objects = list_objects(s3_client, bucket, prefix=prefix, suffix=suffix, exclude=set(completed))
+    for summary, partial in map_objects(aggregate_object, objects, FAN_IN_CONCURRENCY, should_stop=should_stop):
+        aggregator.merge(partial)
+        completed.append(summary.key)
+        logger.debug(f"Aggregated {summary.key} ({partial.total_orders} orders)")
+
+    if stopped:
+        logger.warning("Stopping before timeout", extra={"completed": len(completed)})
+        return _incomplete({"completed": completed, "aggregator": aggregator.to_dict()})
+
+    logger.info("Aggregated objects", extra={"objects": len(completed)})
+    return _completed(aggregator, event)
+
+
+def _open(bucket: str, key: str, position: StreamPosition | None, read_ahead_workers: int) -> ReadAheadS3Object:
+    # S3Object を使用してストリーミング処理
+    # ResumableCsvTransform で gzip を解凍し、CSV は BATCH_SIZE 行ずつ列ごとにまとめて読む (行ごとの辞書を作らない)
+    # 読み終えた位置を記録しているため、checkpoint の位置から続きを読める
+    s3_object = ReadAheadS3Object(
+        bucket=bucket,
+        key=key,
+        chunk_size=READ_AHEAD_CHUNK_SIZE,
+        max_workers=read_ahead_workers,
+        boto3_client=s3_client,
+    )
+    s3_object.transform(
+        ResumableCsvTransform(position=position, batch_size=BATCH_SIZE, types={"quantity": int}),
+        in_place=True,
+    )
+    return s3_object
+
+
+def _incomplete(checkpoint: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "statusCode": 202,
+        "body": json.dumps({"status": "incomplete", "checkpoint": checkpoint}, ensure_ascii=False),
     }
 
+
+def _completed(aggregator: OrderAggregator, event: dict[str, Any]) -> dict[str, Any]:
+    if event.get("partial"):
+        return {
+            "statusCode": 200,
+            "body": json.dumps({"partial": aggregator.to_dict()}, ensure_ascii=False),
+        }
+
+    result = aggregator.result()
+
     logger.info("Order aggregation completed", extra=result)
 
     return {
         "statusCode": 200,
         "body": json.dumps(result, ensure_ascii=False),
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import io
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from aws_lambda_powertools.utilities.streaming import S3Object
+from aws_lambda_powertools.utilities.streaming._s3_seekable_io import _S3SeekableIO
+
+if TYPE_CHECKING:
+    from mypy_boto3_s3.client import S3Client
+
+logger = logging.getLogger(__name__)
+
+MiB = 1024 * 1024
+DEFAULT_CHUNK_SIZE = 8 * MiB
+DEFAULT_MAX_WORKERS = 4
+
+
+class S3ReadAheadIO(_S3SeekableIO):
+    """バイト範囲を並列に先読みする _S3SeekableIO
+
+    オブジェクトを chunk_size ごとの範囲 (Range: bytes=start-end) に分け、max_workers 本の
+    GetObject で並列に取得する。読み込み側 (GzipFile / TextIOWrapper など) からは先頭から順に
+    読める 1 本のストリームに見える。
+
+    メモリに保持するチャンク (読み込み中の 1 つ + 先読み) は max_buffers 個までなので、
+    使用するメモリは最大 chunk_size x max_buffers になる。
+    取得中にオブジェクトが更新されても範囲が混ざらないよう、各範囲は最初の HeadObject の ETag を
+    IfMatch に指定して取得する (version_id を指定した場合はそのバージョンを取得する)。
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        key: str,
+        version_id: str | None = None,
+        boto3_client: S3Client | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_buffers: int | None = None,
+        **sdk_options,
+    ):
+        super().__init__(bucket=bucket, key=key, version_id=version_id, boto3_client=boto3_client, **sdk_options)
+        if chunk_size <= 0 or max_workers <= 0:
+            raise ValueError("chunk_size and max_workers must be positive")
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_buffers = max(2, max_buffers or max_workers * 2)
+        self._executor: ThreadPoolExecutor | None = None
+        self._etag: str | None = None
+        # 読み込み中のチャンクとその先頭のオフセット
+        self._chunk = b""
+        self._chunk_start = 0
+        # 先読み中のチャンク (オフセット順) と次に取得する範囲の先頭
+        self._pending: deque[tuple[int, Future[bytes]]] = deque()
+        self._next_fetch = 0
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            response = self.s3_client.head_object(**self._sdk_options)
+            self._size = response.get("ContentLength", 0)
+            if "VersionId" not in self._sdk_options:
+                self._etag = response.get("ETag")
+        return self._size
+
+    @property
+    def etag(self) -> str | None:
+        """HeadObject で取得した ETag (version_id を指定した場合は None)"""
+        self.size
+        return self._etag
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"invalid whence ({whence}, should be {io.SEEK_SET}, {io.SEEK_CUR}, {io.SEEK_END})")
+
+        # 読み込み中のチャンクの範囲内なら先読みを続ける
+        if not self._chunk_start <= position <= self._chunk_start + len(self._chunk):
+            self._reset(position)
+        self._position = position
+        return position
+
+    def read(self, size: int | None = -1) -> bytes:
+        if size is None or size < 0:
+            parts = []
+            while chunk := self._take(self.chunk_size):
+                parts.append(chunk)
+            return b"".join(parts)
+
+        data = self._take(size)
+        if len(data) == size or not data:
+            return data
+        parts = [data]
+        remaining = size - len(data)
+        while remaining and (chunk := self._take(remaining)):
+            parts.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(parts)
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def readline(self, size: int | None = None) -> bytes:
+        limit = -1 if size is None else size
+        parts = []
+        length = 0
+        while limit < 0 or length < limit:
+            if not self._available() and not self._advance():
+                break
+            offset = self._position - self._chunk_start
+            end = self._chunk.find(b"\n", offset) + 1 or len(self._chunk)
+            if limit >= 0:
+                end = min(end, offset + limit - length)
+            parts.append(self._chunk[offset:end])
+            length += end - offset
+            self._position = self._chunk_start + end
+            if self._chunk[end - 1 : end] == b"\n":
+                break
+        return b"".join(parts)
+
+    def readlines(self, hint: int = -1) -> list[bytes]:
+        return list(iter(self.readline, b""))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def close(self) -> None:
+        self._reset(self._position)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._closed = True
+
+    def _available(self) -> int:
+        return self._chunk_start + len(self._chunk) - self._position
+
+    def _take(self, size: int) -> bytes:
+        """読み込み中のチャンクから最大 size バイトを返す (チャンクの境界はまたがない)"""
+        if not self._available() and not self._advance():
+            return b""
+        offset = self._position - self._chunk_start
+        data = self._chunk[offset : offset + size]
+        self._position += len(data)
+        return data
+
+    def _advance(self) -> bool:
+        """次のチャンクに進む (オブジェクトの終端なら False)"""
+        if self._position >= self.size:
+            return False
+        if not self._pending:
+            self._next_fetch = self._position
+            self._schedule()
+        self._chunk_start, future = self._pending.popleft()
+        self._chunk = future.result()
+        self._schedule()
+        return True
+
+    def _schedule(self) -> None:
+        """先読みのチャンクが max_buffers - 1 個になるまで範囲の取得を投入する"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="s3-read-ahead")
+        size = self.size
+        client = self.s3_client
+        while len(self._pending) < self.max_buffers - 1 and self._next_fetch < size:
+            start = self._next_fetch
+            end = min(start + self.chunk_size, size)
+            self._pending.append((start, self._executor.submit(self._fetch, client, start, end)))
+            self._next_fetch = end
+
+    def _fetch(self, client: S3Client, start: int, end: int) -> bytes:
+        options = dict(self._sdk_options)
+        if self._etag is not None:
+            options["IfMatch"] = self._etag
+        logger.debug(f"Fetching range bytes={start}-{end - 1}")
+        data = client.get_object(Range=f"bytes={start}-{end - 1}", **options)["Body"].read()
+        if len(data) != end - start:
+            raise OSError(f"Incomplete range read: expected {end - start} bytes, got {len(data)}")
+        return data
+
+    def _reset(self, position: int) -> None:
+        """先読みを破棄して position から読み直す"""
+        for _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._chunk = b""
+        self._chunk_start = position
+        self._next_fetch = position
+
+
+class ReadAheadS3Object(S3Object):
+    """バイト範囲を並列に先読みする S3Object
+
+    S3Object と同じように使える (is_gzip / is_csv / transform() もそのまま使える)。
+    max_workers に 0 を指定すると先読みせず、S3Object と同じく 1 本のストリームで読む。
+
+    Parameters
+    ----------
+    chunk_size: int
+        1 回の GetObject で取得するバイト数
+    max_workers: int
+        並列に取得する範囲の数
+    max_buffers: int | None
+        メモリに保持するチャンクの最大数 (既定は max_workers x 2)
+
+    Example
+    -------
+        >>> s3_object = ReadAheadS3Object(bucket="bucket", key="orders.csv.gz", is_gzip=True, is_csv=True)
+        >>> for row in s3_object:
+        >>>     print(row)
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        key: str,
+        version_id: str | None = None,
+        boto3_client: S3Client | None = None,
+        is_gzip: bool | None = False,
+        is_csv: bool | None = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_buffers: int | None = None,
+        **sdk_options,
+    ):
+        super().__init__(
+            bucket=bucket,
+            key=key,
+            version_id=version_id,
+            boto3_client=boto3_client,
+            is_gzip=is_gzip,
+            is_csv=is_csv,
+            **sdk_options,
+        )
+        if max_workers > 0:
+            self.raw_stream = S3ReadAheadIO(
+                bucket=bucket,
+                key=key,
+                version_id=version_id,
+                boto3_client=boto3_client,
+                chunk_size=chunk_size,
+                max_workers=max_workers,
+                max_buffers=max_buffers,
+                **sdk_options,
+            )
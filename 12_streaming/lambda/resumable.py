@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import io
+import zlib
+from collections import deque
+from collections.abc import Iterator, Sequence
+from dataclasses import asdict, dataclass
+from typing import IO, Any, Callable
+
+from columnar import ColumnBatch, ColumnBatchReader, ColumnarCsvTransform
+
+READ_SIZE = 256 * 1024
+# gzip ヘッダーを自動で判定する wbits (zlib.MAX_WBITS | 16)
+_GZIP_WBITS = 31
+
+
+@dataclass(frozen=True)
+class StreamPosition:
+    """CSV を読み終えた位置 (JSON にして次の呼び出しに渡せる)
+
+    zlib の展開の状態は保存できないため、位置は「gzip メンバーの先頭 (圧縮後のオフセット)」と
+    「そのメンバーの先頭から展開して読み捨てるバイト数」で表す。
+    複数のメンバーを連結した gzip (一定の行数ごとに圧縮して連結したもの) なら、
+    再開時に展開し直すのは最後のメンバーの途中までで済む。
+    圧縮していない CSV では offset がそのまま読み終えたバイト位置になる (skip は常に 0)。
+    """
+
+    offset: int = 0
+    skip: int = 0
+    # 読み終えた行数 (ヘッダーを除く)
+    rows: int = 0
+    # 再開後はヘッダー行を読まないため、列名も位置と一緒に保存する
+    fieldnames: list[str] | None = None
+    # 読み始めたときのオブジェクトの ETag (再開時に別の内容に置き換わっていないかを確認する)
+    etag: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> StreamPosition:
+        return cls(**data)
+
+
+class _DecompressedLines:
+    """raw ストリームを展開して行を返し、返し終えた行の末尾の位置を記録する"""
+
+    def __init__(self, stream: IO[bytes], offset: int, skip: int, compressed: bool):
+        stream.seek(offset)
+        self._stream = stream
+        self._compressed = compressed
+        self._decompressor = zlib.decompressobj(wbits=_GZIP_WBITS) if compressed else None
+        # 次に読む raw ストリームのオフセット
+        self._read_offset = offset
+        # 展開後のバイト数の累計 (再開位置からの値) と、行として返し終えたブロックのバイト数
+        self._produced = 0
+        self._returned = 0
+        self._discard = skip
+        self._skipped = skip
+        self._in_member = False
+        # 行を返している途中のブロック (デコード済み)
+        self._encoding = "utf-8"
+        self._text = ""
+        self._block: io.StringIO | None = None
+        # (展開後の累計の位置, 圧縮後のオフセット): 各メンバーの先頭
+        self._members: deque[tuple[int, int]] = deque([(-skip, offset)])
+
+    def position(self) -> tuple[int, int]:
+        """(メンバーの先頭のオフセット, そのメンバーの先頭から読み捨てるバイト数)"""
+        returned = self._returned
+        if self._block is not None:
+            # 読み込み中のブロックは、返し終えた行の分だけバイト数に直す
+            returned += len(self._text[: self._block.tell()].encode(self._encoding))
+        if not self._compressed:
+            return self._members[0][1] + returned, 0
+        while len(self._members) > 1 and self._members[1][0] <= returned:
+            self._members.popleft()
+        start, offset = self._members[0]
+        return offset, returned - start
+
+    def lines(self, encoding: str) -> Iterator[str]:
+        self._encoding = encoding
+        pending = b""
+        while block := self._read():
+            # 行の途中で切れたブロックの末尾は次のブロックとつなげる
+            cut = block.rfind(b"\n") + 1
+            if not cut:
+                pending += block
+                continue
+            yield from self._block_lines(pending + block[:cut])
+            pending = block[cut:]
+        if pending:
+            yield from self._block_lines(pending)
+
+    def _block_lines(self, block: bytes) -> Iterator[str]:
+        # ブロック単位でデコードし、行への分割は StringIO に任せる (行ごとに Python の処理を挟まない)
+        self._text = block.decode(self._encoding)
+        self._block = io.StringIO(self._text, newline="\n")
+        yield from self._block
+        self._returned += len(block)
+        self._block = None
+
+    def _read(self) -> bytes:
+        """展開したデータを返す (終端なら b"")"""
+        while True:
+            raw = self._stream.read(READ_SIZE)
+            if not raw and self._in_member:
+                raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+            start = self._read_offset
+            self._read_offset += len(raw)
+            data = self._decompress(raw, start) if self._compressed else raw
+            self._produced += len(data)
+            if self._discard:
+                dropped = min(self._discard, len(data))
+                data = data[dropped:]
+                self._discard -= dropped
+            if data or not raw:
+                return data
+
+    def _decompress(self, raw: bytes, start: int) -> bytes:
+        parts: list[bytes] = []
+        while raw:
+            if self._decompressor.eof:
+                # 末尾の 0 埋めは読み飛ばす (gzip コマンドと同じ)
+                if not raw.strip(b"\x00"):
+                    break
+                # 前のメンバーの終端: ここから次のメンバー
+                self._members.append((self._produced - self._skipped + sum(map(len, parts)), start))
+                self._decompressor = zlib.decompressobj(wbits=_GZIP_WBITS)
+            parts.append(self._decompressor.decompress(raw))
+            self._in_member = not self._decompressor.eof
+            if self._in_member:
+                break
+            unused = self._decompressor.unused_data
+            start, raw = start + len(raw) - len(unused), unused
+        return b"".join(parts)
+
+
+class ResumableCsvReader(ColumnBatchReader):
+    """ColumnBatch を返しながら、読み終えた位置 (position) を記録する CSV リーダー"""
+
+    def __init__(
+        self,
+        stream: IO[bytes],
+        position: StreamPosition,
+        compressed: bool,
+        encoding: str,
+        batch_size: int,
+        types: dict[str, Callable[[str], Any]],
+        backend: str,
+        fieldnames: Sequence[str] | None,
+        restval: Any,
+        **reader_options,
+    ):
+        etag = getattr(stream, "etag", None)
+        if position.etag is not None and etag is not None and position.etag != etag:
+            raise ValueError(f"Object changed since the checkpoint was taken: {position.etag} != {etag}")
+        self.etag = etag or position.etag
+        self.rows = position.rows
+        self._source = _DecompressedLines(stream, position.offset, position.skip, compressed)
+        super().__init__(
+            self._source.lines(encoding),
+            batch_size=batch_size,
+            types=types,
+            backend=backend,
+            fieldnames=position.fieldnames if position.fieldnames is not None else fieldnames,
+            restval=restval,
+            **reader_options,
+        )
+
+    def __next__(self) -> ColumnBatch:
+        batch = super().__next__()
+        self.rows += len(batch)
+        return batch
+
+    @property
+    def position(self) -> StreamPosition:
+        """最後に返した ColumnBatch の次の行の位置"""
+        offset, skip = self._source.position()
+        return StreamPosition(offset=offset, skip=skip, rows=self.rows, fieldnames=self.fieldnames, etag=self.etag)
+
+
+class ResumableCsvTransform(ColumnarCsvTransform):
+    """途中から読み直せる ColumnarCsvTransform (gzip を展開する処理を含む)
+
+    S3Object.transform() で raw ストリーム (シーク可能な S3 のストリーム) に適用する。
+    返す ResumableCsvReader は ColumnarCsvTransform と同じく ColumnBatch を返し、
+    reader.position で読み終えた位置を取得できる。その位置を position に指定すると続きから読む。
+    Lambda の実行時間の上限までに読み終わらないオブジェクトを、複数回の呼び出しに分けて集計するために使う。
+
+    Parameters
+    ----------
+    position: StreamPosition | None
+        読み始める位置 (None なら先頭)
+    compressed: bool
+        gzip で圧縮されているか (複数のメンバーを連結した gzip にも対応する)
+
+    そのほかの引数は ColumnarCsvTransform と同じ。
+
+    Example
+    -------
+        >>> s3_object = S3Object(bucket="bucket", key="orders.csv.gz")
+        >>> reader = s3_object.transform(ResumableCsvTransform(position=StreamPosition.from_dict(saved)))
+        >>> for batch in reader:
+        >>>     ...
+        >>> saved = reader.position.to_dict()
+    """
+
+    def __init__(self, position: StreamPosition | None = None, compressed: bool = True, **kwargs):
+        super().__init__(**kwargs)
+        self.position = position or StreamPosition()
+        self.compressed = compressed
+
+    def transform(self, input_stream: IO[bytes]) -> ResumableCsvReader:
+        if not input_stream.seekable():
+            raise io.UnsupportedOperation("ResumableCsvTransform requires a seekable stream")
+        options = dict(self.transform_options)
+        encoding = options.pop("encoding", "utf-8")
+        # 行の区切りは自前で扱う (csv.reader には改行を含めたまま渡す)
+        options.pop("newline", None)
+        return ResumableCsvReader(
+            input_stream,
+            position=self.position,
+            compressed=self.compressed,
+            encoding=encoding,
+            batch_size=self.batch_size,
+            types=self.types,
+            backend=self.backend,
+            fieldnames=self.fieldnames,
+            restval=self.restval,
+            **options,
+        )
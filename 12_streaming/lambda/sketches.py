@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import heapq
+import math
+import sys
+import zlib
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from functools import partial
+from operator import methodcaller
+from typing import Any
+
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+DEFAULT_PRECISION = 14
+
+_HASH_BITS = 64
+
+
+def _hashes(values: Iterable[str]) -> Iterator[int]:
+    """文字列の 64 ビットのハッシュ値
+
+    hash(str) は起動ごとに値が変わり、別の呼び出しの集計とマージできないため、BLAKE2b の 8 バイトのダイジェストを使う
+    (Python の版や実行環境によらず同じ値になる)。
+    値の数だけ繰り返すため、すべて map で組み立てる (Python のループを通さない)。
+    """
+    digests = map(methodcaller("digest"), map(partial(hashlib.blake2b, digest_size=8), map(str.encode, values)))
+    return map(int.from_bytes, digests)
+
+
+# ハッシュ値の計算方法の確認用の値 (ハッシュ関数を変えた場合に、以前の方法で保存した集計とマージしない)。
+# JSON の数値として丸められないよう 53 ビットにする
+HASH_FINGERPRINT = next(_hashes(["HyperLogLog"])) >> (_HASH_BITS - 53)
+
+
+def _sigma(x: float) -> float:
+    if x == 1:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x: float) -> float:
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+class HyperLogLog:
+    """ユニーク数を推定する HyperLogLog
+
+    メモリは 2^precision 個のレジスタ (1 個 1 バイト) で一定。推定値の標準誤差はおよそ
+    1.04 / sqrt(2^precision) (precision=14 で 16 KiB, 0.81%)。
+    ユニーク数が少ないうち (sparse_limit 個まで) はハッシュ値の集合で数えるため、小さなファイルでは正確な値になる。
+
+    同じ precision の HyperLogLog は merge() で合わせられる (別々に数えた集合の和集合のユニーク数になる)。
+
+    Example
+    -------
+        >>> customers = HyperLogLog(precision=14)
+        >>> customers.update(batch["customer_id"])
+        >>> customers.count()
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION, sparse_limit: int | None = None):
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(f"precision must be between {MIN_PRECISION} and {MAX_PRECISION}, got {precision}")
+        self.precision = precision
+        self.sparse_limit = (1 << precision) // 16 if sparse_limit is None else sparse_limit
+        self._sparse: set[int] | None = set()
+        self._registers: bytearray | None = None
+
+    @property
+    def is_sparse(self) -> bool:
+        return self._sparse is not None
+
+    def add(self, value: str) -> None:
+        self.update((value,))
+
+    def update(self, values: Iterable[str]) -> None:
+        if self._sparse is not None:
+            self._sparse.update(_hashes(values))
+            if len(self._sparse) > self.sparse_limit:
+                self._densify()
+            return
+        self._add_hashes(_hashes(values))
+
+    def count(self) -> int:
+        """ユニーク数 (sparse の間は正確な値、それ以降は推定値)"""
+        if self._sparse is not None:
+            return len(self._sparse)
+        # レジスタの値の分布から推定する (Ertl, "New cardinality estimation algorithms for HyperLogLog sketches")。
+        # 元の HyperLogLog の推定値と linear counting の切り替えのような偏りがない
+        m = len(self._registers)
+        q = _HASH_BITS - self.precision
+        histogram = [0] * (q + 2)
+        for rank, count in Counter(self._registers).items():
+            histogram[rank] = count
+        z = m * _tau(1 - histogram[q + 1] / m)
+        for rank in range(q, 0, -1):
+            z = 0.5 * (z + histogram[rank])
+        z += m * _sigma(histogram[0] / m)
+        return round(m * m / (2 * math.log(2) * z))
+
+    def merge(self, other: HyperLogLog) -> None:
+        """other のユニーク数を合わせる (other は変更しない)"""
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog with precision {other.precision} into {self.precision}")
+        if other._sparse is not None:
+            if self._sparse is not None:
+                self._sparse |= other._sparse
+                if len(self._sparse) > self.sparse_limit:
+                    self._densify()
+            else:
+                self._add_hashes(other._sparse)
+            return
+        if self._sparse is not None:
+            self._densify()
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+    @property
+    def nbytes(self) -> int:
+        """レジスタ (dense) またはハッシュ値の集合 (sparse) のバイト数の目安"""
+        if self._sparse is not None:
+            # set のスロット (16 バイト) とハッシュ値の int (36 バイト)
+            return len(self._sparse) * 52
+        return len(self._registers)
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {"precision": self.precision, "hash": HASH_FINGERPRINT}
+        if self._sparse is not None:
+            # JSON の数値は 2^53 を超えると (Step Functions や JavaScript で) 丸められるため、ハッシュ値はバイト列にする
+            hashes = array("Q", sorted(self._sparse))
+            if sys.byteorder == "big":
+                hashes.byteswap()
+            data["sparse"] = base64.b64encode(zlib.compress(hashes.tobytes())).decode()
+        else:
+            data["registers"] = base64.b64encode(zlib.compress(self._registers)).decode()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> HyperLogLog:
+        if data.get("hash") != HASH_FINGERPRINT:
+            raise ValueError("HyperLogLog was saved with a different hash function and cannot be restored")
+        sketch = cls(precision=data["precision"])
+        if "sparse" in data:
+            hashes = array("Q", zlib.decompress(base64.b64decode(data["sparse"])))
+            if sys.byteorder == "big":
+                hashes.byteswap()
+            sketch._sparse = set(hashes)
+        else:
+            sketch._sparse = None
+            sketch._registers = bytearray(zlib.decompress(base64.b64decode(data["registers"])))
+        return sketch
+
+    def _densify(self) -> None:
+        self._registers = bytearray(1 << self.precision)
+        hashes, self._sparse = self._sparse, None
+        self._add_hashes(hashes)
+
+    def _add_hashes(self, hashes: Iterable[int]) -> None:
+        registers = self._registers
+        shift = _HASH_BITS - self.precision
+        mask = (1 << shift) - 1
+        # 上位 precision ビットでレジスタを選び、残りのビットの先頭の 0 の数 + 1 を記録する
+        for h in hashes:
+            index = h >> shift
+            rank = shift + 1 - (h & mask).bit_length()
+            if rank > registers[index]:
+                registers[index] = rank
+
+
+@dataclass(frozen=True)
+class TopEntry:
+    """SpaceSaving が追跡している要素 (count - error <= 真の値 <= count)"""
+
+    item: str
+    count: int
+    error: int
+    # add() の extra の合計 (追跡を始めてからの値。置き換えで追跡し直した要素は真の値より小さい)
+    extra: int
+
+
+class SpaceSaving:
+    """重み付きの合計が大きい要素 (上位 k 件) を capacity 個のカウンターで追跡する (Space-Saving)
+
+    追跡していない要素が来てカウンターが埋まっている場合は、合計が最小の要素を置き換え、
+    その合計を誤差 (error) として引き継ぐ。各要素の count は真の値以上、count - error は真の値以下になる。
+    重みの総和 N に対して、真の値が N / capacity を超える要素は必ず追跡される。
+    capacity 個以下の要素しか現れなければ正確な値になる。
+
+    extra には重みと一緒に合計したい値を渡す (例: 重みを売上、extra を数量にする)。
+
+    Example
+    -------
+        >>> products = SpaceSaving(capacity=100)
+        >>> products.add("ノートPC", weight=128_000_00, extra=1)
+        >>> products.top(10)
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        # 要素 -> [count, error, extra]
+        self._counters: dict[str, list[int]] = {}
+        # 最小のカウンターを探すためのヒープ (count が増えた要素の古い値は取り出すときに読み飛ばす)
+        self._heap: list[tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def add(self, item: str, weight: int = 1, extra: int = 0) -> None:
+        counter = self._counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+            counter[2] += extra
+            return
+        if len(self._counters) < self.capacity:
+            self._counters[item] = [weight, 0, extra]
+            heapq.heappush(self._heap, (weight, item))
+            return
+        minimum, evicted = self._pop_min()
+        del self._counters[evicted]
+        self._counters[item] = [minimum + weight, minimum, extra]
+        heapq.heappush(self._heap, (minimum + weight, item))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def top(self, k: int) -> list[TopEntry]:
+        """count の大きい順に k 件 (同じ count は追跡を始めた順)"""
+        largest = heapq.nlargest(k, self._counters.items(), key=lambda entry: entry[1][0])
+        return [TopEntry(item, count, error, extra) for item, (count, error, extra) in largest]
+
+    def merge(self, other: SpaceSaving) -> None:
+        """other の合計を合わせる (other は変更しない)
+
+        片方にしかない要素は、もう片方の最小のカウンター (埋まっていなければ 0) を count と error に加える。
+        合わせた後も count - error <= 真の値 <= count が成り立つ。
+        """
+        own_minimum = self._minimum()
+        other_minimum = other._minimum()
+        merged: dict[str, list[int]] = {}
+        for item, (count, error, extra) in self._counters.items():
+            merged[item] = [count + other_minimum, error + other_minimum, extra]
+        for item, (count, error, extra) in other._counters.items():
+            counter = merged.get(item)
+            if counter is None:
+                merged[item] = [count + own_minimum, error + own_minimum, extra]
+            else:
+                counter[0] += count - other_minimum
+                counter[1] += error - other_minimum
+                counter[2] += extra
+        largest = heapq.nlargest(self.capacity, merged.items(), key=lambda entry: entry[1][0])
+        self._counters = dict(largest)
+        self._rebuild_heap()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "counters": [[item, count, error, extra] for item, (count, error, extra) in self._counters.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> SpaceSaving:
+        sketch = cls(capacity=data["capacity"])
+        sketch._counters = {item: [count, error, extra] for item, count, error, extra in data["counters"]}
+        sketch._rebuild_heap()
+        return sketch
+
+    def _minimum(self) -> int:
+        """置き換えられる最小のカウンター (カウンターが埋まっていなければ 0)"""
+        if len(self._counters) < self.capacity:
+            return 0
+        minimum, item = self._pop_min()
+        heapq.heappush(self._heap, (minimum, item))
+        return minimum
+
+    def _pop_min(self) -> tuple[int, str]:
+        while True:
+            count, item = heapq.heappop(self._heap)
+            counter = self._counters.get(item)
+            if counter is None:
+                continue
+            if counter[0] == count:
+                return count, item
+            # count が増えた要素は現在の値で入れ直す
+            heapq.heappush(self._heap, (counter[0], item))
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(counter[0], item) for item, counter in self._counters.items()]
+        heapq.heapify(self._heap)
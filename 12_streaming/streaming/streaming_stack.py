@@ -37,6 +37,11 @@ class StreamingStack(Stack):
             environment={
                 "POWERTOOLS_SERVICE_NAME": "order-aggregator",
                 "POWERTOOLS_LOG_LEVEL": "INFO",
+                # 8 MiB x 4 並列で先読みする (バッファは最大 8 MiB x 8 = 64 MiB)
+                "READ_AHEAD_WORKERS": "4",
+                "READ_AHEAD_CHUNK_SIZE": str(8 * 1024 * 1024),
+                # prefix を指定した場合は 8 個のオブジェクトを並行に読む (オブジェクトごとの先読みはしない)
+                "FAN_IN_CONCURRENCY": "8",
             },
         )
 
@@ -0,0 +1,118 @@
+import io
+import re
+import sys
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+# Lambda 関数のモジュール (lambda/ 配下) をテストから import できるようにする
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "lambda"))
+
+
+class FakeS3Client:
+    """テスト用の S3 クライアント (HeadObject / GetObject の Range と IfMatch / ListObjectsV2 に対応)"""
+
+    def __init__(self, objects: dict[str, bytes] | None = None):
+        self.objects: dict[str, bytes] = dict(objects or {})
+        self.ranges: list[str | None] = []
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes) -> None:
+        self.objects[Key] = Body
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> dict:
+        body = self._body(Key)
+        return {"ContentLength": len(body), "ETag": self._etag(body)}
+
+    def get_object(self, Bucket: str, Key: str, Range: str | None = None, IfMatch: str | None = None, **kwargs) -> dict:
+        body = self._body(Key)
+        if IfMatch is not None and IfMatch != self._etag(body):
+            raise RuntimeError("PreconditionFailed")
+        with self._lock:
+            self.ranges.append(Range)
+        if Range is not None:
+            start, end = re.fullmatch(r"bytes=(\d+)-(\d*)", Range).groups()
+            body = body[int(start) : int(end) + 1 if end else None]
+        return {"Body": io.BytesIO(body), "ContentLength": len(body)}
+
+    def list_objects_v2(
+        self, Bucket: str, Prefix: str = "", ContinuationToken: str | None = None, MaxKeys: int = 1000, **kwargs
+    ) -> dict:
+        # ContinuationToken は前のページの最後のキー
+        keys = sorted(key for key in self._keys() if key.startswith(Prefix) and key > (ContinuationToken or ""))
+        page = keys[:MaxKeys]
+        response = {
+            "Contents": [{"Key": key, "Size": len(self._body(key)), "ETag": self._etag(self._body(key))} for key in page],
+            "KeyCount": len(page),
+            "IsTruncated": len(keys) > MaxKeys,
+        }
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = page[-1]
+        return response
+
+    def _keys(self) -> list[str]:
+        return list(self.objects)
+
+    def _body(self, key: str) -> bytes:
+        return self.objects[key]
+
+    @staticmethod
+    def _etag(body: bytes) -> str:
+        return f'"{hash(body):x}"'
+
+
+class FileS3Client(FakeS3Client):
+    """テスト用の S3 クライアント (オブジェクトをディレクトリ内のファイルとして保存する)"""
+
+    def __init__(self, root: Path):
+        super().__init__()
+        self.root = root
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes) -> None:
+        path = self.root / Bucket / Key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(Body)
+
+    def _keys(self) -> list[str]:
+        return [
+            path.relative_to(bucket).as_posix()
+            for bucket in self.root.iterdir()
+            for path in bucket.rglob("*")
+            if path.is_file()
+        ]
+
+    def _body(self, key: str) -> bytes:
+        (path,) = self.root.glob(f"*/{key}")
+        return path.read_bytes()
+
+
+@dataclass
+class FakeLambdaContext:
+    function_name: str = "order-aggregator"
+    memory_limit_in_mb: int = 256
+    invoked_function_arn: str = "arn:aws:lambda:ap-northeast-1:123456789012:function:order-aggregator"
+    aws_request_id: str = "00000000-0000-0000-0000-000000000000"
+    remaining_time_in_millis: int = 300_000
+    # get_remaining_time_in_millis() を呼ぶたびに経過させる時間 (タイムアウト直前の状態を再現する)
+    elapsed_per_call_in_millis: int = 0
+
+    def get_remaining_time_in_millis(self) -> int:
+        self.remaining_time_in_millis -= self.elapsed_per_call_in_millis
+        return self.remaining_time_in_millis
+
+
+@pytest.fixture
+def s3_client() -> FakeS3Client:
+    return FakeS3Client()
+
+
+@pytest.fixture
+def file_s3_client(tmp_path: Path) -> FileS3Client:
+    return FileS3Client(tmp_path)
+
+
+@pytest.fixture
+def lambda_context():
+    return FakeLambdaContext
@@ -0,0 +1,142 @@
+import csv
+import gzip
+import io
+import json
+import random
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from aggregation import DEFAULT_TOP_CAPACITY, OrderAggregator, to_cents
+from columnar import ColumnarCsvTransform
+
+SAMPLE = Path(__file__).resolve().parents[2] / "orders.csv.gz"
+
+
+def reference(rows) -> dict:
+    """行ごとに Decimal で計算する集計 (OrderAggregator と同じ結果になること)"""
+    total_revenue = Decimal("0")
+    products: dict[str, dict] = {}
+    customers = set()
+    count = 0
+    for row in rows:
+        count += 1
+        revenue = int(row["quantity"]) * Decimal(row["unit_price"])
+        total_revenue += revenue
+        product = products.setdefault(row["product_name"], {"quantity": 0, "revenue": Decimal("0")})
+        product["quantity"] += int(row["quantity"])
+        product["revenue"] += revenue
+        customers.add(row["customer_id"])
+    top = sorted(
+        [
+            {"name": name, "quantity": data["quantity"], "revenue": float(data["revenue"])}
+            for name, data in products.items()
+        ],
+        key=lambda x: x["revenue"],
+        reverse=True,
+    )[:10]
+    return {
+        "total_orders": count,
+        "total_revenue": float(total_revenue),
+        "unique_customers": len(customers),
+        "unique_products": len(products),
+        "top_products": top,
+    }
+
+
+def random_csv(rows: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    prices = ["980", "1280.50", "2980", "0.99", "34800", "12800.10"]
+    lines = ["order_id,customer_id,product_name,quantity,unit_price,order_date"]
+    for index in range(rows):
+        product = rng.randrange(30)
+        price = prices[product % len(prices)]
+        lines.append(f"ORD{index},CUST{rng.randrange(200)},商品{product},{rng.randint(1, 9)},{price},2024-01-01")
+    return "\n".join(lines) + "\n"
+
+
+@pytest.mark.parametrize("typed", [True, False])
+def test_row_and_batch_modes_match_reference(typed):
+    text = random_csv(5_000)
+    expected = reference(csv.DictReader(io.StringIO(text)))
+
+    by_row = OrderAggregator()
+    for row in csv.DictReader(io.StringIO(text)):
+        by_row.add(row)
+    by_batch = OrderAggregator()
+    transform = ColumnarCsvTransform(batch_size=333, types={"quantity": int} if typed else {})
+    for batch in transform.transform(io.BytesIO(text.encode())):
+        by_batch.add_batch(batch)
+
+    assert by_row.result() == expected
+    assert by_batch.result() == expected
+
+
+def test_to_cents():
+    assert [to_cents(amount) for amount in ["980", "1280.50", "0.99", "12800.1", "-3.20"]] == [
+        98000,
+        128050,
+        99,
+        1280010,
+        -320,
+    ]
+    with pytest.raises(ValueError):
+        to_cents("0.999")
+
+
+def wide_csv(rows: int, customers: int, products: int, seed: int = 0) -> str:
+    """顧客と商品が多い (商品はパレート分布で選ぶ) CSV"""
+    rng = random.Random(seed)
+    lines = ["order_id,customer_id,product_name,quantity,unit_price,order_date"]
+    for index in range(rows):
+        product = min(int(rng.paretovariate(1.2)) - 1, products - 1)
+        price = f"{980 + product * 7}.{product % 100:02d}"
+        lines.append(f"ORD{index},CUST{rng.randrange(customers)},商品{product},{rng.randint(1, 5)},{price},2024-01-01")
+    return "\n".join(lines) + "\n"
+
+
+def test_state_stays_bounded_on_wide_input():
+    text = wide_csv(60_000, customers=40_000, products=3_000)
+    expected = reference(csv.DictReader(io.StringIO(text)))
+
+    aggregator = OrderAggregator()
+    for batch in ColumnarCsvTransform(types={"quantity": int}).transform(io.BytesIO(text.encode())):
+        aggregator.add_batch(batch)
+    result = aggregator.result()
+
+    assert aggregator.customers.nbytes == 16_384
+    assert len(aggregator.top_products) == DEFAULT_TOP_CAPACITY
+    assert result["total_orders"] == expected["total_orders"]
+    assert result["total_revenue"] == expected["total_revenue"]
+    assert abs(result["unique_customers"] / expected["unique_customers"] - 1) < 4 * 0.0081
+    assert abs(result["unique_products"] / expected["unique_products"] - 1) < 4 * 0.0081
+    assert [p["name"] for p in result["top_products"]] == [p["name"] for p in expected["top_products"]]
+    for actual, exact in zip(result["top_products"], expected["top_products"]):
+        assert exact["revenue"] <= actual["revenue"] < exact["revenue"] * 1.01
+
+
+def test_state_round_trips_through_json():
+    text = random_csv(2_000)
+    rows = list(csv.DictReader(io.StringIO(text)))
+    first = OrderAggregator()
+    for row in rows[:700]:
+        first.add(row)
+
+    resumed = OrderAggregator.from_dict(json.loads(json.dumps(first.to_dict())))
+    for row in rows[700:]:
+        resumed.add(row)
+
+    assert resumed.result() == reference(rows)
+
+
+def test_handler_aggregates_sample(s3_client, lambda_context, monkeypatch):
+    import function
+
+    s3_client.put_object(Bucket="bucket", Key="orders.csv.gz", Body=SAMPLE.read_bytes())
+    monkeypatch.setattr(function, "s3_client", s3_client)
+
+    response = function.lambda_handler({"bucket": "bucket", "key": "orders.csv.gz"}, lambda_context())
+
+    expected = reference(csv.DictReader(io.StringIO(gzip.decompress(SAMPLE.read_bytes()).decode())))
+    assert json.loads(response["body"]) == expected
@@ -0,0 +1,92 @@
+import csv
+import gzip
+import io
+from array import array
+from decimal import Decimal
+
+import pytest
+from aws_lambda_powertools.utilities.streaming import S3Object
+
+from columnar import ColumnarCsvTransform
+
+CSV = (
+    "order_id,customer_id,product_name,quantity,unit_price\n"
+    "ORD001,CUST001,ノートPC,2,89800\n"
+    "ORD002,CUST002,マウス,5,2980.50\n"
+    "ORD003,CUST001,\"キーボード, 日本語配列\",1,12800\n"
+    "ORD004,CUST003,モニター,2,34800\n"
+    "ORD005,CUST004,マウス,3,2980.50\n"
+)
+
+
+def batches(text: str, **options):
+    return list(ColumnarCsvTransform(**options).transform(io.BytesIO(text.encode())))
+
+
+@pytest.mark.parametrize("batch_size", [1, 2, 5, 100])
+def test_batches_contain_same_rows_as_dict_reader(batch_size):
+    result = batches(CSV, batch_size=batch_size)
+
+    assert [len(batch) for batch in result] == [min(batch_size, 5 - start) for start in range(0, 5, batch_size)]
+    assert [row for batch in result for row in batch.rows()] == list(csv.DictReader(io.StringIO(CSV)))
+
+
+@pytest.mark.parametrize("backend, sequence", [("list", list), ("array", array)])
+def test_typed_columns(backend, sequence):
+    (batch,) = batches(CSV, types={"quantity": int, "unit_price": Decimal}, backend=backend)
+
+    assert isinstance(batch["quantity"], sequence)
+    assert list(batch["quantity"]) == [2, 5, 1, 2, 3]
+    # Decimal は array / NumPy で扱えないため list になる
+    assert batch["unit_price"] == [Decimal(price) for price in ("89800", "2980.50", "12800", "34800", "2980.50")]
+    assert batch["product_name"][2] == "キーボード, 日本語配列"
+
+
+def test_numpy_backend():
+    numpy = pytest.importorskip("numpy")
+    (batch,) = batches(CSV, types={"quantity": int, "unit_price": float}, backend="numpy")
+
+    assert batch["quantity"].dtype == numpy.int64
+    assert batch["quantity"].sum() == 13
+    assert batch["unit_price"][1] == 2980.5
+
+
+def test_ragged_rows_and_blank_lines_match_dict_reader():
+    text = "a,b,c\n1,2,3\n\n4,5\n6,7,8,9\n"
+    (batch,) = batches(text, restval="-")
+
+    assert batch.columns == {"a": ("1", "4", "6"), "b": ("2", "5", "7"), "c": ("3", "-", "8")}
+
+
+def test_batch_of_blank_lines_does_not_stop_iteration():
+    result = batches("a\n1\n\n\n2\n", batch_size=2)
+
+    assert [batch.columns for batch in result] == [{"a": ("1",)}, {"a": ("2",)}]
+
+
+def test_fieldnames_and_reader_options():
+    (batch,) = batches("1;x\n2;y\n", fieldnames=["id", "name"], delimiter=";", types={"id": int})
+
+    assert batch.columns == {"id": [1, 2], "name": ("x", "y")}
+
+
+def test_empty_input():
+    assert batches("") == []
+    assert batches("a,b\n") == []
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        ColumnarCsvTransform(batch_size=0)
+    with pytest.raises(ValueError):
+        ColumnarCsvTransform(backend="arrow")
+
+
+def test_transform_on_s3_object(s3_client):
+    s3_client.put_object(Bucket="bucket", Key="orders.csv.gz", Body=gzip.compress(CSV.encode()))
+    s3_object = S3Object(bucket="bucket", key="orders.csv.gz", boto3_client=s3_client, is_gzip=True)
+
+    s3_object.transform(ColumnarCsvTransform(batch_size=2, types={"quantity": int}), in_place=True)
+    result = list(s3_object)
+
+    assert [list(batch["quantity"]) for batch in result] == [[2, 5], [1, 2], [3]]
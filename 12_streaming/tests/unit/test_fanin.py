@@ -0,0 +1,207 @@
+import csv
+import gzip
+import io
+import json
+import threading
+import time
+from functools import partial
+
+import pytest
+
+from aggregation import OrderAggregator
+from fanin import S3ObjectSummary, list_objects, map_objects
+
+from .test_aggregation import random_csv, reference
+
+PARTS = 12
+
+
+def put_parts(s3_client, prefix: str = "exports/2024-01-01/", parts: int = PARTS) -> list[dict]:
+    """分割されたエクスポート (part-00000.csv.gz ...) を置き、全体の行を返す"""
+    rows = []
+    for index in range(parts):
+        text = random_csv(300, seed=index)
+        s3_client.put_object(Bucket="bucket", Key=f"{prefix}part-{index:05d}.csv.gz", Body=gzip.compress(text.encode()))
+        rows.extend(csv.DictReader(io.StringIO(text)))
+    return rows
+
+
+def summaries(count: int) -> list[S3ObjectSummary]:
+    return [S3ObjectSummary(key=f"part-{index:05d}", size=0, etag="") for index in range(count)]
+
+
+def test_list_objects_follows_continuation_tokens(s3_client, monkeypatch):
+    put_parts(s3_client, parts=5)
+    put_parts(s3_client, prefix="exports/2024-01-02/", parts=2)
+    s3_client.put_object(Bucket="bucket", Key="exports/2024-01-01/_SUCCESS", Body=b"")
+    monkeypatch.setattr(s3_client, "list_objects_v2", partial(s3_client.list_objects_v2, MaxKeys=2))
+
+    objects = list_objects(
+        s3_client,
+        "bucket",
+        prefix="exports/2024-01-01/",
+        suffix=".csv.gz",
+        exclude={"exports/2024-01-01/part-00001.csv.gz"},
+    )
+
+    assert [summary.key for summary in objects] == [
+        f"exports/2024-01-01/part-{index:05d}.csv.gz" for index in (0, 2, 3, 4)
+    ]
+
+
+def test_map_objects_bounds_concurrency():
+    lock = threading.Lock()
+    running = peak = 0
+
+    def work(summary: S3ObjectSummary) -> str:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return summary.key.upper()
+
+    results = dict(map_objects(work, summaries(20), max_concurrency=3))
+
+    assert peak == 3
+    assert sorted(summary.key for summary in results) == [summary.key for summary in summaries(20)]
+    assert all(result == summary.key.upper() for summary, result in results.items())
+
+
+def test_map_objects_stops_scheduling_but_finishes_started_objects():
+    started = []
+
+    def work(summary: S3ObjectSummary) -> str:
+        started.append(summary.key)
+        return summary.key
+
+    results = list(map_objects(work, summaries(10), max_concurrency=2, should_stop=lambda: len(started) >= 3))
+
+    assert 3 <= len(results) <= 4
+    assert sorted(started) == sorted(result for _, result in results)
+
+
+@pytest.mark.parametrize("count", [1, 3])
+def test_map_objects_always_processes_first_object(count):
+    calls = []
+
+    def should_stop() -> bool:
+        calls.append(True)
+        return True
+
+    results = list(map_objects(lambda summary: summary.key, summaries(count), should_stop=should_stop))
+
+    assert [result for _, result in results] == ["part-00000"]
+    # 残りのオブジェクトがない場合は should_stop を呼び出さない
+    assert len(calls) == (count > 1)
+
+
+def test_map_objects_does_not_ask_to_stop_after_last_object():
+    calls = []
+
+    def should_stop() -> bool:
+        calls.append(True)
+        return False
+
+    results = list(map_objects(lambda summary: summary.key, summaries(5), should_stop=should_stop))
+
+    assert len(results) == 5
+    assert len(calls) == 4
+
+
+def test_map_objects_raises_errors_from_objects():
+    def work(summary: S3ObjectSummary) -> str:
+        if summary.key == "part-00003":
+            raise ValueError("broken part")
+        return summary.key
+
+    with pytest.raises(ValueError, match="broken part"):
+        list(map_objects(work, summaries(10), max_concurrency=4))
+
+
+def test_merged_partials_match_single_aggregate():
+    rows = []
+    merged = OrderAggregator()
+    for index in range(PARTS):
+        partial_aggregator = OrderAggregator()
+        part = list(csv.DictReader(io.StringIO(random_csv(300, seed=index))))
+        for row in part:
+            partial_aggregator.add(row)
+        merged.merge(OrderAggregator.from_dict(json.loads(json.dumps(partial_aggregator.to_dict()))))
+        rows.extend(part)
+
+    assert merged.result() == reference(rows)
+
+
+def test_handler_aggregates_prefix(s3_client, lambda_context, monkeypatch):
+    import function
+
+    rows = put_parts(s3_client)
+    put_parts(s3_client, prefix="exports/2024-01-02/")
+    monkeypatch.setattr(function, "s3_client", s3_client)
+
+    response = function.lambda_handler({"bucket": "bucket", "prefix": "exports/2024-01-01/"}, lambda_context())
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == reference(rows)
+
+
+def test_handler_resumes_prefix_from_checkpoint(file_s3_client, lambda_context, monkeypatch):
+    import function
+
+    rows = put_parts(file_s3_client)
+    monkeypatch.setattr(function, "s3_client", file_s3_client)
+    monkeypatch.setattr(function, "FAN_IN_CONCURRENCY", 2)
+
+    event = {"bucket": "bucket", "prefix": "exports/2024-01-01/"}
+    responses = []
+    while not responses or responses[-1]["statusCode"] == 202:
+        # 数個のオブジェクトを読み始めたところでタイムアウトが近づく
+        context = lambda_context(elapsed_per_call_in_millis=100_000)
+        responses.append(function.lambda_handler(event, context))
+        event["checkpoint"] = json.loads(responses[-1]["body"]).get("checkpoint")
+        assert len(responses) <= PARTS
+
+    assert len(responses) > 1
+    assert json.loads(responses[-1]["body"]) == reference(rows)
+
+
+def test_handler_makes_progress_when_started_past_the_margin(s3_client, lambda_context, monkeypatch):
+    import function
+
+    rows = put_parts(s3_client, parts=3)
+    monkeypatch.setattr(function, "s3_client", s3_client)
+
+    event = {"bucket": "bucket", "prefix": "exports/2024-01-01/"}
+    responses = []
+    while not responses or responses[-1]["statusCode"] == 202:
+        # 最初から残り時間が CHECKPOINT_MARGIN_MS を下回っていても、呼び出しごとに 1 つずつ読み進める
+        responses.append(function.lambda_handler(event, lambda_context(remaining_time_in_millis=1_000)))
+        event["checkpoint"] = json.loads(responses[-1]["body"]).get("checkpoint")
+        assert len(responses) <= 3
+
+    # 最後のオブジェクトを読んだ呼び出しは (続きがないため) 202 ではなく結果を返す
+    assert [response["statusCode"] for response in responses] == [202, 202, 200]
+    assert json.loads(responses[-1]["body"]) == reference(rows)
+
+
+def test_handler_merges_partials_across_invocations(s3_client, lambda_context, monkeypatch):
+    import function
+
+    rows = put_parts(s3_client, prefix="exports/2024-01-01/")
+    rows += put_parts(s3_client, prefix="exports/2024-01-02/", parts=3)
+    monkeypatch.setattr(function, "s3_client", s3_client)
+
+    # prefix ごとの呼び出しとオブジェクトごとの呼び出しの partial をまとめる
+    events = [{"bucket": "bucket", "prefix": "exports/2024-01-01/", "partial": True}]
+    events += [
+        {"bucket": "bucket", "key": f"exports/2024-01-02/part-{index:05d}.csv.gz", "partial": True} for index in range(3)
+    ]
+    partials = [json.loads(function.lambda_handler(event, lambda_context())["body"])["partial"] for event in events]
+
+    response = function.lambda_handler({"partials": partials}, lambda_context())
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == reference(rows)
@@ -0,0 +1,123 @@
+import gzip
+import io
+import random
+
+import pytest
+from aws_lambda_powertools.utilities.streaming import S3Object
+from aws_lambda_powertools.utilities.streaming._s3_seekable_io import _S3SeekableIO
+
+from readahead import ReadAheadS3Object, S3ReadAheadIO
+
+HEADER = "order_id,customer_id,product_name,quantity,unit_price,order_date\n"
+
+
+def csv_gz(rows: int) -> bytes:
+    lines = [
+        f"ORD{index:06d},CUST{index % 97:03d},商品{index % 13},{index % 5 + 1},{index % 7 * 100 + 980},2024-01-15\n"
+        for index in range(rows)
+    ]
+    return gzip.compress((HEADER + "".join(lines)).encode())
+
+
+@pytest.fixture
+def payload() -> bytes:
+    return random.Random(0).randbytes(10_000)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1000, 20_000])
+def test_reads_same_bytes_as_object(s3_client, payload, chunk_size):
+    s3_client.put_object(Bucket="bucket", Key="data", Body=payload)
+    stream = S3ReadAheadIO("bucket", "data", boto3_client=s3_client, chunk_size=chunk_size, max_workers=3)
+    rng = random.Random(chunk_size)
+
+    parts = []
+    while part := stream.read(rng.randint(1, 3000)):
+        parts.append(part)
+
+    assert b"".join(parts) == payload
+    assert stream.tell() == len(payload)
+    assert len(s3_client.ranges) == -(-len(payload) // chunk_size)
+
+
+def test_readline_spans_chunks(s3_client):
+    body = b"".join(f"line-{index}\n".encode() * (index % 3 + 1) for index in range(500)) + b"tail"
+    s3_client.put_object(Bucket="bucket", Key="lines", Body=body)
+    stream = S3ReadAheadIO("bucket", "lines", boto3_client=s3_client, chunk_size=13, max_workers=2)
+
+    assert list(stream) == io.BytesIO(body).readlines()
+
+
+def test_csv_rows_match_sequential_reader(s3_client):
+    s3_client.put_object(Bucket="bucket", Key="orders.csv.gz", Body=csv_gz(5_000))
+    expected = list(S3Object(bucket="bucket", key="orders.csv.gz", boto3_client=s3_client, is_gzip=True, is_csv=True))
+
+    s3_object = ReadAheadS3Object(
+        bucket="bucket", key="orders.csv.gz", boto3_client=s3_client, is_gzip=True, is_csv=True, chunk_size=4096
+    )
+
+    assert list(s3_object) == expected
+    assert len(expected) == 5_000
+
+
+def test_buffer_pool_is_bounded(s3_client, payload):
+    s3_client.put_object(Bucket="bucket", Key="data", Body=payload)
+    stream = S3ReadAheadIO("bucket", "data", boto3_client=s3_client, chunk_size=100, max_workers=2, max_buffers=3)
+
+    outstanding = []
+    while stream.read(50):
+        outstanding.append(len(stream._pending))
+
+    assert max(outstanding) == 2
+
+
+def test_seek_within_chunk_keeps_read_ahead(s3_client, payload):
+    s3_client.put_object(Bucket="bucket", Key="data", Body=payload)
+    stream = S3ReadAheadIO("bucket", "data", boto3_client=s3_client, chunk_size=1000, max_workers=2)
+
+    stream.read(500)
+    stream.seek(100)
+    assert stream.read(10) == payload[100:110]
+    fetched = len(s3_client.ranges)
+
+    stream.seek(-10, io.SEEK_END)
+    assert stream.read() == payload[-10:]
+    assert s3_client.ranges[fetched] == f"bytes={len(payload) - 10}-{len(payload) - 1}"
+
+
+def test_object_replaced_during_read_fails(s3_client, payload):
+    s3_client.put_object(Bucket="bucket", Key="data", Body=payload)
+    stream = S3ReadAheadIO("bucket", "data", boto3_client=s3_client, chunk_size=1000, max_workers=1, max_buffers=2)
+    stream.read(10)
+
+    s3_client.put_object(Bucket="bucket", Key="data", Body=payload[::-1])
+    with pytest.raises(RuntimeError, match="PreconditionFailed"):
+        stream.read()
+
+
+def test_empty_object(s3_client):
+    s3_client.put_object(Bucket="bucket", Key="empty", Body=b"")
+    stream = S3ReadAheadIO("bucket", "empty", boto3_client=s3_client)
+
+    assert stream.read() == b""
+    assert stream.readline() == b""
+    assert s3_client.ranges == []
+
+
+def test_zero_workers_uses_sequential_stream(s3_client, payload):
+    s3_client.put_object(Bucket="bucket", Key="data", Body=payload)
+    s3_object = ReadAheadS3Object(bucket="bucket", key="data", boto3_client=s3_client, max_workers=0)
+
+    assert type(s3_object.raw_stream) is _S3SeekableIO
+    assert s3_object.read() == payload
+    assert s3_client.ranges == ["bytes=0-"]
+
+
+def test_close_stops_read_ahead(s3_client, payload):
+    s3_client.put_object(Bucket="bucket", Key="data", Body=payload)
+    s3_object = ReadAheadS3Object(bucket="bucket", key="data", boto3_client=s3_client, chunk_size=100)
+    s3_object.read(10)
+    s3_object.close()
+
+    assert s3_object.closed
+    assert not s3_object.raw_stream._pending
+
@@ -0,0 +1,150 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from aws_lambda_powertools.utilities.streaming import S3Object
+
+from readahead import ReadAheadS3Object
+from resumable import ResumableCsvTransform, StreamPosition
+
+from .test_aggregation import random_csv, reference
+
+FORMATS = ["gzip", "members", "plain"]
+
+
+def encode(text: str, fmt: str) -> bytes:
+    data = text.encode()
+    if fmt == "plain":
+        return data
+    if fmt == "gzip":
+        return gzip.compress(data)
+    # 5,000 バイトごとに圧縮して連結する (行の途中でメンバーが切り替わる。末尾は 0 埋め)
+    return b"".join(gzip.compress(data[start : start + 5_000]) for start in range(0, len(data), 5_000)) + b"\0" * 8
+
+
+def open_reader(client, fmt: str, position: StreamPosition | None = None, read_ahead: bool = False, batch_size=100):
+    if read_ahead:
+        s3_object = ReadAheadS3Object("bucket", "orders.csv.gz", boto3_client=client, chunk_size=4_096, max_workers=2)
+    else:
+        s3_object = S3Object("bucket", "orders.csv.gz", boto3_client=client)
+    transform = ResumableCsvTransform(position=position, compressed=fmt != "plain", batch_size=batch_size)
+    s3_object.transform(transform, in_place=True)
+    return s3_object
+
+
+def batch_rows(batch) -> list[dict]:
+    return list(batch.rows())
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_reads_all_rows(file_s3_client, fmt):
+    text = random_csv(3_000)
+    file_s3_client.put_object(Bucket="bucket", Key="orders.csv.gz", Body=encode(text, fmt))
+
+    s3_object = open_reader(file_s3_client, fmt)
+    rows = [row for batch in s3_object for row in batch_rows(batch)]
+
+    assert rows == list(csv.DictReader(io.StringIO(text)))
+    assert s3_object.transformed_stream.rows == 3_000
+
+
+@pytest.mark.parametrize("read_ahead", [False, True])
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_resumes_after_interruptions(file_s3_client, fmt, read_ahead):
+    text = random_csv(3_000)
+    file_s3_client.put_object(Bucket="bucket", Key="orders.csv.gz", Body=encode(text, fmt))
+
+    rows = []
+    saved = None
+    invocations = 0
+    while True:
+        invocations += 1
+        position = StreamPosition.from_dict(json.loads(saved)) if saved else None
+        s3_object = open_reader(file_s3_client, fmt, position, read_ahead=read_ahead, batch_size=70)
+        reader = s3_object.transformed_stream
+        # 3 バッチ読んだところで中断する
+        for _, batch in zip(range(3), reader):
+            rows.extend(batch_rows(batch))
+        saved = json.dumps(reader.position.to_dict())
+        s3_object.close()
+        if reader.rows == 3_000 and not next(open_reader(file_s3_client, fmt, reader.position), None):
+            break
+
+    assert rows == list(csv.DictReader(io.StringIO(text)))
+    assert invocations == 15
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_resumes_every_row_with_quoted_newlines(s3_client, fmt, monkeypatch):
+    # 改行を含む列・CRLF・マルチバイト文字がブロックの境界をまたぐように、読み込みの単位を小さくする
+    monkeypatch.setattr("resumable.READ_SIZE", 7)
+    text = 'id,note\r\n1,"改行を\r\n含む"\r\n2,ｶﾝﾏ\r\n3,"a,""b"""\r\n\r\n4,最後\r\n'
+    s3_client.put_object(Bucket="bucket", Key="orders.csv.gz", Body=encode(text, fmt))
+
+    rows = []
+    position = None
+    while batch := next(open_reader(s3_client, fmt, position, batch_size=1), None):
+        reader = open_reader(s3_client, fmt, position, batch_size=1).transformed_stream
+        rows.extend(batch_rows(next(reader)))
+        position = StreamPosition.from_dict(json.loads(json.dumps(reader.position.to_dict())))
+
+    assert rows == list(csv.DictReader(io.StringIO(text, newline="")))
+
+
+def test_position_restarts_at_member_boundary(file_s3_client):
+    text = random_csv(3_000)
+    body = encode(text, "members")
+    file_s3_client.put_object(Bucket="bucket", Key="orders.csv.gz", Body=body)
+
+    reader = open_reader(file_s3_client, "members").transformed_stream
+    for _ in range(10):
+        next(reader)
+    position = reader.position
+
+    # メンバーの途中から読み直すのは、そのメンバーの先頭からの展開だけ
+    assert 0 < position.offset < len(body)
+    assert 0 <= position.skip < 5_000
+    member = gzip.GzipFile(fileobj=io.BytesIO(body[position.offset :])).read(5_000)
+    consumed = "".join(text.splitlines(keepends=True)[: position.rows + 1]).encode()
+    assert member[: position.skip] == consumed[len(consumed) - position.skip :]
+
+
+def test_rejects_changed_object(s3_client):
+    s3_client.put_object(Bucket="bucket", Key="orders.csv.gz", Body=encode(random_csv(1_000), "gzip"))
+    reader = open_reader(s3_client, "gzip", read_ahead=True).transformed_stream
+    next(reader)
+    position = reader.position
+
+    s3_client.put_object(Bucket="bucket", Key="orders.csv.gz", Body=encode(random_csv(1_000, seed=1), "gzip"))
+    with pytest.raises(ValueError, match="Object changed"):
+        next(open_reader(s3_client, "gzip", position, read_ahead=True))
+
+
+def test_truncated_gzip_raises(s3_client):
+    body = encode(random_csv(1_000), "gzip")
+    s3_client.put_object(Bucket="bucket", Key="orders.csv.gz", Body=body[:-100])
+
+    with pytest.raises(EOFError):
+        list(open_reader(s3_client, "gzip"))
+
+
+def test_handler_resumes_from_checkpoint(file_s3_client, lambda_context, monkeypatch):
+    import function
+
+    text = random_csv(2_000)
+    file_s3_client.put_object(Bucket="bucket", Key="orders.csv.gz", Body=encode(text, "members"))
+    monkeypatch.setattr(function, "s3_client", file_s3_client)
+    monkeypatch.setattr(function, "BATCH_SIZE", 100)
+
+    event = {"bucket": "bucket", "key": "orders.csv.gz"}
+    responses = []
+    while not responses or responses[-1]["statusCode"] == 202:
+        # 3 バッチ目でタイムアウトが近づく
+        context = lambda_context(elapsed_per_call_in_millis=100_000)
+        responses.append(function.lambda_handler(event, context))
+        event["checkpoint"] = json.loads(responses[-1]["body"]).get("checkpoint")
+
+    assert [response["statusCode"] for response in responses] == [202] * 6 + [200]
+    assert json.loads(responses[-1]["body"]) == reference(csv.DictReader(io.StringIO(text)))
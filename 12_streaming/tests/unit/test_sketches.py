@@ -0,0 +1,172 @@
+import json
+import random
+from collections import Counter
+
+import pytest
+
+from sketches import HyperLogLog, SpaceSaving
+
+
+def ids(start: int, stop: int) -> list[str]:
+    return [f"CUST{index:08d}" for index in range(start, stop)]
+
+
+def test_hyperloglog_is_exact_while_sparse():
+    sketch = HyperLogLog(precision=12)
+    sketch.update(ids(0, 200))
+    sketch.update(ids(100, 256))
+
+    assert sketch.is_sparse
+    assert sketch.count() == 256
+
+
+@pytest.mark.parametrize("precision", [10, 12, 14])
+def test_hyperloglog_estimate_within_error_bound(precision):
+    sketch = HyperLogLog(precision=precision)
+    for start in range(0, 200_000, 1_000):
+        sketch.update(ids(start, start + 1_000))
+        # 同じ値を何度追加してもユニーク数は変わらない
+        sketch.update(ids(start, start + 100))
+
+    assert not sketch.is_sparse
+    assert sketch.nbytes == 2**precision
+    # 標準誤差 1.04 / sqrt(m) の 4 倍以内
+    assert abs(sketch.count() - 200_000) / 200_000 < 4 * 1.04 / 2 ** (precision / 2)
+
+
+def test_hyperloglog_merge_equals_union():
+    left, right, both = HyperLogLog(precision=12), HyperLogLog(precision=12), HyperLogLog(precision=12)
+    left.update(ids(0, 60_000))
+    right.update(ids(40_000, 100_000))
+    both.update(ids(0, 100_000))
+
+    left.merge(right)
+
+    assert left.to_dict() == both.to_dict()
+
+
+def test_hyperloglog_merge_sparse_into_dense():
+    dense, sparse, both = HyperLogLog(precision=10), HyperLogLog(precision=10), HyperLogLog(precision=10)
+    dense.update(ids(0, 5_000))
+    sparse.update(ids(4_990, 5_030))
+    both.update(ids(0, 5_030))
+
+    sparse_copy = HyperLogLog.from_dict(sparse.to_dict())
+    sparse_copy.merge(dense)
+    dense.merge(sparse)
+
+    assert sparse.is_sparse
+    assert dense.to_dict() == sparse_copy.to_dict() == both.to_dict()
+
+
+@pytest.mark.parametrize("values", [ids(0, 10), ids(0, 10_000)])
+def test_hyperloglog_round_trips_through_json(values):
+    sketch = HyperLogLog(precision=12)
+    sketch.update(values)
+
+    restored = HyperLogLog.from_dict(json.loads(json.dumps(sketch.to_dict())))
+
+    assert restored.count() == sketch.count()
+    assert restored.to_dict() == sketch.to_dict()
+
+
+def test_hyperloglog_round_trips_through_double_based_json():
+    sketch = HyperLogLog(precision=12)
+    sketch.update(ids(0, 200))
+    assert sketch.is_sparse
+    assert max(sketch._sparse) > 2**53
+
+    # Step Functions や JavaScript のように、JSON の数値を倍精度浮動小数点数で読む場合
+    data = json.loads(json.dumps(sketch.to_dict()), parse_int=lambda text: int(float(text)))
+    restored = HyperLogLog.from_dict(data)
+
+    assert restored._sparse == sketch._sparse
+    restored.update(ids(100, 250))
+    assert restored.count() == 250
+
+
+def test_hyperloglog_rejects_state_from_another_hash_function():
+    data = HyperLogLog().to_dict()
+    data["hash"] += 1
+
+    with pytest.raises(ValueError, match="different hash"):
+        HyperLogLog.from_dict(data)
+
+
+def test_hyperloglog_rejects_invalid_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=3)
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=12).merge(HyperLogLog(precision=14))
+
+
+def zipf_stream(items: int, size: int, seed: int = 0) -> list[tuple[str, int]]:
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(items)]
+    names = rng.choices([f"item-{rank}" for rank in range(items)], weights=weights, k=size)
+    return [(name, rng.randint(1, 5)) for name in names]
+
+
+def assert_bounds(sketch: SpaceSaving, stream: list[tuple[str, int]]) -> None:
+    exact = Counter()
+    for item, weight in stream:
+        exact[item] += weight
+    total = sum(exact.values())
+    entries = {entry.item: entry for entry in sketch.top(sketch.capacity)}
+    for entry in entries.values():
+        assert entry.count - entry.error <= exact[entry.item] <= entry.count
+    # 合計の 1 / capacity を超える要素は必ず追跡されている
+    for item, count in exact.items():
+        if count > total / sketch.capacity:
+            assert item in entries
+
+
+def test_space_saving_is_exact_within_capacity():
+    sketch = SpaceSaving(capacity=10)
+    for item, weight in [("a", 3), ("b", 5), ("a", 4), ("c", 1)]:
+        sketch.add(item, weight, extra=1)
+
+    assert [(entry.item, entry.count, entry.error, entry.extra) for entry in sketch.top(2)] == [
+        ("a", 7, 0, 2),
+        ("b", 5, 0, 1),
+    ]
+
+
+def test_space_saving_bounds_and_top_items():
+    stream = zipf_stream(items=5_000, size=100_000)
+    sketch = SpaceSaving(capacity=100)
+    for item, weight in stream:
+        sketch.add(item, weight)
+
+    assert len(sketch) == 100
+    assert_bounds(sketch, stream)
+    exact = Counter()
+    for item, weight in stream:
+        exact[item] += weight
+    assert [entry.item for entry in sketch.top(5)] == [item for item, _ in exact.most_common(5)]
+
+
+def test_space_saving_merge_keeps_bounds():
+    stream = zipf_stream(items=2_000, size=60_000, seed=1)
+    left, right = SpaceSaving(capacity=50), SpaceSaving(capacity=50)
+    for item, weight in stream[:30_000]:
+        left.add(item, weight)
+    for item, weight in stream[30_000:]:
+        right.add(item, weight)
+
+    left.merge(right)
+
+    assert len(left) == 50
+    assert_bounds(left, stream)
+
+
+def test_space_saving_round_trips_through_json():
+    sketch = SpaceSaving(capacity=20)
+    for item, weight in zipf_stream(items=100, size=2_000):
+        sketch.add(item, weight, extra=1)
+
+    restored = SpaceSaving.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    restored.add("item-0", 1)
+    sketch.add("item-0", 1)
+
+    assert restored.top(20) == sketch.top(20)